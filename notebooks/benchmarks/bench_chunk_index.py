@@ -0,0 +1,98 @@
+"""
+Chunk sampling throughput: the notebook's `extract_random_chunk`, which
+encodes the whole document on every call, against llm_utils.chunk_index.
+
+Uses ../docs_sample when it is there (see PromptEngineeringPractice.ipynb),
+otherwise a synthetic markdown corpus of similar size.
+
+Run from the `notebooks` directory:
+    python -m benchmarks.bench_chunk_index [samples]
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.offline_tokenizer import load_tokenizer
+from llm_utils.chunk_index import ChunkIndex
+
+DOCS_SAMPLE = "../docs_sample/"
+
+
+def synthetic_docs(directory, n_files=120, seed=0):
+    rng = random.Random(seed)
+    words = ("wandb run artifact sweep log metric table report project team config "
+             "model dataset version alias panel chart step epoch loss accuracy").split()
+    for i in range(n_files):
+        path = Path(directory) / f"section_{i % 6}" / f"page_{i}.md"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        paragraphs = [
+            " ".join(rng.choice(words) for _ in range(rng.randint(40, 120))) + "."
+            for _ in range(rng.randint(5, 120))
+        ]
+        path.write_text(f"# Page {i}\n\n" + "\n\n".join(paragraphs) + "\n```python\nwandb.init()\n```\n")
+
+
+def find_md_files(directory):
+    return [(file.relative_to(directory), file.read_text(encoding="utf-8")) for file in Path(directory).rglob("*.md")]
+
+
+def main(n_samples):
+    tokenizer, tokenizer_name = load_tokenizer("gpt-3.5-turbo")
+    with tempfile.TemporaryDirectory() as work:
+        if os.path.isdir(DOCS_SAMPLE):
+            directory, corpus = DOCS_SAMPLE, "docs_sample"
+        else:
+            directory, corpus = os.path.join(work, "docs"), "synthetic docs (docs_sample not found)"
+            synthetic_docs(directory)
+        documents = find_md_files(directory)
+        n_tokens = sum(len(tokenizer.encode(d)) for _, d in documents)
+        print(f"{corpus}: {len(documents)} files, {n_tokens:,} tokens, {tokenizer_name}")
+
+        def extract_random_chunk(document, max_tokens=512):
+            tokens = tokenizer.encode(document)
+            if len(tokens) <= max_tokens:
+                return document
+            start = random.randint(0, len(tokens) - max_tokens)
+            return tokenizer.decode(tokens[start:start + max_tokens])
+
+        random.seed(0)
+        picks = [random.choice(documents) for _ in range(n_samples)]
+
+        start = time.perf_counter()
+        for _, document in picks:
+            extract_random_chunk(document)
+        before = time.perf_counter() - start
+        print(f"  extract_random_chunk        {n_samples / before:9.0f} chunks/s")
+
+        cache_dir = os.path.join(work, "cache")
+        start = time.perf_counter()
+        chunk_index = ChunkIndex(directory, tokenizer, cache_dir=cache_dir)
+        print(f"  ChunkIndex build (cold)     {time.perf_counter() - start:9.2f} s")
+        start = time.perf_counter()
+        chunk_index = ChunkIndex(directory, tokenizer, cache_dir=cache_dir)
+        print(f"  ChunkIndex reload (warm)    {time.perf_counter() - start:9.3f} s")
+
+        start = time.perf_counter()
+        for path, _ in picks:
+            chunk_index.random_chunk(path)
+        after = time.perf_counter() - start
+        print(f"  ChunkIndex.random_chunk     {n_samples / after:9.0f} chunks/s  ({before / after:.0f}x)")
+
+        path, document = documents[0]
+        assert chunk_index.window(path, 0, chunk_index.n_tokens(path)) == document
+        if corpus.startswith("synthetic"):
+            target = Path(directory) / path
+            time.sleep(0.01)
+            target.write_text(document + "\nOne more line.\n")
+            assert chunk_index.window(path, 0, 10 ** 9) == document + "\nOne more line.\n"
+            print("  mtime change re-tokenizes the file: ok")
+        shutil.rmtree(cache_dir)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
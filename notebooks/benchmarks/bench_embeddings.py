@@ -0,0 +1,101 @@
+"""
+Embedding the notebook corpora with llm_utils.embeddings against calling the
+API for every text, on a local mock of the OpenAI embeddings endpoint that
+charges a delay per request and per text.
+
+The corpus is the sections of a synthetic markdown corpus (or ../docs_sample)
+with every fourth section repeated, as happens with boilerplate sections.
+Also compares the float32 and float16 stores and times the local
+HashingEmbeddings.
+
+Run from the `notebooks` directory:
+    python -m benchmarks.bench_embeddings
+"""
+
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import openai
+
+from benchmarks.bench_chunk_index import DOCS_SAMPLE, synthetic_docs
+from benchmarks.mock_openai import MockOpenAIHandler, start_server
+from benchmarks.offline_tokenizer import load_tokenizer
+from llm_utils.embeddings import DEFAULT_MODEL, EmbeddingService, EmbeddingStore, HashingEmbeddings
+
+
+def sections_of(directory, size=1000):
+    texts = []
+    for path in sorted(Path(directory).rglob("*.md")):
+        text = path.read_text(encoding="utf-8")
+        texts.extend(text[i:i + size] for i in range(0, len(text), size))
+    return texts + texts[::4]
+
+
+def naive_embed(texts, chunk_size=1000):
+    """What the notebooks do today: every text, sequential requests, nothing kept"""
+    vectors = []
+    for start in range(0, len(texts), chunk_size):
+        response = openai.Embedding.create(model=DEFAULT_MODEL, input=texts[start:start + chunk_size])
+        vectors.extend(item["embedding"] for item in response["data"])
+    return vectors
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    server, openai.api_base = start_server()
+    openai.api_key = "sk-mock"
+    MockOpenAIHandler.latency = 0.3
+    MockOpenAIHandler.latency_per_input = 0.002
+    MockOpenAIHandler.embedding_dim = 1536
+    tokenizer, tokenizer_name = load_tokenizer(DEFAULT_MODEL)
+    count_tokens = lambda text: len(tokenizer.encode(text))
+
+    with tempfile.TemporaryDirectory() as work:
+        if os.path.isdir(DOCS_SAMPLE):
+            directory, corpus = DOCS_SAMPLE, "docs_sample"
+        else:
+            directory, corpus = os.path.join(work, "docs"), "synthetic docs"
+            synthetic_docs(directory, n_files=40)
+        texts = sections_of(directory)
+        print(f"{corpus}: {len(texts)} sections, {len(set(texts))} unique, {tokenizer_name}; "
+              f"mock {MockOpenAIHandler.latency * 1000:.0f} ms/request + "
+              f"{MockOpenAIHandler.latency_per_input * 1000:.0f} ms/text")
+
+        seconds, naive = timed(lambda: naive_embed(texts))
+        print(f"  API call per run, 1000 per request   {seconds:6.2f}s")
+
+        for dtype in ("float32", "float16"):
+            store = EmbeddingStore(os.path.join(work, f"cache-{dtype}"), dtype)
+            service = EmbeddingService(store=store, max_batch_tokens=100_000, count_tokens=count_tokens)
+            seconds, vectors = timed(lambda: service.embed(texts))
+            print(f"  EmbeddingService {dtype}, cold       {seconds:6.2f}s  {service.stats}")
+            seconds, vectors = timed(lambda: service.embed(texts))
+            size = os.path.getsize(store._path(DEFAULT_MODEL))
+            error = np.abs(vectors - np.asarray(naive, dtype=np.float32)).max()
+            print(f"  EmbeddingService {dtype}, warm       {seconds:6.2f}s  "
+                  f"{size / 2 ** 20:.1f} MiB on disk, max error {error:.1e}")
+            store.close()
+
+        local = HashingEmbeddings(dim=512).fit(texts)
+        seconds, matrix = timed(lambda: local.embed(texts))
+        print(f"  HashingEmbeddings, {len(texts)} texts          {seconds:6.2f}s  "
+              f"deterministic: {np.array_equal(matrix, HashingEmbeddings(dim=512).fit(texts).embed(texts))}")
+        # A section with a few words changed still finds its original
+        queries = [" ".join(text.split()[5:]) for text in texts[:50]]
+        nearest = (local.embed(queries) @ matrix.T).argmax(axis=1)
+        hits = np.mean([texts[j] == texts[i] for i, j in enumerate(nearest)])
+        print(f"  HashingEmbeddings, edited section -> original: {hits:.0%}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Wall time of synthetic question generation: the notebook's sequential
+`generate_questions` loop against the asyncio pipeline of
+llm_utils.generation, on a local mock of the chat completions API.
+
+Also checks that the RPM budget holds and that an interrupted run resumes
+from its checkpoint without generating finished documents again.
+
+Run from the `notebooks` directory:
+    python -m benchmarks.bench_generation [documents]
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import openai
+from tenacity import retry, stop_after_attempt, wait_random_exponential
+
+from benchmarks.mock_openai import MockOpenAIHandler, start_server
+from benchmarks.offline_tokenizer import load_tokenizer
+from llm_utils.generation import QuestionGenerator
+
+MODEL_NAME = "gpt-4"
+SYSTEM_PROMPT = "You are a helpful assistant."
+TOKENIZER, TOKENIZER_NAME = load_tokenizer(MODEL_NAME)
+
+
+def synthetic_documents(n_documents):
+    paragraph = "W&B lets you log metrics with `wandb.log` and track runs in the app. "
+    return [(f"guides/page_{i}.md", f"# Page {i}\n" + paragraph * (20 + i % 30)) for i in range(n_documents)]
+
+
+def make_prompt(path, document):
+    return "Generate a support question from a W&B user\n" + document[:2000] + "\nLet's start!"
+
+
+@retry(wait=wait_random_exponential(min=1, max=60), stop=stop_after_attempt(6))
+def completion_with_backoff(**kwargs):
+    return openai.ChatCompletion.create(**kwargs)
+
+
+def sequential_generate_questions(documents, n_generations=5):
+    """The notebook's loop"""
+    questions = []
+    for path, document in documents:
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": make_prompt(path, document)},
+        ]
+        response = completion_with_backoff(model=MODEL_NAME, messages=messages, n=n_generations)
+        questions.extend([response.choices[i].message.content for i in range(n_generations)])
+    return questions
+
+
+async def generate(documents, checkpoint=None, **kwargs):
+    generator = QuestionGenerator(MODEL_NAME, SYSTEM_PROMPT, tokenizer=TOKENIZER, **kwargs)
+    questions = await generator.generate_questions(documents, make_prompt, n_generations=5, checkpoint=checkpoint)
+    return questions, generator
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main(n_documents):
+    server, openai.api_base = start_server()
+    openai.api_key = "sk-mock"
+    documents = synthetic_documents(n_documents)
+    print(f"{n_documents} documents, mock latency {MockOpenAIHandler.latency * 1000:.0f} ms, {TOKENIZER_NAME}")
+
+    seconds, questions = timed(lambda: sequential_generate_questions(documents))
+    print(f"  sequential loop              {seconds:7.2f}s  {len(questions)} generations")
+    # Budgets out of the way first, to see what concurrency alone gives
+    unbounded = {"rpm": 1_000_000, "tpm": 1_000_000_000}
+    for concurrency in (8, 32):
+        seconds, (questions, _) = timed(lambda: asyncio.run(generate(documents, concurrency=concurrency, **unbounded)))
+        print(f"  asyncio, concurrency {concurrency:<3}     {seconds:7.2f}s  {len(questions)} generations")
+
+    for budget in ({"rpm": 1200, "tpm": 1_000_000_000}, {"rpm": 1_000_000, "tpm": 40_000}):
+        seconds, (_, generator) = timed(lambda: asyncio.run(generate(documents, concurrency=32, **budget)))
+        print(f"  concurrency 32, {budget['rpm']:>9} RPM {budget['tpm']:>10} TPM {seconds:7.2f}s  "
+              f"({n_documents / seconds * 60:.0f} requests, {generator.stats['tokens'] / seconds * 60:.0f} tokens"
+              f" per minute, the first minute starts with a full budget)")
+
+    MockOpenAIHandler.rate_limit_rate = 0.1
+    seconds, (questions, generator) = timed(lambda: asyncio.run(generate(documents, concurrency=32, **unbounded)))
+    print(f"  10% rate limited (429)       {seconds:7.2f}s  {generator.stats['retries']} retries, "
+          f"{len(questions)} generations")
+    MockOpenAIHandler.rate_limit_rate = 0.0
+
+    with tempfile.TemporaryDirectory() as work:
+        checkpoint = os.path.join(work, "generations.jsonl")
+
+        async def interrupted():
+            await asyncio.wait_for(generate(documents, checkpoint, concurrency=8, **unbounded), timeout=0.6 * (
+                n_documents / 8 * MockOpenAIHandler.latency))
+
+        try:
+            asyncio.run(interrupted())
+        except asyncio.TimeoutError:
+            pass
+        with open(checkpoint) as f:
+            finished = sum(1 for _ in f)
+        # Let the requests cancelled by the interruption reach the mock
+        time.sleep(2 * MockOpenAIHandler.latency)
+        MockOpenAIHandler.requests = 0
+        seconds, (questions, _) = timed(lambda: asyncio.run(generate(documents, checkpoint, concurrency=8, **unbounded)))
+        print(f"  resume after interruption    {seconds:7.2f}s  {finished} documents kept, "
+              f"{MockOpenAIHandler.requests} requests made, {len(questions)} generations")
+        assert finished + MockOpenAIHandler.requests == n_documents
+        assert len(questions) == 5 * n_documents
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100)
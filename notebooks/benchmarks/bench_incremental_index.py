@@ -0,0 +1,113 @@
+"""
+Re-indexing cost of the Retrieval notebook: rebuilding with
+`Chroma.from_documents` on every run against llm_utils.incremental_index,
+with embeddings served by a local mock of the OpenAI API that charges a
+delay per embedded text.
+
+Uses ../docs_sample when it is there, otherwise a synthetic markdown corpus.
+
+Run from the `notebooks` directory:
+    python -m benchmarks.bench_incremental_index
+"""
+
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import openai
+from langchain.document_loaders import DirectoryLoader, TextLoader
+from langchain.embeddings.base import Embeddings
+from langchain.text_splitter import MarkdownTextSplitter
+from langchain.vectorstores import Chroma
+
+from benchmarks.bench_chunk_index import DOCS_SAMPLE, synthetic_docs
+from benchmarks.mock_openai import MockOpenAIHandler, start_server
+from llm_utils.incremental_index import IncrementalIndex
+
+
+class MockAPIEmbeddings(Embeddings):
+    """Embeddings from the mock API, counting the texts sent"""
+
+    def __init__(self):
+        self.embedded = 0
+
+    def embed_documents(self, texts):
+        vectors = []
+        for start in range(0, len(texts), 1000):
+            batch = texts[start:start + 1000]
+            response = openai.Embedding.create(model="text-embedding-ada-002", input=batch)
+            vectors.extend(item["embedding"] for item in response["data"])
+        self.embedded += len(texts)
+        return vectors
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    server, openai.api_base = start_server()
+    openai.api_key = "sk-mock"
+    MockOpenAIHandler.latency = 0.3
+    MockOpenAIHandler.latency_per_input = 0.01
+    splitter = MarkdownTextSplitter(chunk_size=1000)
+
+    with tempfile.TemporaryDirectory() as work:
+        if os.path.isdir(DOCS_SAMPLE):
+            directory = os.path.join(work, "docs")
+            shutil.copytree(DOCS_SAMPLE, directory)
+            corpus = "docs_sample"
+        else:
+            directory, corpus = os.path.join(work, "docs"), "synthetic docs (docs_sample not found)"
+            synthetic_docs(directory, n_files=60)
+        print(f"{corpus}, embeddings at {MockOpenAIHandler.latency * 1000:.0f} ms per request "
+              f"+ {MockOpenAIHandler.latency_per_input * 1000:.0f} ms per text")
+
+        def rebuild():
+            embeddings = MockAPIEmbeddings()
+            documents = DirectoryLoader(directory, "**/*.md", loader_cls=TextLoader).load()
+            sections = splitter.split_documents(documents)
+            Chroma.from_documents(sections, embeddings)
+            return embeddings.embedded
+
+        seconds, embedded = timed(rebuild)
+        print(f"  Chroma.from_documents, every run   {seconds:6.2f}s  {embedded} sections embedded")
+
+        def sync(label):
+            embeddings = MockAPIEmbeddings()
+            seconds, (index, stats) = timed(lambda: (
+                lambda index: (index, index.sync(directory, "**/*.md", loader_cls=TextLoader))
+            )(IncrementalIndex(os.path.join(work, "index"), embeddings, splitter)))
+            print(f"  IncrementalIndex, {label:<17}{seconds:6.2f}s  {embeddings.embedded} embedded, "
+                  f"{stats['changed']} files changed, {stats['removed']} removed, {stats['unchanged']} unchanged")
+            return index
+
+        sync("first run")
+        sync("re-run")
+
+        files = sorted(Path(directory).rglob("*.md"))
+        for path in files[:3]:
+            path.write_text(path.read_text() + "\n## New section\nAppended paragraph about reports.\n")
+        for path in files[3:5]:
+            path.unlink()
+        index = sync("3 edited, 2 gone")
+
+        # Same sections as a rebuild of the final state
+        documents = DirectoryLoader(directory, "**/*.md", loader_cls=TextLoader).load()
+        expected = sorted(section.page_content for section in splitter.split_documents(documents))
+        stored = sorted(index.vectorstore.get()["documents"])
+        assert stored == expected, "incremental index differs from a rebuild"
+        print(f"  {len(stored)} sections, identical to a rebuild")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Re-running notebook cells with and without llm_utils.response_cache, on a
+local mock of the OpenAI API.
+
+A "notebook run" makes the temperature 0 calls of the notebooks (chat
+completions, text completions, LangChain chat) plus sampled ones that the
+cache leaves alone by default. The second run is what re-executing the cells
+costs.
+
+Run from the `notebooks` directory:
+    python -m benchmarks.bench_response_cache
+"""
+
+import os
+import tempfile
+import time
+
+import openai
+
+from benchmarks.mock_openai import MockOpenAIHandler, start_server
+from llm_utils.response_cache import LangChainCache, ResponseCache
+
+PROMPTS = [f"Say something about Weights & Biases feature {i}" for i in range(10)]
+
+
+def notebook_run(chat_create, completion_create, chat_model=None):
+    for prompt in PROMPTS:
+        chat_create(model="gpt-3.5-turbo", messages=[{"role": "user", "content": prompt}], temperature=0)
+    for temp in [0, 0.5, 1, 1.5, 2]:
+        completion_create(model="text-davinci-003", prompt=PROMPTS[0], max_tokens=50, temperature=temp)
+    if chat_model is not None:
+        from langchain.schema import HumanMessage
+
+        for prompt in PROMPTS[:5]:
+            chat_model([HumanMessage(content=prompt)])
+
+
+def timed(fn):
+    MockOpenAIHandler.requests = 0
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start, MockOpenAIHandler.requests
+
+
+def main():
+    server, openai.api_base = start_server()
+    openai.api_key = "sk-mock"
+    os.environ.setdefault("OPENAI_API_KEY", "sk-mock")
+    try:
+        import langchain
+        from langchain.chat_models import ChatOpenAI
+
+        chat_model = ChatOpenAI(temperature=0, openai_api_base=openai.api_base)
+    except ImportError:
+        langchain, chat_model = None, None
+    print(f"mock latency {MockOpenAIHandler.latency * 1000:.0f} ms, LangChain {'on' if chat_model else 'not installed'}")
+
+    if langchain is not None:
+        langchain.llm_cache = None
+    seconds, requests = timed(lambda: notebook_run(openai.ChatCompletion.create, openai.Completion.create, chat_model))
+    print(f"  no cache                 {seconds:6.2f}s  {requests} requests")
+
+    with tempfile.TemporaryDirectory() as work:
+        response_cache = ResponseCache(os.path.join(work, "responses.sqlite3"))
+        chat_create = response_cache.wrap(openai.ChatCompletion.create)
+        completion_create = response_cache.wrap(openai.Completion.create)
+        if langchain is not None:
+            langchain.llm_cache = LangChainCache(response_cache)
+        for run in ("first run", "re-run"):
+            seconds, requests = timed(lambda: notebook_run(chat_create, completion_create, chat_model))
+            print(f"  cache, {run:<10}        {seconds:6.2f}s  {requests} requests")
+        print(f"  {response_cache.stats}, hit rate {response_cache.hit_rate:.0%}, {len(response_cache)} entries")
+        response_cache.close()
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
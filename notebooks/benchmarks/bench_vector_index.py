@@ -0,0 +1,80 @@
+"""
+Recall and latency of llm_utils.vector_index: exact search against a
+per-query full sort, and the IVF mode at several nprobe against exact search.
+
+Vectors are synthetic, drawn around cluster centres the way section
+embeddings of a documentation corpus are; queries are perturbed corpus rows.
+
+Run from the `notebooks` directory:
+    python -m benchmarks.bench_vector_index [rows] [dim]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from llm_utils.vector_index import VectorIndex
+
+K = 10
+
+
+def clustered_vectors(n_rows, dim, n_clusters=200, seed=0):
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((n_clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, n_clusters, n_rows)
+    vectors = centres[labels] + 1.2 * rng.standard_normal((n_rows, dim)).astype(np.float32)
+    return vectors, labels
+
+
+def timed(fn, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def recall(found, expected):
+    return np.mean([len(set(f) & set(e)) / len(e) for f, e in zip(found, expected)])
+
+
+def main(n_rows, dim):
+    vectors, labels = clustered_vectors(n_rows, dim)
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.choice(n_rows, 200, replace=False)] + 0.8 * rng.standard_normal((200, dim)).astype(np.float32)
+    index = VectorIndex(dim)
+    index.add(vectors, metadatas=[{"source": f"doc_{label % 20}.md"} for label in labels])
+    print(f"{n_rows:,} x {dim} float32 ({index.vectors.nbytes / 2 ** 20:.0f} MiB), {len(queries)} queries, k={K}")
+
+    def full_sort():
+        normalized = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+        return [np.argsort(-(index.vectors @ q))[:K] for q in normalized]
+
+    seconds, expected = timed(full_sort)
+    print(f"  per-query matmul + full sort       {seconds / len(queries) * 1000:8.3f} ms/query")
+    seconds, (exact, _) = timed(lambda: index.search(queries, K))
+    print(f"  exact, batched + argpartition      {seconds / len(queries) * 1000:8.3f} ms/query  "
+          f"recall {recall(exact, expected):.3f}")
+    seconds, (filtered, _) = timed(lambda: index.search(queries, K, filter={"source": ["doc_1.md", "doc_2.md"]}))
+    print(f"  exact, filter on source            {seconds / len(queries) * 1000:8.3f} ms/query")
+
+    seconds, _ = timed(lambda: index.build_ivf())
+    print(f"  IVF build, {len(index.centroids)} lists              {seconds:8.2f} s")
+    for nprobe in (1, 4, 16, 64):
+        seconds, (found, _) = timed(lambda: index.search(queries, K, nprobe=nprobe))
+        print(f"  IVF nprobe={nprobe:<3}                      {seconds / len(queries) * 1000:8.3f} ms/query  "
+              f"recall {recall(found, exact):.3f}")
+
+    with tempfile.TemporaryDirectory() as work:
+        path = os.path.join(work, "index")
+        seconds, _ = timed(lambda: index.save(path))
+        print(f"  save                               {seconds:8.2f} s")
+        seconds, loaded = timed(lambda: VectorIndex.load(path))
+        print(f"  load (memory-mapped)               {seconds:8.2f} s")
+        assert np.array_equal(loaded.search(queries, K)[0], exact)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000, int(sys.argv[2]) if len(sys.argv) > 2 else 384)
@@ -0,0 +1,116 @@
+"""
+Local stand-in for the OpenAI API (chat and text completions, embeddings).
+
+Used by the benchmarks so they never touch the real API, point the openai
+client at it with `openai.api_base = url`.
+"""
+
+import base64
+import json
+import random
+import sys
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+GENERATION = "CONTEXT: {context}\nQUESTION: How do I {verb} a run?\nANSWER: Call wandb.{verb}()."
+
+
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    # Seconds spent on every request
+    latency = 0.2
+    # Seconds added for each text of an embeddings request
+    latency_per_input = 0.0
+    embedding_dim = 64
+    # Share of requests answered with a 429 rate limit error
+    rate_limit_rate = 0.0
+    # Completed requests, for the benchmarks to count calls
+    requests = 0
+    _lock = threading.Lock()
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        time.sleep(self.latency)
+        if random.random() < self.rate_limit_rate:
+            return self.send_json(429, {'error': {
+                'message': 'Rate limit reached', 'type': 'requests', 'param': None, 'code': None}})
+        with self._lock:
+            type(self).requests += 1
+
+        if self.path.endswith('/embeddings'):
+            inputs = payload['input']
+            time.sleep(self.latency_per_input * (len(inputs) if isinstance(inputs, list) else 1))
+            return self.send_json(200, self.embeddings(payload))
+        self.send_json(200, self.chat_completion(payload))
+
+    def chat_completion(self, payload):
+        chat = 'messages' in payload
+        prompt = payload['messages'][-1]['content'] if chat else payload['prompt']
+        n = payload.get('n', 1)
+        choices = []
+        for i in range(n):
+            text = GENERATION.format(
+                context=prompt[:40].replace('\n', ' '), verb=random.choice(['log', 'init', 'finish']))
+            choice = {'message': {'role': 'assistant', 'content': text}} if chat else {'text': text}
+            choices.append({'index': i, **choice, 'finish_reason': 'stop'})
+        prompt_tokens = sum(len(m['content']) // 4 for m in payload['messages']) if chat else len(prompt) // 4
+        completion_tokens = 30 * n
+        return {
+            'id': 'chatcmpl-mock',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': payload['model'],
+            'choices': choices,
+            'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                      'total_tokens': prompt_tokens + completion_tokens},
+        }
+
+    def embeddings(self, payload):
+        inputs = payload['input']
+        inputs = inputs if isinstance(inputs, list) else [inputs]
+        data = []
+        for i, text in enumerate(inputs):
+            rng = np.random.default_rng(zlib.crc32(str(text).encode('utf-8')))
+            vector = rng.standard_normal(self.embedding_dim).round(6)
+            if payload.get('encoding_format') == 'base64':
+                # Little-endian float32 bytes, like the real API
+                embedding = base64.b64encode(vector.astype('<f4').tobytes()).decode('ascii')
+            else:
+                embedding = vector.tolist()
+            data.append({'object': 'embedding', 'index': i, 'embedding': embedding})
+        tokens = sum(len(str(text)) // 4 for text in inputs)
+        return {'object': 'list', 'data': data, 'model': payload['model'],
+                'usage': {'prompt_tokens': tokens, 'total_tokens': tokens}}
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def handle_error(self, request, client_address):
+        # Cancelled clients hang up before the (slow) response is written
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def start_server(handler=MockOpenAIHandler):
+    """ Start the mock server on a free local port, returns (server, api_base) """
+    server = MockServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address
+    return server, f'http://{host}:{port}/v1'
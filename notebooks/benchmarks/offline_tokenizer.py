@@ -0,0 +1,23 @@
+"""
+Tokenizer for the benchmarks when tiktoken cannot download its BPE files.
+
+Falls back to a byte-level tiktoken Encoding (one token per byte, no merges):
+token counts are larger than cl100k_base but encoding goes through the same
+tiktoken code path, so relative timings still hold.
+"""
+
+import tiktoken
+
+
+def load_tokenizer(model_name="gpt-4"):
+    """ (tokenizer, description) """
+    try:
+        return tiktoken.encoding_for_model(model_name), f"tiktoken {model_name}"
+    except Exception:
+        byte_level = tiktoken.Encoding(
+            name="bytes",
+            pat_str=r"""'s|'t|'re|'ve|'m|'ll|'d| ?\p{L}+| ?\p{N}+| ?[^\s\p{L}\p{N}]+|\s+(?!\S)|\s+""",
+            mergeable_ranks={bytes([i]): i for i in range(256)},
+            special_tokens={},
+        )
+        return byte_level, "byte-level fallback (BPE files not reachable)"
@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import random
+from pathlib import Path
+
+import numpy as np
+
+
+class ChunkIndex:
+    """Token arrays of the markdown files of a directory, tokenized once.
+
+    Each file is encoded a single time and stored as an int32 .npy file that
+    is memory-mapped on read, so sampling chunks only slices and decodes the
+    window. Entries are keyed on the file path relative to the directory and
+    re-tokenized when the file's mtime or size change.
+    Usage:
+      chunk_index = ChunkIndex("../docs_sample/", tokenizer)
+      chunk = chunk_index.random_chunk("guides/track/log.md", max_tokens=512)
+    """
+
+    def __init__(self, directory, tokenizer, cache_dir: str = ".cache/chunk_index", pattern: str = "*.md"):
+        """
+        Args:
+            directory (str): Root of the documents.
+            tokenizer (tiktoken.Encoding): Encoding used for the token arrays.
+            cache_dir (str, optional): Where token arrays and the manifest are
+                stored. Defaults to ".cache/chunk_index".
+            pattern (str, optional): Files indexed by refresh(). Defaults to "*.md".
+        """
+        self.directory = Path(directory)
+        self.tokenizer = tokenizer
+        self.pattern = pattern
+        root_key = hashlib.sha1(f"{self.directory.resolve()}|{tokenizer.name}".encode("utf-8")).hexdigest()[:16]
+        self.cache_dir = os.path.join(cache_dir, root_key)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._manifest_path = os.path.join(self.cache_dir, "manifest.json")
+        try:
+            with open(self._manifest_path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.entries = {}
+        self._arrays = {}
+        self.refresh()
+
+    def _save_manifest(self):
+        tmp_path = f"{self._manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self._manifest_path)
+
+    def _signature(self, path):
+        stat = (self.directory / path).stat()
+        return [stat.st_mtime_ns, stat.st_size]
+
+    def _tokenize(self, path, signature):
+        with open(self.directory / path, encoding="utf-8") as f:
+            tokens = np.asarray(self.tokenizer.encode(f.read()), dtype=np.int32)
+        name = hashlib.sha1(path.encode("utf-8")).hexdigest()[:16] + ".npy"
+        tmp_path = os.path.join(self.cache_dir, f"{name}.{os.getpid()}.tmp.npy")
+        np.save(tmp_path, tokens)
+        os.replace(tmp_path, os.path.join(self.cache_dir, name))
+        self.entries[path] = {"signature": signature, "file": name, "n_tokens": len(tokens)}
+        self._arrays.pop(path, None)
+
+    def refresh(self):
+        """Tokenize new and changed files, forget deleted ones."""
+        paths = {file.relative_to(self.directory).as_posix() for file in self.directory.rglob(self.pattern)}
+        changed = False
+        for path in sorted(paths):
+            signature = self._signature(path)
+            entry = self.entries.get(path)
+            if entry is None or entry["signature"] != signature:
+                self._tokenize(path, signature)
+                changed = True
+        for path in set(self.entries) - paths:
+            entry = self.entries.pop(path)
+            self._arrays.pop(path, None)
+            try:
+                os.remove(os.path.join(self.cache_dir, entry["file"]))
+            except FileNotFoundError:
+                pass
+            changed = True
+        if changed:
+            self._save_manifest()
+        return self
+
+    def paths(self) -> list:
+        return sorted(self.entries)
+
+    def tokens(self, path) -> np.ndarray:
+        """Token array of a file (read-only memmap), re-tokenized if the file changed."""
+        path = Path(path).as_posix()
+        signature = self._signature(path)
+        if path not in self.entries or self.entries[path]["signature"] != signature:
+            self._tokenize(path, signature)
+            self._save_manifest()
+        if path not in self._arrays:
+            self._arrays[path] = np.load(os.path.join(self.cache_dir, self.entries[path]["file"]), mmap_mode="r")
+        return self._arrays[path]
+
+    def n_tokens(self, path) -> int:
+        return len(self.tokens(path))
+
+    def window(self, path, start: int, max_tokens: int = 512) -> str:
+        """Decoded text of the tokens [start, start + max_tokens) of a file."""
+        return self.tokenizer.decode(self.tokens(path)[start:start + max_tokens].tolist())
+
+    def random_chunk(self, path, max_tokens: int = 512, rng=random) -> str:
+        """`extract_random_chunk` without encoding the document again.
+
+        The whole document is returned when it is not longer than max_tokens.
+        """
+        tokens = self.tokens(path)
+        if len(tokens) <= max_tokens:
+            return self.tokenizer.decode(tokens.tolist())
+        start = rng.randint(0, len(tokens) - max_tokens)
+        return self.tokenizer.decode(tokens[start:start + max_tokens].tolist())
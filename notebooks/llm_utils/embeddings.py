@@ -0,0 +1,379 @@
+import base64
+import hashlib
+import math
+import os
+import re
+import sqlite3
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+
+try:
+    from langchain.embeddings.base import Embeddings
+except ImportError:  # LangChain is optional, the embedders still work duck-typed
+    Embeddings = object
+
+DEFAULT_MODEL = "text-embedding-ada-002"
+# Embeddings used by the notebooks: "openai" or "local" (HashingEmbeddings, offline, no IDF weights)
+BACKEND = os.environ.get("EMBEDDINGS_BACKEND", "openai")
+
+
+def text_hash(text: str) -> bytes:
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+class EmbeddingStore:
+    """Vectors on disk, keyed on (model, text hash).
+
+    Each model has one append-only binary file of float32 or float16 rows,
+    read through a memory map; SQLite maps text hashes to rows. Several
+    processes (e.g. two notebook kernels) can share a store: each put holds
+    SQLite's write lock while it appends to the file.
+    Usage:
+      store = EmbeddingStore(".cache/embeddings", dtype="float16")
+      found = store.get(model, hashes)          # {hash: vector}
+      store.put(model, new_hashes, vectors)
+    """
+
+    def __init__(self, directory: str = ".cache/embeddings", dtype: str = "float32"):
+        """
+        Args:
+            directory (str, optional): Where the files live. Defaults to ".cache/embeddings".
+            dtype (str, optional): "float32" or "float16" (half the size, about
+                3 significant digits). Defaults to "float32".
+        """
+        assert dtype in ("float32", "float16"), "dtype must be float32 or float16"
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.dtype = np.dtype(dtype)
+        self._maps = {}
+
+        self._lock = threading.Lock()
+        # Waits for another process' put instead of failing with "database is locked"
+        self._conn = sqlite3.connect(
+            os.path.join(directory, "index.sqlite3"), timeout=60, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS models (model TEXT PRIMARY KEY, dim INTEGER NOT NULL, rows INTEGER NOT NULL)"
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS vectors (
+                model TEXT NOT NULL,
+                hash BLOB NOT NULL,
+                row INTEGER NOT NULL,
+                PRIMARY KEY (model, hash)
+            )"""
+        )
+        self._conn.commit()
+
+    def _path(self, model):
+        name = re.sub(r"[^\w.-]", "_", model)
+        return os.path.join(self.directory, f"{name}.{self.dtype.name}.bin")
+
+    def _key(self, model):
+        # float32 and float16 stores of a model live side by side
+        return f"{model}|{self.dtype.name}"
+
+    def _matrix(self, model, dim, rows):
+        cached = self._maps.get(model)
+        if cached is None or len(cached) < rows:
+            cached = np.memmap(self._path(model), dtype=self.dtype, mode="r", shape=(rows, dim))
+            self._maps[model] = cached
+        return cached
+
+    def get(self, model: str, hashes) -> dict:
+        """{hash: float32 vector} for the hashes found."""
+        hashes = list(hashes)
+        with self._lock:
+            meta = self._conn.execute(
+                "SELECT dim, rows FROM models WHERE model = ?", (self._key(model),)
+            ).fetchone()
+            if meta is None or not hashes:
+                return {}
+            found = {}
+            # SQLite limits the number of parameters of a query
+            for start in range(0, len(hashes), 900):
+                batch = hashes[start:start + 900]
+                found.update(self._conn.execute(
+                    f"SELECT hash, row FROM vectors WHERE model = ? AND hash IN ({','.join('?' * len(batch))})",
+                    (self._key(model), *batch),
+                ).fetchall())
+            matrix = self._matrix(model, *meta)
+        rows = np.fromiter(found.values(), dtype=np.int64, count=len(found))
+        vectors = np.asarray(matrix[rows], dtype=np.float32)
+        return dict(zip(found, vectors))
+
+    def put(self, model: str, hashes, vectors):
+        vectors = np.ascontiguousarray(vectors, dtype=self.dtype)
+        hashes = list(hashes)
+        with self._lock:
+            # The write lock is taken before reading the row count and held until
+            # the rows are indexed, so puts of other processes can't interleave
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                meta = self._conn.execute(
+                    "SELECT dim, rows FROM models WHERE model = ?", (self._key(model),)
+                ).fetchone()
+                dim, rows = meta if meta else (vectors.shape[1], 0)
+                assert vectors.shape[1] == dim, f"{model} vectors have {dim} dimensions, got {vectors.shape[1]}"
+                # The file may hold rows of an interrupted put that were never indexed
+                with open(self._path(model), "ab") as f:
+                    f.truncate(rows * dim * self.dtype.itemsize)
+                    f.write(vectors.tobytes())
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO vectors (model, hash, row) VALUES (?, ?, ?)",
+                    [(self._key(model), h, rows + i) for i, h in enumerate(hashes)],
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO models (model, dim, rows) VALUES (?, ?, ?)",
+                    (self._key(model), dim, rows + len(hashes)),
+                )
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+
+    def close(self):
+        with self._lock:
+            self._maps.clear()
+            self._conn.close()
+
+
+class EmbeddingService(Embeddings):
+    """Embeddings that are never computed twice.
+
+    Inputs are deduplicated, looked up in an EmbeddingStore, and only the
+    missing texts are embedded: packed into requests of at most
+    `max_batch_tokens` tokens (and `max_batch_size` texts), several requests
+    in flight at once, each retried with random exponential backoff.
+    Usable wherever LangChain expects embeddings (FAISS, Chroma, example
+    selectors).
+    Usage:
+      embeddings = EmbeddingService(DEFAULT_MODEL, store=EmbeddingStore(".cache/embeddings"))
+      vectors = embeddings.embed_documents(texts)
+    """
+
+    def __init__(
+        self,
+        model: str = DEFAULT_MODEL,
+        embed_batch=None,
+        store: EmbeddingStore = None,
+        max_batch_tokens: int = 100_000,
+        max_batch_size: int = 2048,
+        max_workers: int = 4,
+        count_tokens=None,
+    ):
+        """
+        Args:
+            model (str, optional): Model name, part of the cache key. Defaults to DEFAULT_MODEL.
+            embed_batch (callable, optional): Embeds a list of texts, returns
+                a list of vectors. Defaults to openai.Embedding.create with `model`.
+            store (EmbeddingStore, optional): Vector cache. Defaults to
+                EmbeddingStore(".cache/embeddings").
+            max_batch_tokens (int, optional): Tokens per request. Defaults to 100_000.
+            max_batch_size (int, optional): Texts per request. Defaults to 2048,
+                the OpenAI limit.
+            max_workers (int, optional): Requests in flight. Defaults to 4.
+            count_tokens (callable, optional): Tokens of a text. Defaults to
+                the model's tiktoken encoding.
+        """
+        self.model = model
+        self.embed_batch = embed_batch or self._openai_batch
+        self.store = store or EmbeddingStore()
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.max_workers = max_workers
+        self._count_tokens = count_tokens
+        self.stats = {"texts": 0, "unique": 0, "cached": 0, "embedded": 0, "requests": 0}
+
+    def count_tokens(self, text: str) -> int:
+        if self._count_tokens is None:
+            import tiktoken
+
+            try:
+                encoding = tiktoken.encoding_for_model(self.model)
+            except KeyError:
+                encoding = tiktoken.get_encoding("cl100k_base")
+            self._count_tokens = lambda text: len(encoding.encode(text, disallowed_special=()))
+        return self._count_tokens(text)
+
+    def _openai_batch(self, texts):
+        import openai
+        from tenacity import retry, stop_after_attempt, wait_random_exponential
+
+        @retry(wait=wait_random_exponential(min=1, max=60), stop=stop_after_attempt(6))
+        def create(**kwargs):
+            return openai.Embedding.create(**kwargs)
+
+        # Asked for explicitly, the client then hands the base64 strings back
+        # as is instead of decoding them into Python lists of floats
+        response = create(model=self.model, input=texts, encoding_format="base64")
+        vectors = []
+        for item in sorted(response["data"], key=lambda item: item["index"]):
+            embedding = item["embedding"]
+            if isinstance(embedding, str):
+                embedding = np.frombuffer(base64.b64decode(embedding), dtype=np.float32)
+            vectors.append(embedding)
+        return np.asarray(vectors, dtype=np.float32)
+
+    def batches(self, texts) -> list:
+        """Consecutive groups of texts within the token and size limits."""
+        batches, batch, tokens = [], [], 0
+        for text in texts:
+            n_tokens = self.count_tokens(text)
+            if batch and (tokens + n_tokens > self.max_batch_tokens or len(batch) == self.max_batch_size):
+                batches.append(batch)
+                batch, tokens = [], 0
+            batch.append(text)
+            tokens += n_tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def embed(self, texts) -> np.ndarray:
+        """Float32 matrix with one row per text, in order."""
+        texts = list(texts)
+        unique = {text_hash(text): text for text in texts}
+        vectors = self.store.get(self.model, unique)
+        missing = [(h, text) for h, text in unique.items() if h not in vectors]
+        self.stats["texts"] += len(texts)
+        self.stats["unique"] += len(unique)
+        self.stats["cached"] += len(unique) - len(missing)
+
+        if missing:
+            by_text = dict((text, h) for h, text in missing)
+            batches = self.batches([text for _, text in missing])
+            errors = []
+            with ThreadPoolExecutor(self.max_workers) as pool:
+                futures = {pool.submit(self.embed_batch, batch): batch for batch in batches}
+                for future in as_completed(futures):
+                    batch = futures[future]
+                    try:
+                        matrix = np.asarray(future.result(), dtype=np.float32)
+                    except Exception as e:
+                        errors.append(e)
+                        continue
+                    hashes = [by_text[text] for text in batch]
+                    # Stored as each request finishes, a failure keeps the others
+                    self.store.put(self.model, hashes, matrix)
+                    vectors.update(zip(hashes, matrix))
+                    self.stats["embedded"] += len(batch)
+                    self.stats["requests"] += 1
+            if errors:
+                # Every successful batch is stored, a rerun only embeds the failed ones
+                raise errors[0]
+
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.stack([vectors[text_hash(text)] for text in texts]).astype(np.float32, copy=False)
+
+    def embed_documents(self, texts) -> list:
+        return self.embed(texts).tolist()
+
+    def embed_query(self, text: str) -> list:
+        return self.embed([text])[0].tolist()
+
+
+class HashingEmbeddings(Embeddings):
+    """Deterministic local embeddings: hashed word and bigram counts, TF-IDF weighted.
+
+    Words and word bigrams are hashed (crc32) into `dim` signed buckets, with
+    sublinear term frequency and, after `fit`, inverse document frequency
+    weights; vectors are L2 normalized. No network, no model download, the
+    same text always gets the same vector, so pipelines and benchmarks run
+    offline.
+    Usage:
+      embeddings = HashingEmbeddings(dim=512).fit(texts)
+      vectors = embeddings.embed_documents(texts)
+    """
+
+    TOKEN = re.compile(r"\w+")
+
+    def __init__(self, dim: int = 512, bigrams: bool = True):
+        """
+        Args:
+            dim (int, optional): Vector size. Defaults to 512.
+            bigrams (bool, optional): Also hash word pairs. Defaults to True.
+        """
+        self.dim = dim
+        self.bigrams = bigrams
+        self.idf = np.ones(dim, dtype=np.float32)
+        self._fitted = None
+
+    @property
+    def model_name(self) -> str:
+        """Cache key of the embedder, changes with its settings and fitted weights."""
+        name = f"hashing-{self.dim}{'-bigrams' if self.bigrams else ''}"
+        return f"{name}-idf-{self._fitted}" if self._fitted else name
+
+    def _features(self, text):
+        words = self.TOKEN.findall(text.lower())
+        features = words + [f"{a} {b}" for a, b in zip(words, words[1:])] if self.bigrams else words
+        counts = {}
+        for feature in features:
+            h = zlib.crc32(feature.encode("utf-8"))
+            # Low bits pick the bucket, the top bit the sign
+            bucket = (h & 0x7FFFFFFF) % self.dim
+            counts[bucket] = counts.get(bucket, 0.0) + (1.0 if h & 0x80000000 else -1.0)
+        return counts
+
+    def fit(self, texts):
+        """Learn IDF weights from a corpus, returns self."""
+        df = np.zeros(self.dim, dtype=np.float64)
+        n = 0
+        for text in texts:
+            df[list(self._features(text))] += 1
+            n += 1
+        self.idf = np.log((1 + n) / (1 + df)).astype(np.float32) + 1
+        self._fitted = hashlib.sha256(self.idf.tobytes()).hexdigest()[:12]
+        return self
+
+    def embed(self, texts) -> np.ndarray:
+        texts = list(texts)
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for bucket, count in self._features(text).items():
+                matrix[i, bucket] = math.copysign(1 + math.log(abs(count)), count) if count else 0.0
+        matrix *= self.idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1, norms)
+
+    def embed_documents(self, texts) -> list:
+        return self.embed(texts).tolist()
+
+    def embed_query(self, text: str) -> list:
+        return self.embed([text])[0].tolist()
+
+
+def get_embeddings(
+    backend: str = BACKEND, cache_dir: str = ".cache/embeddings", dtype: str = "float32", fit_texts=None
+):
+    """Cached embeddings for the notebooks.
+
+    Args:
+        backend (str, optional): "openai" (DEFAULT_MODEL) or "local"
+            (HashingEmbeddings). Defaults to the EMBEDDINGS_BACKEND
+            environment variable, else "openai".
+        cache_dir (str, optional): EmbeddingStore directory. Defaults to ".cache/embeddings".
+        dtype (str, optional): Stored precision. Defaults to "float32".
+        fit_texts (list, optional): Corpus the "local" backend learns its IDF
+            weights from. Without it local vectors are unweighted (sublinear
+            term frequency only). The weights are part of the cache key.
+            Defaults to None.
+    """
+    store = EmbeddingStore(cache_dir, dtype)
+    if backend == "local":
+        local = HashingEmbeddings()
+        if fit_texts is not None:
+            local.fit(fit_texts)
+        # Nothing to wait for: one batch, no thread pool, no tokenizer
+        return EmbeddingService(
+            local.model_name, local.embed_documents, store,
+            max_batch_size=10 ** 9, max_workers=1, count_tokens=lambda text: 0,
+        )
+    if backend != "openai":
+        raise ValueError(f"Unknown embeddings backend {backend!r}, expected 'openai' or 'local'")
+    return EmbeddingService(DEFAULT_MODEL, store=store)
@@ -0,0 +1,291 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+
+import aiohttp
+import openai
+import tiktoken
+from tenacity import (
+    AsyncRetrying,
+    retry_if_not_exception_type,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+
+# Errors that will not go away by retrying
+FATAL_ERRORS = (
+    openai.error.InvalidRequestError,
+    openai.error.AuthenticationError,
+    openai.error.PermissionError,
+)
+
+
+class AsyncTokenBucket:
+    """Token bucket for an asyncio event loop, refilled continuously.
+
+    Waiters are served in arrival order, so a large request is not starved by
+    a stream of small ones.
+    Usage:
+      tokens_per_minute = AsyncTokenBucket(rate=90_000 / 60, capacity=90_000)
+      await tokens_per_minute.acquire(1200)
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        Args:
+            rate (float): Units added per second.
+            capacity (float): Maximum level, the per-minute budget.
+        """
+        assert rate > 0, "rate must be positive"
+        self.rate = rate
+        self.capacity = capacity
+        self._level = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float = 1):
+        # A request larger than the whole budget still goes through, alone
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._level >= amount:
+                    self._level -= amount
+                    return
+                # Wake up at least every second to notice units given back by adjust()
+                await asyncio.sleep(min((amount - self._level) / self.rate, 1.0))
+
+    def adjust(self, amount: float):
+        """Give back (positive) or take (negative) units once the real cost is known."""
+        self._refill()
+        self._level = min(self.capacity, self._level + amount)
+
+
+def code_fingerprint(func) -> str:
+    """Hash of a function's bytecode, defaults and closure values.
+
+    Changes when the function is edited in the notebook, or when a value it
+    captures (e.g. n_questions) changes. Functions it calls are not included.
+    """
+    def describe_code(code):
+        # Nested functions are code objects, whose repr holds a memory address
+        consts = [describe_code(c) if hasattr(c, "co_code") else repr(c) for c in code.co_consts]
+        return [code.co_name, code.co_code.hex(), consts, list(code.co_names)]
+
+    def describe(value):
+        if hasattr(value, "func"):  # functools.partial
+            return [describe(value.func), [describe(a) for a in value.args],
+                    sorted((k, describe(v)) for k, v in value.keywords.items())]
+        code = getattr(value, "__code__", None)
+        if code is None:
+            return getattr(value, "__qualname__", None) if callable(value) else repr(value)
+        closure = [describe(cell.cell_contents) for cell in value.__closure__ or ()]
+        return [describe_code(code), [describe(d) for d in value.__defaults__ or ()], closure]
+
+    return hashlib.sha256(json.dumps(describe(func)).encode("utf-8")).hexdigest()[:16]
+
+
+class Checkpoint:
+    """Finished jobs appended to a JSON lines file, one `{"key", "run", "generations"}` per line.
+
+    `run` identifies the parameters the generations were made with. Records
+    of another run (other model, prompts, n_generations...) are ignored on
+    load, so changing the parameters never reuses stale generations. A run
+    killed mid-write leaves at most one truncated last line, which is also
+    ignored, so that job is simply generated again.
+    """
+
+    def __init__(self, path: str, run: str = None):
+        """
+        Args:
+            path (str): JSON lines file, appended to.
+            run (str, optional): Fingerprint of the run parameters. Defaults
+                to None, which only matches records without one.
+        """
+        self.path = path
+        self.run = run
+        self.done = {}
+        self.stale = 0
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if record.get("run") != run:
+                        self.stale += 1
+                        continue
+                    self.done[record["key"]] = record["generations"]
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def save(self, key, generations):
+        self.done[key] = generations
+        self._file.write(json.dumps({"key": key, "run": self.run, "generations": generations}) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class QuestionGenerator:
+    """Concurrent chat completions under request and token per minute budgets.
+
+    Every request waits for a concurrency slot, one request from the RPM
+    budget and its estimated tokens from the TPM budget (prompt tokens plus
+    `completion_tokens` per generation); the estimate is corrected with the
+    `usage` of the response. Failed requests are retried with random
+    exponential backoff, as `completion_with_backoff` does.
+    Usage:
+      generator = QuestionGenerator("gpt-4", system_prompt, concurrency=8, rpm=200, tpm=40_000)
+      questions = await generator.generate_questions(documents, make_prompt, checkpoint="generations.jsonl")
+    """
+
+    def __init__(
+        self,
+        model: str,
+        system_prompt: str,
+        concurrency: int = 8,
+        rpm: float = 3500,
+        tpm: float = 90_000,
+        completion_tokens: int = 400,
+        max_attempts: int = 6,
+        create=None,
+        tokenizer=None,
+    ):
+        """
+        Args:
+            model (str): Chat model name.
+            system_prompt (str): System message of every request.
+            concurrency (int, optional): Requests in flight at once. Defaults to 8.
+            rpm (float, optional): Requests per minute budget. Defaults to 3500.
+            tpm (float, optional): Tokens per minute budget. Defaults to 90_000.
+            completion_tokens (int, optional): Expected tokens per generation,
+                used to reserve TPM before the response is known. Defaults to 400.
+            max_attempts (int, optional): Attempts per request. Defaults to 6.
+            create (coroutine function, optional): Called with the request
+                kwargs. Defaults to openai.ChatCompletion.acreate.
+            tokenizer (tiktoken.Encoding, optional): Used for the TPM estimates.
+                Defaults to the model's encoding.
+        """
+        self.model = model
+        self.system_prompt = system_prompt
+        self.concurrency = concurrency
+        self.completion_tokens = completion_tokens
+        self.max_attempts = max_attempts
+        self.create = create or openai.ChatCompletion.acreate
+        self.requests_per_minute = AsyncTokenBucket(rpm / 60, max(rpm / 60, 1))
+        self.tokens_per_minute = AsyncTokenBucket(tpm / 60, tpm)
+        if tokenizer is None:
+            try:
+                tokenizer = tiktoken.encoding_for_model(model)
+            except KeyError:
+                tokenizer = tiktoken.get_encoding("cl100k_base")
+        self.tokenizer = tokenizer
+        self.stats = {"requests": 0, "retries": 0, "tokens": 0}
+
+    def messages(self, user_prompt: str) -> list:
+        return [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": user_prompt},
+        ]
+
+    def estimate_tokens(self, messages, n) -> int:
+        prompt_tokens = sum(len(self.tokenizer.encode(m["content"])) + 4 for m in messages) + 2
+        return prompt_tokens + n * self.completion_tokens
+
+    async def complete(self, user_prompt: str, n: int = 1, **kwargs) -> list:
+        """Generations (message contents) for one prompt, within the budgets."""
+        messages = self.messages(user_prompt)
+        estimate = self.estimate_tokens(messages, n)
+        retrying = AsyncRetrying(
+            wait=wait_random_exponential(min=1, max=60),
+            stop=stop_after_attempt(self.max_attempts),
+            retry=retry_if_not_exception_type(FATAL_ERRORS),
+            reraise=True,
+        )
+        async for attempt in retrying:
+            with attempt:
+                if attempt.retry_state.attempt_number > 1:
+                    self.stats["retries"] += 1
+                await self.requests_per_minute.acquire()
+                await self.tokens_per_minute.acquire(estimate)
+                self.stats["requests"] += 1
+                response = await self.create(model=self.model, messages=messages, n=n, **kwargs)
+        usage = response.get("usage")
+        if usage:
+            self.tokens_per_minute.adjust(estimate - usage["total_tokens"])
+            self.stats["tokens"] += usage["total_tokens"]
+        return [choice["message"]["content"] for choice in response["choices"]]
+
+    async def generate_questions(
+        self, documents, make_prompt, n_generations: int = 5, checkpoint: str = None, **kwargs
+    ) -> list:
+        """Async, concurrent `generate_questions`.
+
+        Args:
+            documents (list): (path, content) pairs, as returned by find_md_files.
+            make_prompt (callable): Builds the user prompt from a document's
+                path and content, e.g. chunk extraction followed by
+                generate_context_prompt. Only called for documents that still
+                need generating.
+            n_generations (int, optional): Generations per document. Defaults to 5.
+            checkpoint (str, optional): JSON lines file of finished documents.
+                Documents found there are not generated again, so an
+                interrupted run resumes where it stopped. Only records made
+                with the same model, system prompt, make_prompt code,
+                n_generations and kwargs are reused. Defaults to None.
+            **kwargs: Extra chat completion parameters, e.g. temperature.
+        Returns:
+            list: Generations of all documents, in document order.
+        """
+        store = None
+        if checkpoint:
+            run = json.dumps(
+                [self.model, self.system_prompt, code_fingerprint(make_prompt), n_generations, kwargs],
+                sort_keys=True, default=repr,
+            )
+            store = Checkpoint(checkpoint, hashlib.sha256(run.encode("utf-8")).hexdigest()[:16])
+        done = dict(store.done) if store else {}
+        slots = asyncio.Semaphore(self.concurrency)
+
+        async def run(key, path, document):
+            async with slots:
+                generations = await self.complete(make_prompt(path, document), n=n_generations, **kwargs)
+            done[key] = generations
+            if store:
+                store.save(key, generations)
+
+        keys = [str(path) for path, _ in documents]
+        # One connection pool for the run instead of a session per request,
+        # the tasks below inherit it from the context
+        session = aiohttp.ClientSession()
+        session_token = openai.aiosession.set(session)
+        tasks = [
+            asyncio.ensure_future(run(key, path, document))
+            for key, (path, document) in zip(keys, documents)
+            if key not in done
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # Interrupted or a job gave up: stop the others, keep what finished
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        finally:
+            openai.aiosession.reset(session_token)
+            await session.close()
+            if store:
+                store.close()
+        return [generation for key in keys for generation in done[key]]
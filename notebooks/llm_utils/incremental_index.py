@@ -0,0 +1,179 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+
+def section_ids(sections) -> list:
+    """Content hash of each section, numbered when a file repeats a section."""
+    ids, seen = [], {}
+    for section in sections:
+        digest = hashlib.sha256(
+            f"{section.metadata.get('source')}\0{section.page_content}".encode("utf-8")
+        ).hexdigest()[:32]
+        seen[digest] = seen.get(digest, 0) + 1
+        ids.append(digest if seen[digest] == 1 else f"{digest}-{seen[digest]}")
+    return ids
+
+
+class IncrementalIndex:
+    """Vector store of a directory's sections, kept in sync without re-embedding it.
+
+    A manifest next to the persisted store records, per file, its mtime and
+    size and the content hashes of its sections. `sync` only loads files whose
+    mtime or size changed, embeds the sections whose hash is new, deletes the
+    sections that disappeared and the files that were removed. Unchanged files
+    are not even read, and reopening the index only loads the persisted store.
+    The manifest also records which store it describes. When it was written
+    for another store (type or location), or the ids in the store don't match
+    it, the store is emptied and the next sync rebuilds it.
+    Usage:
+      index = IncrementalIndex(".cache/retrieval_index", OpenAIEmbeddings(), md_text_splitter)
+      index.sync("../docs_sample/", "**/*.md")
+      retriever = index.vectorstore.as_retriever(search_kwargs=dict(k=3))
+    """
+
+    def __init__(
+        self, persist_directory, embedding, splitter, vectorstore=None,
+        collection_name: str = "sections", batch_size: int = 1000,
+    ):
+        """
+        Args:
+            persist_directory (str): Where the store and the manifest live.
+            embedding (Embeddings): Embeds the sections and the queries.
+            splitter (TextSplitter): Splits the files into sections.
+            vectorstore (VectorStore, optional): Store supporting add_texts
+                with ids and delete(ids), saved by its persist() method if it
+                has one, e.g. NumpyVectorStore. Defaults to a Chroma collection
+                in persist_directory.
+            collection_name (str, optional): Chroma collection. Defaults to "sections".
+            batch_size (int, optional): Sections sent to the store (and the
+                embedding model) at once. Defaults to 1000.
+        """
+        self.persist_directory = persist_directory
+        self.splitter = splitter
+        self.batch_size = batch_size
+        os.makedirs(persist_directory, exist_ok=True)
+        if vectorstore is None:
+            from langchain.vectorstores import Chroma
+
+            vectorstore = Chroma(
+                collection_name=collection_name,
+                embedding_function=embedding,
+                persist_directory=os.path.join(persist_directory, "chroma"),
+            )
+        self.vectorstore = vectorstore
+        self._manifest_path = os.path.join(persist_directory, "manifest.json")
+        try:
+            with open(self._manifest_path, encoding="utf-8") as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            manifest = {}
+        # Manifests written before the store was recorded describe an unknown store
+        same_store = "files" in manifest and manifest.get("store") == self._store_description()
+        self.files = manifest["files"] if same_store else {}
+
+        stored = self._store_ids()
+        if stored is not None and set(stored) != {id_ for entry in self.files.values() for id_ in entry["ids"]}:
+            # Another store, or one that lost or kept rows the manifest doesn't know of
+            if stored:
+                self.vectorstore.delete(stored)
+            self.files = {}
+
+    def _store_description(self) -> dict:
+        store = self.vectorstore
+        # NumpyVectorStore.persist_directory, Chroma._persist_directory
+        location = getattr(store, "persist_directory", None) or getattr(store, "_persist_directory", None)
+        return {"type": type(store).__name__, "location": location and os.path.abspath(location)}
+
+    def _store_ids(self):
+        """Ids held by the store, None when it can't list them."""
+        store = self.vectorstore
+        if hasattr(getattr(store, "index", None), "ids"):  # NumpyVectorStore
+            return list(store.index.ids)
+        if hasattr(store, "_collection"):  # Chroma
+            return store._collection.get(include=[])["ids"]
+        return None
+
+    def _save_manifest(self):
+        tmp_path = f"{self._manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"store": self._store_description(), "files": self.files}, f)
+        os.replace(tmp_path, self._manifest_path)
+
+    def sync(self, directory, glob: str = "**/*.md", loader_cls=None, loader_kwargs: dict = None) -> dict:
+        """Bring the index up to date with the files of a directory.
+
+        Args:
+            directory (str): Root of the documents.
+            glob (str, optional): Files to index. Defaults to "**/*.md".
+            loader_cls (type, optional): Document loader of one file, as for
+                DirectoryLoader. Defaults to UnstructuredFileLoader.
+            loader_kwargs (dict, optional): Passed to loader_cls.
+        Returns:
+            dict: Counts of files "changed", "removed", "unchanged" and of
+            sections "embedded", "deleted", "kept".
+        """
+        if loader_cls is None:
+            from langchain.document_loaders import UnstructuredFileLoader as loader_cls
+
+        stats = dict.fromkeys(["changed", "removed", "unchanged", "embedded", "deleted", "kept"], 0)
+        # Same source strings as DirectoryLoader, so metadata["source"] does not change
+        paths = {str(path): path for path in Path(directory).glob(glob) if path.is_file()}
+
+        for source in sorted(set(self.files) - set(paths)):
+            ids = self.files.pop(source)["ids"]
+            if ids:
+                self.vectorstore.delete(ids)
+            stats["removed"] += 1
+            stats["deleted"] += len(ids)
+
+        # New sections of several files are embedded together, in batches
+        pending, pending_files = [], {}
+
+        def flush():
+            if pending:
+                self.vectorstore.add_texts(
+                    [section.page_content for _, section in pending],
+                    metadatas=[section.metadata for _, section in pending],
+                    ids=[id_ for id_, _ in pending],
+                )
+            # Stores that save explicitly (NumpyVectorStore) are written before the manifest
+            if hasattr(self.vectorstore, "persist"):
+                self.vectorstore.persist()
+            # Recorded once embedded, an interrupted sync keeps what it finished
+            self.files.update(pending_files)
+            self._save_manifest()
+            pending.clear()
+            pending_files.clear()
+
+        for source, path in sorted(paths.items()):
+            stat = path.stat()
+            signature = [stat.st_mtime_ns, stat.st_size]
+            entry = self.files.get(source)
+            if entry is not None and entry["signature"] == signature:
+                stats["unchanged"] += 1
+                continue
+
+            sections = self.splitter.split_documents(loader_cls(source, **(loader_kwargs or {})).load())
+            ids = section_ids(sections)
+            old_ids = set(entry["ids"]) if entry else set()
+            new = [(id_, section) for id_, section in zip(ids, sections) if id_ not in old_ids]
+            gone = sorted(old_ids - set(ids))
+            if gone:
+                self.vectorstore.delete(gone)
+            pending.extend(new)
+            pending_files[source] = {"signature": signature, "ids": ids}
+            if len(pending) >= self.batch_size:
+                flush()
+            stats["changed"] += 1
+            stats["embedded"] += len(new)
+            stats["deleted"] += len(gone)
+            stats["kept"] += len(ids) - len(new)
+
+        if pending_files or stats["removed"]:
+            flush()
+        return stats
+
+    def __len__(self):
+        return sum(len(entry["ids"]) for entry in self.files.values())
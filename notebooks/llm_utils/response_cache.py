@@ -0,0 +1,262 @@
+import ast
+import functools
+import hashlib
+import inspect
+import json
+import os
+import sqlite3
+import threading
+import time
+
+try:
+    from langchain.cache import BaseCache
+except ImportError:  # LangChain is optional, LangChainCache still works duck-typed
+    BaseCache = object
+
+# Request arguments that change how a call is sent, not what it returns
+TRANSPORT_PARAMS = frozenset({
+    "api_key", "api_base", "api_type", "api_version", "organization",
+    "request_timeout", "request_id", "headers", "timeout",
+})
+# OpenAI samples with temperature 1 when the request does not set one
+DEFAULT_TEMPERATURE = 1.0
+
+
+class ResponseCache:
+    """Responses of LLM calls stored in SQLite, keyed on the request.
+
+    The key hashes the endpoint and every request argument that can change
+    the response: model, messages or prompt, sampling parameters, n...
+    Entries expire after `ttl` seconds and the least recently used ones are
+    evicted beyond `max_entries`. Requests sampling with temperature > 0 are
+    not cached, re-running them is expected to give new outputs, unless the
+    caller forces it.
+    Usage:
+      response_cache = ResponseCache(".cache/responses.sqlite3")
+      create = response_cache.wrap(openai.ChatCompletion.create)
+      response = create(model=MODEL_NAME, messages=messages, temperature=0)
+      response_cache.hit_rate
+    """
+
+    def __init__(self, path: str = ".cache/responses.sqlite3", ttl: float = 7 * 24 * 3600, max_entries: int = 10_000):
+        """
+        Args:
+            path (str, optional): SQLite file, shared by the notebooks.
+                Defaults to ".cache/responses.sqlite3".
+            ttl (float, optional): Seconds an entry is served. Defaults to a week.
+            max_entries (int, optional): Entries kept, least recently used
+                ones are evicted first. Defaults to 10_000.
+        """
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stats = {"hits": 0, "misses": 0, "bypassed": 0}
+
+        # Shared by the notebook's threads (LangChain runs callbacks in threads)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self._conn.commit()
+
+    @staticmethod
+    def key(endpoint: str, params: dict) -> str:
+        """Hash of the endpoint and the response-shaping request arguments."""
+        request = {k: v for k, v in params.items() if k not in TRANSPORT_PARAMS}
+        text = json.dumps([endpoint, request], sort_keys=True, default=str)
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def cacheable(temperature, force: bool = None) -> bool:
+        """Whether a request is cached: forced on or off, else only greedy (temperature 0) sampling."""
+        if force is not None:
+            return force
+        return (DEFAULT_TEMPERATURE if temperature is None else temperature) <= 0
+
+    def get(self, key: str):
+        """Stored text for the key, None when missing or expired."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None and now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_used = ?, hits = hits + 1 WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.stats["hits"] += 1
+        return row[0]
+
+    def put(self, key: str, value: str):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created, last_used) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            self._conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+            self._conn.execute(
+                """DELETE FROM responses WHERE key IN (
+                    SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                )""",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def bypass(self):
+        with self._lock:
+            self.stats["bypassed"] += 1
+
+    @property
+    def hit_rate(self) -> float:
+        """Hits over cacheable lookups, bypassed requests excluded."""
+        with self._lock:
+            hits, misses = self.stats["hits"], self.stats["misses"]
+        lookups = hits + misses
+        return hits / lookups if lookups else 0.0
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def wrap(self, create):
+        """Cached version of an OpenAI `create` (or `acreate`) method.
+
+        The wrapper takes the same arguments plus `cache`: None (default)
+        caches temperature 0 requests only, True forces caching, False
+        bypasses the cache. Streamed requests are never cached.
+        """
+        import openai
+
+        # create and acreate share their entries
+        endpoint = getattr(create, "__qualname__", repr(create)).replace(".acreate", ".create")
+
+        def lookup(cache, kwargs):
+            if kwargs.get("stream") or not self.cacheable(kwargs.get("temperature"), cache):
+                self.bypass()
+                return None, None
+            key = self.key(endpoint, kwargs)
+            value = self.get(key)
+            if value is None:
+                return key, None
+            return key, openai.openai_object.OpenAIObject.construct_from(json.loads(value))
+
+        if inspect.iscoroutinefunction(create):
+            @functools.wraps(create)
+            async def cached_acreate(*, cache: bool = None, **kwargs):
+                key, response = lookup(cache, kwargs)
+                if response is None:
+                    response = await create(**kwargs)
+                    if key is not None:
+                        self.put(key, json.dumps(response))
+                return response
+
+            return cached_acreate
+
+        @functools.wraps(create)
+        def cached_create(*, cache: bool = None, **kwargs):
+            key, response = lookup(cache, kwargs)
+            if response is None:
+                response = create(**kwargs)
+                if key is not None:
+                    self.put(key, json.dumps(response))
+            return response
+
+        return cached_create
+
+
+def llm_string_temperature(llm_string: str):
+    """Temperature found in a LangChain llm_string, None when it has none."""
+    # str(sorted(params.items())), or a serialized LLM and the params joined by "---"
+    for part in reversed(llm_string.split("---")):
+        for parse in (ast.literal_eval, json.loads):
+            try:
+                params = dict(parse(part))
+            except (ValueError, SyntaxError, TypeError):
+                continue
+            if isinstance(params.get("kwargs"), dict):
+                params = params["kwargs"]
+            if "temperature" in params:
+                return params["temperature"]
+    return None
+
+
+class LangChainCache(BaseCache):
+    """ResponseCache as a LangChain LLM cache, for `chat(...)`, `llm(...)` and chains.
+
+    Usage:
+      import langchain
+      langchain.llm_cache = LangChainCache(ResponseCache(".cache/responses.sqlite3"))
+    """
+
+    def __init__(self, cache: ResponseCache, force: bool = None):
+        """
+        Args:
+            cache (ResponseCache): Where the generations are stored.
+            force (bool, optional): True caches every temperature, False
+                bypasses the cache. Defaults to None (temperature 0 only).
+        """
+        self.cache = cache
+        self.force = force
+
+    def _key(self, prompt, llm_string):
+        if not ResponseCache.cacheable(llm_string_temperature(llm_string), self.force):
+            return None
+        return ResponseCache.key("langchain", {"prompt": prompt, "llm": llm_string})
+
+    def lookup(self, prompt: str, llm_string: str):
+        key = self._key(prompt, llm_string)
+        if key is None:
+            self.cache.bypass()
+            return None
+        value = self.cache.get(key)
+        return None if value is None else _load_generations(value)
+
+    def update(self, prompt: str, llm_string: str, return_val):
+        key = self._key(prompt, llm_string)
+        if key is not None:
+            self.cache.put(key, _dump_generations(return_val))
+
+    def clear(self, **kwargs):
+        self.cache.clear()
+
+
+def _dump_generations(generations) -> str:
+    try:
+        from langchain.load.dump import dumps
+    except ImportError:  # Older LangChain: only the text of plain generations
+        return json.dumps([{"text": generation.text} for generation in generations])
+    return json.dumps([dumps(generation) for generation in generations])
+
+
+def _load_generations(value: str) -> list:
+    items = json.loads(value)
+    if items and isinstance(items[0], dict):
+        from langchain.schema import Generation
+
+        return [Generation(text=item["text"]) for item in items]
+    from langchain.load.load import loads
+
+    return [loads(item) for item in items]
@@ -0,0 +1,338 @@
+import json
+import os
+import shutil
+import uuid
+
+import numpy as np
+
+try:
+    from langchain.schema import Document
+    from langchain.vectorstores.base import VectorStore
+except ImportError:  # LangChain is optional, VectorIndex does not need it
+    Document = None
+    VectorStore = object
+
+
+def top_k(scores: np.ndarray, k: int):
+    """(indices, scores) of the k largest scores of each row, best first."""
+    n = scores.shape[1]
+    if k >= n:
+        part = np.tile(np.arange(n), (len(scores), 1))
+    else:
+        part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    part_scores = np.take_along_axis(scores, part, axis=1)
+    order = np.argsort(-part_scores, axis=1, kind="stable")
+    return np.take_along_axis(part, order, axis=1), np.take_along_axis(part_scores, order, axis=1)
+
+
+class VectorIndex:
+    """Nearest neighbours over one contiguous float32 matrix, in NumPy only.
+
+    Exact search scores blocks of the matrix with a matrix multiply and keeps
+    the best rows with argpartition. For large corpora `build_ivf` adds a
+    coarse quantizer (spherical k-means): a query is then only scored against
+    the rows of its `nprobe` closest lists. Rows carry an id, a text and a
+    metadata dict that searches can filter on. `save` writes plain .npy and
+    JSON files, `load` memory-maps the vectors.
+    Usage:
+      index = VectorIndex(dim=1536)
+      index.add(vectors, texts, metadatas)
+      indices, scores = index.search(query_vectors, k=4, filter={"source": "../docs_sample/guides/reports.md"})
+    """
+
+    def __init__(self, dim: int = None, normalize: bool = True, block_rows: int = 65536):
+        """
+        Args:
+            dim (int, optional): Vector size, taken from the first add when None.
+            normalize (bool, optional): L2 normalize vectors and queries, so
+                scores are cosine similarities. Defaults to True.
+            block_rows (int, optional): Rows scored at once by exact search,
+                bounds the memory of a batch of queries. Defaults to 65536.
+        """
+        self.dim = dim
+        self.normalize = normalize
+        self.block_rows = block_rows
+        self.vectors = np.zeros((0, dim or 0), dtype=np.float32)
+        self.ids, self.texts, self.metadatas = [], [], []
+        self.centroids = None
+        self.assignments = None
+        self._lists = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _prepare(self, vectors):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors[None, :]
+        if self.normalize:
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.where(norms == 0, 1, norms)
+        return vectors
+
+    def add(self, vectors, texts=None, metadatas=None, ids=None) -> list:
+        """Append rows, returns their ids."""
+        vectors = self._prepare(vectors)
+        n = len(vectors)
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+            self.vectors = self.vectors.reshape(0, self.dim)
+        assert vectors.shape[1] == self.dim, f"Expected {self.dim} dimensions, got {vectors.shape[1]}"
+        ids = list(ids) if ids is not None else [uuid.uuid4().hex for _ in range(n)]
+        self.vectors = np.concatenate([self.vectors, vectors])
+        self.ids.extend(ids)
+        self.texts.extend(texts if texts is not None else [""] * n)
+        self.metadatas.extend(dict(m) for m in (metadatas if metadatas is not None else [{}] * n))
+        if self.centroids is not None:
+            self.assignments = np.concatenate([self.assignments, self._assign(vectors)])
+            self._lists = None
+        return ids
+
+    def delete(self, ids):
+        """Remove the rows of these ids, unknown ids are ignored."""
+        ids = set(ids)
+        keep = np.array([id_ not in ids for id_ in self.ids], dtype=bool)
+        if keep.all():
+            return
+        self.vectors = np.ascontiguousarray(self.vectors[keep])
+        self.ids = [id_ for id_, k in zip(self.ids, keep) if k]
+        self.texts = [text for text, k in zip(self.texts, keep) if k]
+        self.metadatas = [metadata for metadata, k in zip(self.metadatas, keep) if k]
+        if self.assignments is not None:
+            self.assignments = self.assignments[keep]
+            self._lists = None
+
+    def mask(self, filter: dict = None):
+        """Boolean row mask of a metadata filter, None when there is no filter.
+
+        `filter` maps fields to a value or a list/set of accepted values,
+        e.g. {"source": ["a.md", "b.md"]}.
+        """
+        if not filter:
+            return None
+        accepted = {
+            field: set(value) if isinstance(value, (list, tuple, set, frozenset)) else {value}
+            for field, value in filter.items()
+        }
+        return np.fromiter(
+            (all(m.get(field) in values for field, values in accepted.items()) for m in self.metadatas),
+            dtype=bool, count=len(self.metadatas),
+        )
+
+    def _exact(self, queries, k, mask, rows=None):
+        """Top k of each query over `rows` (all rows when None), block by block."""
+        best_idx = np.zeros((len(queries), 0), dtype=np.int64)
+        best_scores = np.zeros((len(queries), 0), dtype=np.float32)
+        n = len(self.vectors) if rows is None else len(rows)
+        for start in range(0, n, self.block_rows):
+            if rows is None:
+                in_block = np.arange(start, min(start + self.block_rows, n))
+                block = self.vectors[start:start + self.block_rows]
+            else:
+                in_block = rows[start:start + self.block_rows]
+                block = self.vectors[in_block]
+            scores = queries @ block.T
+            if mask is not None:
+                scores[:, ~mask[in_block]] = -np.inf
+            idx, block_scores = top_k(scores, k)
+            best_idx = np.concatenate([best_idx, in_block[idx]], axis=1)
+            best_scores = np.concatenate([best_scores, block_scores], axis=1)
+            if best_idx.shape[1] > k:
+                idx, best_scores = top_k(best_scores, k)
+                best_idx = np.take_along_axis(best_idx, idx, axis=1)
+        return best_idx, best_scores
+
+    def search(self, queries, k: int = 4, filter: dict = None, nprobe: int = None):
+        """Best rows for each query.
+
+        Args:
+            queries (array): One query vector, or a (n_queries, dim) batch.
+            k (int, optional): Rows per query. Defaults to 4.
+            filter (dict, optional): Metadata filter, see `mask`.
+            nprobe (int, optional): Lists scored per query when the IVF is
+                built. None searches exactly. Defaults to None.
+        Returns:
+            tuple: (indices, scores), (n_queries, <=k) arrays, best first.
+            Rows excluded by the filter are never returned: when fewer than
+            k rows match, the columns are cut to the best-served query and
+            the missing places of the others have a -inf score.
+        """
+        queries = self._prepare(queries)
+        mask = self.mask(filter)
+        if nprobe is None or self.centroids is None:
+            idx, scores = self._exact(queries, k, mask)
+        else:
+            idx, scores = self._ivf(queries, k, mask, nprobe)
+        found = np.isfinite(scores)
+        if found.all():
+            return idx, scores
+        width = found.sum(axis=1).max()
+        return idx[:, :width], scores[:, :width]
+
+    def _assign(self, vectors):
+        assignments = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), self.block_rows):
+            block = vectors[start:start + self.block_rows]
+            assignments[start:start + len(block)] = (block @ self.centroids.T).argmax(axis=1)
+        return assignments
+
+    def build_ivf(self, n_lists: int = None, iterations: int = 10, sample: int = None, seed: int = 0):
+        """Train the coarse quantizer and assign every row to a list.
+
+        Args:
+            n_lists (int, optional): Number of lists. Defaults to sqrt(rows).
+            iterations (int, optional): k-means iterations. Defaults to 10.
+            sample (int, optional): Rows used for training. Defaults to 64
+                per list, enough for the centroids and much faster than all rows.
+            seed (int, optional): Defaults to 0.
+        """
+        rng = np.random.default_rng(seed)
+        n_lists = n_lists or max(1, int(np.sqrt(len(self))))
+        sample = sample or 64 * n_lists
+        train = self.vectors[np.sort(rng.choice(len(self), min(sample, len(self)), replace=False))]
+        self.centroids = np.array(train[rng.choice(len(train), n_lists, replace=False)])
+        for _ in range(iterations):
+            assignments = self._assign(train)
+            # Sums per list from the rows sorted by list (np.add.at is much slower)
+            order = np.argsort(assignments, kind="stable")
+            counts = np.bincount(assignments, minlength=n_lists)
+            empty = counts == 0
+            sums = np.zeros_like(self.centroids)
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+            sums[~empty] = np.add.reduceat(train[order], starts[~empty])
+            # Empty lists restart from random training rows
+            sums[empty] = train[rng.choice(len(train), empty.sum())]
+            self.centroids = sums / np.linalg.norm(sums, axis=1, keepdims=True)
+        self.assignments = self._assign(self.vectors)
+        self._lists = None
+        return self
+
+    def _ivf(self, queries, k, mask, nprobe):
+        if self._lists is None:
+            order = np.argsort(self.assignments, kind="stable")
+            offsets = np.searchsorted(self.assignments[order], np.arange(len(self.centroids) + 1))
+            self._lists = (order, offsets)
+        order, offsets = self._lists
+        probes, _ = top_k(queries @ self.centroids.T, nprobe)
+        idx = np.full((len(queries), k), -1, dtype=np.int64)
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        for i, (query, lists) in enumerate(zip(queries, probes)):
+            rows = np.concatenate([order[offsets[l]:offsets[l + 1]] for l in lists])
+            found_idx, found_scores = self._exact(query[None, :], k, mask, np.sort(rows))
+            idx[i, :found_idx.shape[1]] = found_idx[0]
+            scores[i, :found_idx.shape[1]] = found_scores[0]
+        return idx, scores
+
+    def save(self, directory: str):
+        """Write the index to a directory, replacing it as a whole."""
+        tmp_dir = f"{directory.rstrip(os.sep)}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        np.save(os.path.join(tmp_dir, "vectors.npy"), np.ascontiguousarray(self.vectors, dtype=np.float32))
+        if self.centroids is not None:
+            np.save(os.path.join(tmp_dir, "centroids.npy"), self.centroids)
+            np.save(os.path.join(tmp_dir, "assignments.npy"), self.assignments)
+        with open(os.path.join(tmp_dir, "rows.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "dim": self.dim, "normalize": self.normalize,
+                "ids": self.ids, "texts": self.texts, "metadatas": self.metadatas,
+            }, f)
+        # Readers that memory-mapped the old files keep them until they reload
+        old_dir = f"{directory.rstrip(os.sep)}.{os.getpid()}.old"
+        if os.path.exists(directory):
+            os.rename(directory, old_dir)
+        os.rename(tmp_dir, directory)
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True, **kwargs):
+        """Index saved by `save`, vectors memory-mapped (read only until modified)."""
+        with open(os.path.join(directory, "rows.json"), encoding="utf-8") as f:
+            rows = json.load(f)
+        index = cls(dim=rows["dim"], normalize=rows["normalize"], **kwargs)
+        index.vectors = np.load(os.path.join(directory, "vectors.npy"), mmap_mode="r" if mmap else None)
+        index.ids, index.texts, index.metadatas = rows["ids"], rows["texts"], rows["metadatas"]
+        if os.path.exists(os.path.join(directory, "centroids.npy")):
+            index.centroids = np.load(os.path.join(directory, "centroids.npy"))
+            index.assignments = np.load(os.path.join(directory, "assignments.npy"))
+        return index
+
+
+class NumpyVectorStore(VectorStore):
+    """LangChain vector store on a VectorIndex, a drop-in for Chroma and FAISS.
+
+    Scores are cosine similarities, higher is closer. With a
+    persist_directory the index is loaded from it when it exists, and
+    `persist()` writes it back.
+    Usage:
+      db = NumpyVectorStore.from_documents(document_sections, embeddings, persist_directory=".cache/vectors")
+      retriever = db.as_retriever(search_kwargs=dict(k=3, filter={"source": source}))
+      qa = RetrievalQA.from_chain_type(llm=OpenAI(), chain_type="stuff", retriever=retriever)
+    """
+
+    def __init__(self, embedding, index: VectorIndex = None, persist_directory: str = None, nprobe: int = None):
+        """
+        Args:
+            embedding (Embeddings): Embeds texts and queries.
+            index (VectorIndex, optional): Defaults to the one saved in
+                persist_directory, else an empty index.
+            persist_directory (str, optional): Where `persist()` saves the index.
+            nprobe (int, optional): IVF lists searched per query once
+                `index.build_ivf()` ran. None searches exactly. Defaults to None.
+        """
+        self.embedding = embedding
+        self.persist_directory = persist_directory
+        self.nprobe = nprobe
+        if index is None:
+            exists = persist_directory and os.path.exists(os.path.join(persist_directory, "rows.json"))
+            index = VectorIndex.load(persist_directory) if exists else VectorIndex()
+        self.index = index
+
+    @property
+    def embeddings(self):
+        return self.embedding
+
+    def add_texts(self, texts, metadatas=None, ids=None, **kwargs) -> list:
+        texts = list(texts)
+        if not texts:
+            return []
+        vectors = np.asarray(self.embedding.embed_documents(texts), dtype=np.float32)
+        return self.index.add(vectors, texts, metadatas, ids)
+
+    def delete(self, ids=None, **kwargs):
+        if ids:
+            self.index.delete(ids)
+
+    def persist(self):
+        if self.persist_directory is None:
+            raise ValueError("A persist_directory is needed to persist the index")
+        self.index.save(self.persist_directory)
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, ids=None, persist_directory=None, **kwargs):
+        store = cls(embedding, persist_directory=persist_directory, **kwargs)
+        store.add_texts(texts, metadatas, ids)
+        if persist_directory:
+            store.persist()
+        return store
+
+    def similarity_search_by_vector_with_score(self, embedding, k: int = 4, filter: dict = None, **kwargs):
+        idx, scores = self.index.search(np.asarray(embedding, dtype=np.float32), k, filter, self.nprobe)
+        return [
+            (Document(page_content=self.index.texts[i], metadata=dict(self.index.metadatas[i])), float(score))
+            for i, score in zip(idx[0], scores[0])
+            if np.isfinite(score)
+        ]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, filter: dict = None, **kwargs):
+        return self.similarity_search_by_vector_with_score(self.embedding.embed_query(query), k, filter)
+
+    def similarity_search_by_vector(self, embedding, k: int = 4, filter: dict = None, **kwargs):
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k, filter)]
+
+    def similarity_search(self, query: str, k: int = 4, filter: dict = None, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter)]
+
+    def _similarity_search_with_relevance_scores(self, query: str, k: int = 4, **kwargs):
+        # Cosine similarity in [-1, 1] to a relevance in [0, 1]
+        return [(doc, (score + 1) / 2) for doc, score in self.similarity_search_with_score(query, k, **kwargs)]
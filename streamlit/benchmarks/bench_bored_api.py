@@ -0,0 +1,72 @@
+"""
+Latency of the day26 Bored API client against a local stub of the API.
+
+Compares the original call (requests.get without timeout, one per rerun) to
+BoredClient: reruns served from the TTL cache, new suggestions served from the
+prefetch pool, a hanging upstream cut by the timeout, and a dead upstream
+answered from cache while the circuit breaker is open.
+
+Run from the `streamlit` directory:
+    python -m benchmarks.bench_bored_api
+"""
+
+import statistics
+import time
+
+import requests
+
+from benchmarks.stub_server import BoredHandler, start_server
+from dashboard_utils.bored_api import ACTIVITY_TYPES, BoredClient, CircuitBreaker
+
+
+def timed(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000, result
+
+
+def main():
+    server, url = start_server(BoredHandler, '/api/activity')
+    print(f'stub latency {BoredHandler.latency * 1000:.0f} ms')
+
+    legacy, _ = timed(lambda: requests.get(f'{url}?type=music').json(), 5)
+    print(f'  original request per rerun       {legacy:8.1f} ms')
+
+    client = BoredClient(url, timeout=1, ttl=60, prefetch=3,
+                         breaker=CircuitBreaker(failure_threshold=3, reset_timeout=30))
+    cold, _ = timed(lambda: client.suggestion('music'), 1)
+    print(f'  first suggestion, cold           {cold:8.1f} ms')
+    rerun, _ = timed(lambda: client.suggestion('music'), 20)
+    print(f'  rerun, TTL cache                 {rerun:8.2f} ms')
+
+    client.warm(ACTIVITY_TYPES)
+    time.sleep(3 * BoredHandler.latency * 2 + 0.5)
+    prefetched, (_, source) = timed(lambda: client.suggestion('music', new=True), 3)
+    print(f'  new suggestion, prefetched       {prefetched:8.2f} ms  ({source})')
+    switch, (_, source) = timed(lambda: client.suggestion('cooking'), 1)
+    print(f'  switch type, prefetched          {switch:8.2f} ms  ({source})')
+
+    # Empty the queue then hang the upstream: the timeout bounds the wait
+    fresh = BoredClient(url, timeout=1, prefetch=0)
+    fresh.suggestion('social')
+    BoredHandler.mode = 'hang'
+    hang, (_, source) = timed(lambda: fresh.suggestion('social', new=True), 1)
+    print(f'  upstream hangs {BoredHandler.hang_latency:.0f} s, timeout 1 s  {hang:8.1f} ms  ({source})')
+
+    BoredHandler.mode = 'fail'
+    for _ in range(3):
+        fresh.suggestion('social', new=True)
+    down, (activity, source) = timed(lambda: fresh.suggestion('social', new=True), 20)
+    print(f'  upstream down, circuit open      {down:8.2f} ms  ({source}: {activity["activity"]!r})')
+    assert fresh.breaker.is_open and source == 'stale'
+
+    client.close()
+    fresh.close()
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Cost of ingesting All_Comments_Final.csv: full parse vs appending the last
+day's comments to an existing store.
+
+Run from the `streamlit` directory:
+    python -m benchmarks.bench_comments
+"""
+
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic_youtube import COMMENTS_FILE, SOURCE_DIR
+from dashboard_utils.comments import CommentStore, record_boundary
+
+
+def main():
+    source = os.path.join(SOURCE_DIR, COMMENTS_FILE)
+    with open(source, 'rb') as f:
+        raw = f.read()
+    # The export is newest first, treat the first ~1% of the bytes as "today"
+    # and move them to the end so they arrive as an append
+    header_end = raw.index(b'\n') + 1
+    df = pd.read_csv(source)
+    print(f'{len(df)} comments, {len(raw) / 2**20:.1f} MiB')
+
+    with tempfile.TemporaryDirectory() as work:
+        path = os.path.join(work, COMMENTS_FILE)
+        body = raw[header_end:]
+        today = body[:record_boundary(body[:len(body) // 100])]
+        start = time.perf_counter()
+        pd.read_csv(source)
+        print(f'  {"pandas read_csv (full)":<34}{time.perf_counter() - start:8.3f}s')
+
+        with open(path, 'wb') as f:
+            f.write(raw[:header_end] + body[len(today):])
+        start = time.perf_counter()
+        store = CommentStore(path)
+        store.refresh()
+        print(f'  {"store, first ingestion":<34}{time.perf_counter() - start:8.3f}s')
+
+        with open(path, 'ab') as f:
+            f.write(today)
+        start = time.perf_counter()
+        new = store.refresh()
+        print(f'  {f"append {new} comments, same process":<34}{time.perf_counter() - start:8.3f}s')
+
+        start = time.perf_counter()
+        store = CommentStore(path)
+        store.refresh()
+        print(f'  {"restart, reload parts":<34}{time.perf_counter() - start:8.3f}s')
+        assert set(store.frame['Comment_ID']) == set(df['Comment_ID'])
+
+
+if __name__ == '__main__':
+    main()
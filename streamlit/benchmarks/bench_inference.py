@@ -0,0 +1,56 @@
+"""
+Throughput of the zero-shot classifier loop against the local stub server.
+
+Run from the `streamlit` directory:
+    python -m benchmarks.bench_inference
+"""
+
+import time
+
+import requests
+
+from benchmarks.stub_server import start_server
+from dashboard_utils.inference import InferenceClient
+
+LABELS = ['Transactional', 'Informational', 'Navigational']
+
+
+def serial_baseline(url, phrases):
+    """ The original day29 loop: one fresh requests.post per phrase """
+    rows = []
+    for row in phrases:
+        response = requests.post(url, headers={'Authorization': 'Bearer stub'}, json={
+            'inputs': row,
+            'parameters': {'candidate_labels': LABELS},
+            'options': {'wait_for_model': True}
+        })
+        rows.append(response.json())
+    return rows
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main(n_phrases=200):
+    server, url = start_server()
+    phrases = [f'keyphrase number {i} about a product' for i in range(n_phrases)]
+
+    expected, elapsed = timed(serial_baseline, url, phrases)
+    print(f'{"serial requests.post":<32}{elapsed:8.2f}s {n_phrases / elapsed:8.1f} phrases/s')
+
+    for batch_size, max_workers in [(1, 1), (1, 8), (8, 1), (8, 4), (16, 8)]:
+        client = InferenceClient('stub', api_url=url, batch_size=batch_size, max_workers=max_workers)
+        rows, elapsed = timed(client.classify, phrases, LABELS)
+        client.close()
+        assert rows == expected, 'rows must come back in input order'
+        label = f'batch={batch_size} workers={max_workers}'
+        print(f'{label:<32}{elapsed:8.2f}s {n_phrases / elapsed:8.1f} phrases/s')
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Cold start and rerun latency of the day4 ingestion, before and after snapshots.
+
+Run from the `streamlit` directory:
+    python -m benchmarks.bench_ingest
+"""
+
+import os
+import tempfile
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from benchmarks.synthetic_youtube import write_dataset
+from dashboard_utils.ingest import load_dashboard_data, snapshot_path
+
+
+def legacy_load(data_dir):
+    """ The original day4 load_data body """
+    df_raw = pd.read_csv(os.path.join(data_dir, 'Aggregated_Metrics_By_Video.csv'))
+    df_raw['Average view duration'] = df_raw.iloc[:, 12].apply(lambda x: datetime.strptime(x, '%H:%M:%S'))
+    df_raw['Avg_duration_sec'] = df_raw['Average view duration'].apply(lambda x: x.second + x.minute*60 + x.hour*3600)
+    df_agg_sub = pd.read_csv(os.path.join(data_dir, 'Aggregated_Metrics_By_Country_And_Subscriber_Status.csv'))
+    df_comments = pd.read_csv(os.path.join(data_dir, 'Aggregated_Metrics_By_Video.csv'))
+    df_time = pd.read_csv(os.path.join(data_dir, 'Video_Performance_Over_Time.csv'), parse_dates=['Date'])
+    df_time['Date'] = pd.to_datetime(df_time['Date'], format='%d %b %Y')
+    return df_raw, df_agg_sub, df_comments, df_time
+
+
+def timed(func, *args, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def clear_snapshots(data_dir):
+    for name in os.listdir(data_dir):
+        if name.endswith('.csv') and os.path.exists(snapshot_path(os.path.join(data_dir, name))):
+            os.remove(snapshot_path(os.path.join(data_dir, name)))
+
+
+def main():
+    for n_videos in [None, 2000]:
+        with tempfile.TemporaryDirectory() as data_dir:
+            write_dataset(data_dir, n_videos=n_videos)
+            rows = sum(1 for _ in open(os.path.join(data_dir, 'Video_Performance_Over_Time.csv'))) - 1
+            print(f'{n_videos or "real"} videos, {rows} daily rows')
+
+            print(f'  {"legacy (every cold start)":<34}{timed(legacy_load, data_dir):8.3f}s')
+
+            def cold(data_dir):
+                clear_snapshots(data_dir)
+                load_dashboard_data(data_dir)
+            print(f'  {"parse + write snapshot":<34}{timed(cold, data_dir):8.3f}s')
+
+            load_dashboard_data(data_dir)
+            print(f'  {"reload from snapshot":<34}{timed(load_dashboard_data, data_dir):8.3f}s')
+
+            # Touching the CSVs forces a hash check but not a reparse
+            def touched(data_dir):
+                for name in os.listdir(data_dir):
+                    if name.endswith('.csv'):
+                        os.utime(os.path.join(data_dir, name))
+                load_dashboard_data(data_dir)
+            print(f'  {"reload after touch (hash check)":<34}{timed(touched, data_dir):8.3f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+"""
+CPU throughput of the in-process zero-shot backends at 10/100/1000 phrases.
+
+Needs `transformers` + `torch` (local) and/or `sentence-transformers`
+(local-embedding); a backend whose dependencies are missing is skipped.
+Run from the `streamlit` directory:
+    python -m benchmarks.bench_local_backend
+"""
+
+import time
+
+from dashboard_utils.inference import make_backend
+
+LABELS = ['Transactional', 'Informational', 'Navigational']
+SIZES = [10, 100, 1000]
+
+
+def main():
+    for name in ['local', 'local-embedding']:
+        try:
+            backend = make_backend(name)
+        except ImportError as e:
+            print(f'{name}: skipped ({e})')
+            continue
+
+        # Warm up so model loading isn't counted
+        backend.classify(['warm up'], LABELS)
+        for n in SIZES:
+            phrases = [f'keyphrase number {i} about a product' for i in range(n)]
+            start = time.perf_counter()
+            backend.classify(phrases, LABELS)
+            elapsed = time.perf_counter() - start
+            print(f'{name:<16}{n:>6} phrases {elapsed:8.2f}s {n / elapsed:8.1f} phrases/s')
+
+
+if __name__ == '__main__':
+    main()
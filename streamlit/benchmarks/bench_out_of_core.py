@@ -0,0 +1,69 @@
+"""
+Build time and Python heap peak of the day4 time series tables, in memory
+(pandas) vs out of core (DuckDB over the CSV and over a Parquet copy).
+
+Run from the `streamlit` directory:
+    python -m benchmarks.bench_out_of_core
+"""
+
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic_youtube import write_dataset
+from dashboard_utils.derived import build_derived_tables
+from dashboard_utils.ingest import load_dashboard_data, parse_time
+from dashboard_utils.out_of_core import DuckDBTimeSeries
+
+
+def measure(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    for n_videos in [None, 2000]:
+        with tempfile.TemporaryDirectory() as data_dir:
+            write_dataset(data_dir, n_videos=n_videos)
+            csv_path = os.path.join(data_dir, 'Video_Performance_Over_Time.csv')
+            parquet_path = os.path.join(data_dir, 'time.parquet')
+            parse_time(csv_path).to_parquet(parquet_path)
+            df_agg, df_agg_sub, _, _ = load_dashboard_data(data_dir, load_time=False)
+            rows = sum(1 for _ in open(csv_path)) - 1
+            print(f'{n_videos or "real"} videos, {rows} daily rows')
+
+            def in_memory():
+                df_time = parse_time(csv_path)
+                return build_derived_tables(df_agg, df_agg_sub, df_time)
+            expected, elapsed, peak = measure(in_memory)
+            print(f'  {"pandas (parse + build)":<30}{elapsed:8.3f}s {peak / 2**20:8.1f} MiB')
+
+            for label, source in [('duckdb over CSV', csv_path), ('duckdb over Parquet', parquet_path)]:
+                def out_of_core():
+                    store = DuckDBTimeSeries(source, df_agg, memory_limit='256MB')
+                    return build_derived_tables(df_agg, df_agg_sub, None, store)
+                tables, elapsed, peak = measure(out_of_core)
+                print(f'  {label:<30}{elapsed:8.3f}s {peak / 2**20:8.1f} MiB')
+                pd.testing.assert_frame_equal(
+                    tables.views_days, expected.views_days, check_dtype=False
+                )
+
+                video_id = df_agg['Video'].iloc[0]
+                start = time.perf_counter()
+                daily = tables.videos.time.get(video_id)
+                lookup = time.perf_counter() - start
+                assert np.allclose(daily['Views'], expected.videos.time.get(video_id)['Views'])
+                print(f'  {"  + one video lookup":<30}{lookup * 1000:8.1f}ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+InferenceClient behaviour against a stub server that injects 503/429,
+non-JSON error pages, slow responses and poisoned inputs.
+
+Run from the `streamlit` directory:
+    python -m benchmarks.bench_resilience
+"""
+
+import random
+import time
+
+from benchmarks.stub_server import ZeroShotHandler, start_server
+from dashboard_utils.inference import InferenceClient, InferenceError
+
+LABELS = ['Transactional', 'Informational', 'Navigational']
+
+
+class FaultyHandler(ZeroShotHandler):
+    fail_rate = 0.2
+    html_error_rate = 0.05
+    slow_rate = 0.05
+    slow_latency = 1.5
+    poison_inputs = frozenset({'keyphrase number 13 about a product'})
+    api_key = 'stub'
+
+
+def run(name, url, phrases, **kwargs):
+    client = InferenceClient('stub', api_url=url, backoff_base=0.05, backoff_max=1, **kwargs)
+    start = time.perf_counter()
+    rows = client.classify(phrases, LABELS)
+    elapsed = time.perf_counter() - start
+    client.close()
+
+    assert [row['sequence'] for row in rows] == phrases, 'rows must come back in input order'
+    failed = [row for row in rows if 'error' in row]
+    print(f'{name:<28}{elapsed:8.2f}s  ok={len(rows) - len(failed)} failed={len(failed)}')
+    for row in failed[:3]:
+        print(f'    {row["sequence"]!r}: {row["error"]}')
+    return rows
+
+
+def main(n_phrases=200):
+    random.seed(0)
+    server, url = start_server(FaultyHandler)
+    phrases = [f'keyphrase number {i} about a product' for i in range(n_phrases)]
+
+    run('timeout=1s', url, phrases, timeout=1)
+    run('timeout=1s, 20 req/s', url, phrases, timeout=1, rate_limit=20)
+    run('no retries', url, phrases, timeout=1, max_retries=0)
+
+    try:
+        InferenceClient('wrong key', api_url=url).classify(phrases[:5], LABELS)
+    except InferenceError as e:
+        print(f'{"invalid key":<28}raised InferenceError (HTTP {e.status_code})')
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Wall time and peak memory of the day28 SHAP modes against the original full
+pass (shap.Explainer(model, X)(X) followed by TreeExplainer(model).shap_values(X)).
+
+Each mode runs in a fresh process so peak RSS is comparable; the pool workers
+of the full mode are counted too. The data is synthetic and shaped like the
+adult census table, so the benchmark runs offline at any size.
+
+Run from the `streamlit` directory:
+    python -m benchmarks.bench_shap [rows]
+"""
+
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+MODES = ['legacy', 'full', 'sample', 'instance']
+ADULT_COLUMNS = [
+    'Age', 'Workclass', 'Education-Num', 'Marital Status', 'Occupation', 'Relationship',
+    'Race', 'Sex', 'Capital Gain', 'Capital Loss', 'Hours per week', 'Country',
+]
+
+
+def synthetic_adult(n_rows, seed=0):
+    """Features and a label loosely following the adult census relationships."""
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame({c: rng.integers(0, 10, n_rows).astype('float32') for c in ADULT_COLUMNS})
+    X['Age'] = rng.integers(17, 90, n_rows).astype('float32')
+    X['Hours per week'] = rng.integers(1, 99, n_rows).astype('float32')
+    X['Capital Gain'] = (rng.random(n_rows) < 0.08) * rng.integers(0, 99999, n_rows).astype('float32')
+    logit = 0.04 * (X['Age'] - 40) + 0.35 * (X['Education-Num'] - 5) + 0.02 * (X['Hours per week'] - 40) \
+        + 0.0001 * X['Capital Gain'] - 1.2
+    y = rng.random(n_rows) < 1 / (1 + np.exp(-logit))
+    return X, y
+
+
+def peak_rss_mb():
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return (own + children) / 1024
+
+
+def run_mode(mode, work):
+    """Body of one measurement, in its own process."""
+    import shap
+    import xgboost
+
+    from dashboard_utils.shap_cache import ShapCache
+
+    X = pd.read_parquet(os.path.join(work, 'X.parquet'))
+    y = np.load(os.path.join(work, 'y.npy'))
+    model = xgboost.Booster()
+    model.load_model(os.path.join(work, 'model.ubj'))
+    baseline = peak_rss_mb()
+    cache = ShapCache(os.path.join(work, f'cache-{mode}'))
+
+    start = time.perf_counter()
+    if mode == 'legacy':
+        shap.Explainer(model, X)(X)
+        shap.TreeExplainer(model).shap_values(X)
+    elif mode == 'full':
+        cache.get_full(model, X)
+    elif mode == 'sample':
+        cache.get_sample(model, X, y, size=2000)
+    elif mode == 'instance':
+        cache.explain_rows(model, X, [0])
+    elapsed = time.perf_counter() - start
+    print(json.dumps({'seconds': elapsed, 'peak_mb': peak_rss_mb(), 'baseline_mb': baseline}))
+
+
+def main(n_rows):
+    import xgboost
+
+    with tempfile.TemporaryDirectory() as work:
+        X, y = synthetic_adult(n_rows)
+        X.to_parquet(os.path.join(work, 'X.parquet'))
+        np.save(os.path.join(work, 'y.npy'), y)
+        params = {'eta': 0.01, 'objective': 'binary:logistic', 'subsample': 0.5, 'base_score': np.mean(y)}
+        xgboost.train(params, xgboost.DMatrix(X, label=y), 10).save_model(os.path.join(work, 'model.ubj'))
+
+        print(f'{n_rows:,} rows, {os.cpu_count()} CPUs')
+        for mode in MODES:
+            output = subprocess.run(
+                [sys.executable, '-W', 'ignore', '-m', 'benchmarks.bench_shap', '--run', mode, work],
+                capture_output=True, text=True, check=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f'  {mode:<10}{result["seconds"]:9.2f}s   peak {result["peak_mb"]:7.0f} MiB'
+                  f'   (+{result["peak_mb"] - result["baseline_mb"]:.0f} MiB over loaded data)')
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--run']:
+        run_mode(sys.argv[2], sys.argv[3])
+    else:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
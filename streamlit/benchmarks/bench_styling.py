@@ -0,0 +1,94 @@
+"""
+Server-side render time of the day4 Aggregate Metrics table at 100, 1k and 10k
+videos: per-cell applymap styling vs precomputed sign masks, whole table and
+one page.
+
+Times include what st.dataframe does with a Styler (compute, translate and
+serialise to Arrow). Run from the `streamlit` directory:
+    python -m benchmarks.bench_styling
+"""
+
+import os
+import tempfile
+import time
+
+import pandas as pd
+from streamlit.elements.lib.pandas_styler_utils import marshall_styler
+from streamlit.proto.ArrowData_pb2 import ArrowData
+
+from benchmarks.synthetic_youtube import write_dataset
+from dashboard_utils.derived import build_derived_tables
+from dashboard_utils.ingest import load_dashboard_data
+from dashboard_utils.styling import percent_formats, sign_styles, style_rows
+
+PAGE_SIZE = 250
+
+
+def style_negative(v, props=''):
+    """ The original day4 helper """
+    try:
+        return props if v < 0 else None
+    except:
+        pass
+
+
+def style_positive(v, props=''):
+    """ The original day4 helper """
+    try:
+        return props if v > 0 else None
+    except:
+        pass
+
+
+def legacy_styler(df):
+    df_to_pct = {}
+    for i in df.median(numeric_only=True).index.tolist():
+        df_to_pct[i] = '{:.1%}'.format
+    return (
+        df.style.hide()
+        .applymap(style_negative, props='color:red;')
+        .applymap(style_positive, props='color:green;')
+        .format(df_to_pct)
+    )
+
+
+def render(styler):
+    marshall_styler(ArrowData(), styler, 'bench')
+
+
+def timed(func, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    pd.set_option('styler.render.max_elements', 10**7)
+    for n_videos in [100, 1000, 10000]:
+        with tempfile.TemporaryDirectory() as data_dir:
+            write_dataset(data_dir, n_videos=n_videos, days_per_video=1)
+            df_agg, df_agg_sub, _, df_time = load_dashboard_data(data_dir)
+            df = build_derived_tables(df_agg, df_agg_sub, df_time).df_agg_diff_final
+        print(f'{n_videos} rows')
+
+        legacy = timed(lambda: render(legacy_styler(df)), repeat=1 if n_videos > 1000 else 3)
+        print(f'  {"applymap, whole table":<36}{legacy * 1000:10.1f}ms')
+
+        masks = timed(lambda: (sign_styles(df), percent_formats(df)))
+        print(f'  {"sign masks (once per data version)":<36}{masks * 1000:10.1f}ms')
+
+        styles, formats = sign_styles(df), percent_formats(df)
+        assert (
+            legacy_styler(df)._compute().ctx == style_rows(df, styles, formats)._compute().ctx
+        ), 'styles differ from the applymap version'
+        whole = timed(lambda: render(style_rows(df, styles, formats)), repeat=1 if n_videos > 1000 else 3)
+        print(f'  {"cached masks, whole table":<36}{whole * 1000:10.1f}ms')
+        page = timed(lambda: render(style_rows(df, styles, formats, 0, PAGE_SIZE)))
+        print(f'  {f"cached masks, one {PAGE_SIZE} row page":<36}{page * 1000:10.1f}ms')
+
+
+if __name__ == '__main__':
+    main()
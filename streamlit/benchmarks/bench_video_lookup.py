@@ -0,0 +1,63 @@
+"""
+Individual Video Analysis lookups: boolean masks vs the prebuilt VideoIndex.
+
+Selects 1,000 random videos on a synthetic channel.
+Run from the `streamlit` directory:
+    python -m benchmarks.bench_video_lookup
+"""
+
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.synthetic_youtube import write_dataset
+from dashboard_utils.derived import build_derived_tables
+from dashboard_utils.ingest import load_dashboard_data
+
+
+def mask_lookup(df_agg, df_agg_sub, df_time_diff, title):
+    """ The original day4 filtering """
+    agg_filtered = df_agg[df_agg['Video title'] == title]
+    agg_sub_filtered = df_agg_sub[df_agg_sub['Video Title'] == title]
+    agg_time_filtered = df_time_diff[df_time_diff['Video Title'] == title]
+    first_30 = agg_time_filtered[agg_time_filtered['days_published'].between(0, 30)]
+    return agg_filtered, agg_sub_filtered, first_30.sort_values('days_published')
+
+
+def index_lookup(videos, title):
+    agg_filtered, agg_sub_filtered, agg_time_filtered = videos.lookup(title)
+    first_30 = agg_time_filtered[agg_time_filtered['days_published'].between(0, 30)]
+    return agg_filtered, agg_sub_filtered, first_30
+
+
+def main(n_videos=5000, n_lookups=1000):
+    with tempfile.TemporaryDirectory() as data_dir:
+        write_dataset(data_dir, n_videos=n_videos, days_per_video=365)
+        df_agg, df_agg_sub, _, df_time = load_dashboard_data(data_dir)
+
+    start = time.perf_counter()
+    tables = build_derived_tables(df_agg, df_agg_sub, df_time)
+    print(f'{n_videos} videos, {len(tables.df_time_diff)} daily rows, '
+          f'tables + index built in {time.perf_counter() - start:.2f}s')
+
+    titles = np.random.default_rng(0).choice(df_agg['Video title'].to_numpy(), n_lookups)
+
+    start = time.perf_counter()
+    expected = [mask_lookup(df_agg, df_agg_sub, tables.df_time_diff, t) for t in titles]
+    mask_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    found = [index_lookup(tables.videos, t) for t in titles]
+    index_time = time.perf_counter() - start
+
+    for (_, sub_a, time_a), (_, sub_b, time_b) in zip(expected, found):
+        assert len(sub_a) == len(sub_b)
+        assert time_a['Views'].tolist() == time_b['Views'].tolist()
+
+    print(f'{"boolean masks":<16}{mask_time:8.2f}s {mask_time / n_lookups * 1000:8.2f} ms/lookup')
+    print(f'{"VideoIndex":<16}{index_time:8.2f}s {index_time / n_lookups * 1000:8.2f} ms/lookup')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""
+Local stand-ins for the Hugging Face zero-shot inference endpoint and the
+Bored API.
+
+Used by the benchmarks and tests so they never touch the real APIs.
+"""
+
+import itertools
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def fake_classification(sequence, labels):
+    """ Deterministic zero-shot style output for one sequence """
+    weights = [(len(sequence) * (i + 3)) % 7 + 1 for i in range(len(labels))]
+    total = sum(weights)
+    ranked = sorted(zip(labels, weights), key=lambda x: x[1], reverse=True)
+    return {
+        'sequence': sequence,
+        'labels': [label for label, _ in ranked],
+        'scores': [weight / total for _, weight in ranked],
+    }
+
+
+class ZeroShotHandler(BaseHTTPRequestHandler):
+    # Seconds spent on every request, whatever the number of inputs
+    latency = 0.05
+    # Seconds added for each input in a batched request
+    latency_per_input = 0.002
+
+    # Fault injection, all off by default
+    # Share of requests answered with one of fail_statuses
+    fail_rate = 0.0
+    fail_statuses = (503, 429)
+    # Share of requests answered with an HTML (non-JSON) 502 page
+    html_error_rate = 0.0
+    # Share of requests delayed by slow_latency extra seconds
+    slow_rate = 0.0
+    slow_latency = 1.0
+    # Inputs that always get a 400, alone or inside a batch
+    poison_inputs = frozenset()
+    # When set, requests without this bearer token get auth_status
+    api_key = None
+    auth_status = 401
+
+    def send_body(self, status, data, content_type='application/json'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_json(self, status, body):
+        self.send_body(status, json.dumps(body).encode('utf-8'))
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        payload = json.loads(body)
+        labels = payload['parameters']['candidate_labels']
+        inputs = payload['inputs']
+        batch = inputs if isinstance(inputs, list) else [inputs]
+
+        if self.api_key and self.headers.get('Authorization') != f'Bearer {self.api_key}':
+            return self.send_json(self.auth_status, {'error': 'Invalid credentials in Authorization header'})
+        if random.random() < self.fail_rate:
+            status = random.choice(self.fail_statuses)
+            if status == 503:
+                return self.send_json(503, {'error': 'Model is currently loading', 'estimated_time': 0.05})
+            return self.send_json(status, {'error': 'Rate limit reached'})
+        if random.random() < self.html_error_rate:
+            return self.send_body(502, b'<html><body>Bad Gateway</body></html>', 'text/html')
+        if random.random() < self.slow_rate:
+            time.sleep(self.slow_latency)
+        if self.poison_inputs.intersection(batch):
+            return self.send_json(400, {'error': 'Input could not be processed'})
+
+        time.sleep(self.latency + self.latency_per_input * len(batch))
+        if isinstance(inputs, list):
+            output = [fake_classification(x, labels) for x in inputs]
+        else:
+            output = fake_classification(inputs, labels)
+        self.send_json(200, output)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_keys = itertools.count(1000000)
+
+
+class BoredHandler(ZeroShotHandler):
+    """ Bored API activity endpoint, GET ?type=... """
+    latency = 0.2
+    # 'ok', 'fail' (503) or 'hang' (answers after hang_latency seconds)
+    mode = 'ok'
+    hang_latency = 5.0
+
+    def do_GET(self):
+        if self.mode == 'fail':
+            return self.send_json(503, {'error': 'Service unavailable'})
+        time.sleep(self.hang_latency if self.mode == 'hang' else self.latency)
+        activity_type = self.path.partition('type=')[2] or 'recreational'
+        self.send_json(200, {
+            'activity': f'Do something {activity_type}',
+            'type': activity_type,
+            'participants': 1,
+            'price': 0.1,
+            'link': '',
+            'key': str(next(_keys)),
+            'accessibility': 0.2,
+        })
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients that timed out hang up before the (slow) response is written
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def start_server(handler=ZeroShotHandler, path='/models/stub'):
+    """ Start the stub server on a free local port, returns (server, url) """
+    server = StubServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address
+    return server, f'http://{host}:{port}{path}'
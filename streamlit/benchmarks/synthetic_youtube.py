@@ -0,0 +1,67 @@
+"""
+Synthetic YouTube analytics exports shaped like the files day4 reads.
+
+Only Aggregated_Metrics_By_Video.csv and All_Comments_Final.csv ship with the
+repo; the country and time series exports are generated here so the dashboard
+benchmarks can run.
+"""
+
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+SOURCE_DIR = os.path.join(os.path.dirname(__file__), os.pardir, 'data')
+AGG_FILE = 'Aggregated_Metrics_By_Video.csv'
+COMMENTS_FILE = 'All_Comments_Final.csv'
+
+
+def write_dataset(data_dir, n_videos=None, days_per_video=120, seed=0):
+    """Write the day4 CSVs to data_dir.
+
+    Args:
+        data_dir (str): Output directory, created if missing.
+        n_videos (int, optional): Number of videos. Defaults to the real
+            aggregate export as is; larger values replicate its rows.
+        days_per_video (int, optional): Daily rows per video in the time
+            series. Defaults to 120.
+        seed (int, optional): Random seed. Defaults to 0.
+    """
+    rng = np.random.default_rng(seed)
+    os.makedirs(data_dir, exist_ok=True)
+    agg_path = os.path.join(data_dir, AGG_FILE)
+    shutil.copyfile(os.path.join(SOURCE_DIR, COMMENTS_FILE), os.path.join(data_dir, COMMENTS_FILE))
+
+    if n_videos is None:
+        shutil.copyfile(os.path.join(SOURCE_DIR, AGG_FILE), agg_path)
+        agg = pd.read_csv(agg_path)
+    else:
+        agg = pd.read_csv(os.path.join(SOURCE_DIR, AGG_FILE))
+        agg = agg.iloc[np.arange(n_videos) % len(agg)].reset_index(drop=True)
+        agg.iloc[:, 0] = [f'vid{i:07d}' for i in range(n_videos)]
+        agg.iloc[:, 1] = [f'{title} #{i}' for i, title in enumerate(agg.iloc[:, 1])]
+        agg.to_csv(agg_path, index=False)
+
+    ids, titles = agg.iloc[:, 0].to_numpy(), agg.iloc[:, 1].to_numpy()
+    published = pd.to_datetime(agg.iloc[:, 2], format='%b %d, %Y').to_numpy()
+
+    countries = np.array(['US', 'IN', 'GB', 'DE', 'CA', 'BR'])
+    n_sub = len(ids) * len(countries) * 2
+    pd.DataFrame({
+        'Video Title': np.repeat(titles, len(countries) * 2),
+        'External Video ID': np.repeat(ids, len(countries) * 2),
+        'Country Code': np.tile(np.repeat(countries, 2), len(ids)),
+        'Is Subscribed': np.tile([True, False], len(ids) * len(countries)),
+        'Views': rng.integers(0, 5000, n_sub),
+    }).to_csv(os.path.join(data_dir, 'Aggregated_Metrics_By_Country_And_Subscriber_Status.csv'), index=False)
+
+    offsets = np.tile(np.arange(days_per_video), len(ids))
+    dates = np.repeat(published, days_per_video) + offsets.astype('timedelta64[D]')
+    pd.DataFrame({
+        'Date': pd.DatetimeIndex(dates).strftime('%d %b %Y'),
+        'Video Title': np.repeat(titles, days_per_video),
+        'External Video ID': np.repeat(ids, days_per_video),
+        'Views': (rng.pareto(2.0, len(offsets)) * 500 / (offsets + 1)).round(),
+    }).to_csv(os.path.join(data_dir, 'Video_Performance_Over_Time.csv'), index=False)
+    return data_dir
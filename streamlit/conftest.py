@@ -0,0 +1,60 @@
+"""
+pytest configuration of the dashboards.
+
+Its presence puts the `streamlit` directory on sys.path, so the tests import
+`dashboard_utils` and `benchmarks` the same way the apps and benchmarks do.
+
+Run from the `streamlit` directory:
+    python -m pytest tests
+"""
+
+import threading
+
+import pytest
+
+from benchmarks.stub_server import ZeroShotHandler, start_server
+
+
+class CountingMixin:
+    """ Stub handler that counts its requests and can fail the first ones """
+    latency = 0
+    latency_per_input = 0
+    # Requests answered with a 503 before the stub starts working
+    fail_first = 0
+
+    def parse_request(self):
+        if not super().parse_request():
+            return False
+        cls = type(self)
+        with cls.lock:
+            cls.seen += 1
+            failing = cls.seen <= cls.fail_first
+        if failing:
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            self.send_json(503, {'error': 'Model is currently loading', 'estimated_time': 0.01})
+            # The request is answered, skip its do_GET/do_POST
+            return False
+        return True
+
+
+@pytest.fixture
+def stub():
+    """
+    Start counting stub servers, shut down at the end of the test.
+
+    Usage:
+        handler, url = stub(BoredHandler, '/api/activity', mode='fail')
+        ...
+        assert handler.seen == 1
+    """
+    servers = []
+
+    def start(base=ZeroShotHandler, path='/models/stub', **attributes):
+        handler = type('Handler', (CountingMixin, base), {'seen': 0, 'lock': threading.Lock(), **attributes})
+        server, url = start_server(handler, path)
+        servers.append(server)
+        return handler, url
+
+    yield start
+    for server in servers:
+        server.shutdown()
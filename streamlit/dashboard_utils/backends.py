@@ -0,0 +1,199 @@
+import abc
+
+import numpy as np
+
+
+def to_output(sequence, candidate_labels, scores):
+    """Shape scores like the Inference API: labels sorted by decreasing score."""
+    order = np.argsort(-np.asarray(scores), kind="stable")
+    return {
+        "sequence": sequence,
+        "labels": [candidate_labels[i] for i in order],
+        "scores": [float(scores[i]) for i in order],
+    }
+
+
+def softmax(x, axis=-1):
+    x = x - x.max(axis=axis, keepdims=True)
+    e = np.exp(x)
+    return e / e.sum(axis=axis, keepdims=True)
+
+
+class ZeroShotBackend(abc.ABC):
+    """Base class for zero-shot classification backends.
+
+    Subclasses implement `_classify_uncached` and set `model_id`, which is part
+    of the result cache key. `classify` handles the cache and keeps input order.
+    """
+
+    model_id = None
+
+    def __init__(self, cache=None):
+        """
+        Args:
+            cache (ClassificationCache, optional): Result cache, only cache
+                misses reach the backend. Defaults to None.
+        """
+        self.cache = cache
+
+    @abc.abstractmethod
+    def _classify_uncached(self, phrases, candidate_labels):
+        """Classify phrases without the cache, one output per phrase in input order."""
+
+    def classify(self, phrases, candidate_labels):
+        """Classify every phrase against the candidate labels.
+
+        Args:
+            phrases (list): Keyphrases to classify.
+            candidate_labels (list): Labels passed to the zero-shot model.
+
+        Returns:
+            list: One output per phrase, in the same order as `phrases`.
+        """
+        if self.cache is None:
+            return self._classify_uncached(phrases, candidate_labels)
+
+        outputs = self.cache.get_many(phrases, candidate_labels, self.model_id)
+        missed = [i for i in range(len(phrases)) if i not in outputs]
+        missed_phrases = [phrases[i] for i in missed]
+        if missed_phrases:
+            fresh = self._classify_uncached(missed_phrases, candidate_labels)
+            self.cache.put_many(missed_phrases, fresh, candidate_labels, self.model_id)
+            outputs.update(zip(missed, fresh))
+        return [outputs[i] for i in range(len(phrases))]
+
+    def iter_classify(self, phrases, candidate_labels, chunk_size: int = 32):
+        """Classify phrases chunk by chunk, yielding each chunk as soon as it is done.
+
+        Args:
+            phrases (list): Keyphrases to classify.
+            candidate_labels (list): Labels passed to the zero-shot model.
+            chunk_size (int, optional): Phrases per yielded chunk. Defaults to 32.
+
+        Yields:
+            list: Outputs for the next `chunk_size` phrases, in input order.
+        """
+        for i in range(0, len(phrases), chunk_size):
+            yield self.classify(phrases[i:i + chunk_size], candidate_labels)
+
+    def close(self):
+        pass
+
+
+class LocalNLIBackend(ZeroShotBackend):
+    """In-process zero-shot classification with an NLI model on CPU.
+
+    Every phrase x label pair is scored as (premise, hypothesis), and pairs
+    are packed into as few forward passes as `batch_size` allows. Requires
+    `transformers` and `torch`.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "valhalla/distilbart-mnli-12-3",
+        hypothesis_template: str = "This example is {}.",
+        batch_size: int = 256,
+        cache=None,
+    ):
+        """
+        Args:
+            model_name (str, optional): Hugging Face NLI checkpoint.
+                Defaults to "valhalla/distilbart-mnli-12-3".
+            hypothesis_template (str, optional): Template turning a label into
+                a hypothesis. Defaults to "This example is {}.".
+            batch_size (int, optional): Maximum pairs per forward pass. Defaults to 256.
+            cache (ClassificationCache, optional): Result cache. Defaults to None.
+        """
+        super().__init__(cache)
+        try:
+            import torch
+            from transformers import AutoModelForSequenceClassification, AutoTokenizer
+        except ImportError as e:
+            raise ImportError(
+                "The local NLI backend needs `transformers` and `torch`: "
+                "pip install transformers torch"
+            ) from e
+
+        self.torch = torch
+        self.model_id = f"local-nli:{model_name}"
+        self.hypothesis_template = hypothesis_template
+        self.batch_size = batch_size
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModelForSequenceClassification.from_pretrained(model_name)
+        self.model.eval()
+
+        label2id = {k.lower(): v for k, v in self.model.config.label2id.items()}
+        self.entailment_id = label2id.get("entailment", -1)
+
+    def _classify_uncached(self, phrases, candidate_labels):
+        hypotheses = [self.hypothesis_template.format(label) for label in candidate_labels]
+        premises = [p for p in phrases for _ in hypotheses]
+        pairs_hypotheses = hypotheses * len(phrases)
+
+        logits = []
+        with self.torch.inference_mode():
+            for i in range(0, len(premises), self.batch_size):
+                encoded = self.tokenizer(
+                    premises[i:i + self.batch_size],
+                    pairs_hypotheses[i:i + self.batch_size],
+                    padding=True,
+                    truncation="only_first",
+                    return_tensors="pt",
+                )
+                logits.append(self.model(**encoded).logits[:, self.entailment_id].numpy())
+
+        # Same as the single-label pipeline: softmax of entailment over labels
+        entailment = np.concatenate(logits).reshape(len(phrases), len(candidate_labels))
+        scores = softmax(entailment, axis=1)
+        return [
+            to_output(phrase, candidate_labels, row)
+            for phrase, row in zip(phrases, scores)
+        ]
+
+
+class LocalEmbeddingBackend(ZeroShotBackend):
+    """Lightweight fallback: cosine similarity between phrase and label embeddings.
+
+    Much faster than NLI on CPU, less accurate. Requires `sentence-transformers`.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        temperature: float = 0.05,
+        batch_size: int = 256,
+        cache=None,
+    ):
+        """
+        Args:
+            model_name (str, optional): sentence-transformers checkpoint.
+                Defaults to "sentence-transformers/all-MiniLM-L6-v2".
+            temperature (float, optional): Softmax temperature applied to the
+                cosine similarities. Defaults to 0.05.
+            batch_size (int, optional): Phrases encoded per batch. Defaults to 256.
+            cache (ClassificationCache, optional): Result cache. Defaults to None.
+        """
+        super().__init__(cache)
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError(
+                "The local embedding backend needs `sentence-transformers`: "
+                "pip install sentence-transformers"
+            ) from e
+
+        self.model_id = f"local-embedding:{model_name}"
+        self.temperature = temperature
+        self.batch_size = batch_size
+        self.model = SentenceTransformer(model_name, device="cpu")
+
+    def _classify_uncached(self, phrases, candidate_labels):
+        encode = lambda texts: self.model.encode(
+            texts, batch_size=self.batch_size, normalize_embeddings=True
+        )
+        similarity = encode(phrases) @ encode(candidate_labels).T
+        scores = softmax(similarity / self.temperature, axis=1)
+        return [
+            to_output(phrase, candidate_labels, row)
+            for phrase, row in zip(phrases, scores)
+        ]
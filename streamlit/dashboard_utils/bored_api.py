@@ -0,0 +1,238 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_API_URL = "http://www.boredapi.com/api/activity"
+
+ACTIVITY_TYPES = [
+    "educational",
+    "recreational",
+    "social",
+    "diy",
+    "charity",
+    "cooking",
+    "relaxation",
+    "music",
+    "busywork",
+]
+
+
+class BoredAPIError(RuntimeError):
+    """The Bored API could not be reached or answered with an error."""
+
+
+class CircuitBreaker:
+    """Stop calling an upstream that keeps failing.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    `allow()` is False for `reset_timeout` seconds. Then a single trial call
+    is let through: success closes the circuit, failure opens it again.
+    Usage:
+      breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+      if breaker.allow():
+          try: ...; breaker.record_success()
+          except ...: breaker.record_failure()
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30, clock=time.monotonic):
+        """
+        Args:
+            failure_threshold (int, optional): Consecutive failures that open
+                the circuit. Defaults to 3.
+            reset_timeout (float, optional): Seconds before a trial call. Defaults to 30.
+            clock (callable, optional): Current time in seconds. Defaults to time.monotonic.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self._trial or self.clock() - self.opened_at < self.reset_timeout:
+                return False
+            self._trial = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.failure_threshold:
+                self.opened_at = self.clock()
+            self._trial = False
+
+
+class BoredClient:
+    """Bored API client that never makes the app wait on a slow or dead upstream.
+
+    - Every request has a timeout and goes through a pooled session.
+    - The suggestion shown for a type is cached for `ttl` seconds, so reruns
+      don't fetch again.
+    - A background pool keeps `prefetch` fresh suggestions ready per type,
+      picking a type or asking for another suggestion is served from them.
+    - A circuit breaker stops calling a failing upstream, the last suggestion
+      of the type is then served, flagged as stale.
+    Usage:
+      client = BoredClient(timeout=3, ttl=60, prefetch=3)
+      activity, source = client.suggestion("music")
+    """
+
+    def __init__(
+        self,
+        api_url: str = DEFAULT_API_URL,
+        timeout: float = 3,
+        ttl: float = 60,
+        prefetch: int = 3,
+        max_workers: int = 4,
+        breaker: CircuitBreaker = None,
+        clock=time.monotonic,
+    ):
+        """
+        Args:
+            api_url (str, optional): Activity endpoint. Defaults to DEFAULT_API_URL.
+            timeout (float, optional): Per-request timeout in seconds. Defaults to 3.
+            ttl (float, optional): Seconds a suggestion stays fresh. Defaults to 60.
+            prefetch (int, optional): Suggestions kept ready per type, 0 to
+                disable prefetching. Defaults to 3.
+            max_workers (int, optional): Prefetch requests in flight. Defaults to 4.
+            breaker (CircuitBreaker, optional): Defaults to 3 failures / 30 s.
+            clock (callable, optional): Current time in seconds, for the TTL.
+                Defaults to time.monotonic.
+        """
+        self.api_url = api_url
+        self.timeout = timeout
+        self.ttl = ttl
+        self.prefetch = prefetch
+        self.breaker = breaker or CircuitBreaker(clock=clock)
+        self.clock = clock
+
+        # (fetched_at, activity) pairs
+        self._ready = {}
+        self._current = {}
+        self._refilling = set()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix="bored-prefetch")
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers + 1)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def fetch(self, activity_type: str) -> dict:
+        """One request to the API, through the circuit breaker.
+
+        Raises:
+            BoredAPIError: Circuit open, timeout, HTTP error or an error payload.
+        """
+        if not self.breaker.allow():
+            raise BoredAPIError("Bored API unavailable, circuit open")
+        try:
+            response = self.session.get(
+                self.api_url, params={"type": activity_type}, timeout=self.timeout
+            )
+            response.raise_for_status()
+            activity = response.json()
+        except (requests.RequestException, ValueError) as e:
+            self.breaker.record_failure()
+            raise BoredAPIError(f"Bored API request failed: {e}") from e
+        if "error" in activity:
+            # The API answered, only this type has nothing to offer
+            self.breaker.record_success()
+            raise BoredAPIError(activity["error"])
+        self.breaker.record_success()
+        return activity
+
+    def _fresh(self, entry) -> bool:
+        return entry is not None and self.clock() - entry[0] < self.ttl
+
+    def _pop_ready(self, activity_type):
+        with self._lock:
+            ready = self._ready.setdefault(activity_type, deque())
+            while ready:
+                entry = ready.popleft()
+                if self._fresh(entry):
+                    return entry
+        return None
+
+    def _refill(self, activity_type):
+        """Top up the ready queue of a type in the background."""
+        if self.prefetch <= 0 or self.breaker.is_open:
+            return
+        with self._lock:
+            if activity_type in self._refilling:
+                return
+            missing = self.prefetch - len(self._ready.setdefault(activity_type, deque()))
+            if missing <= 0:
+                return
+            self._refilling.add(activity_type)
+
+        def run():
+            try:
+                for _ in range(missing):
+                    activity = self.fetch(activity_type)
+                    with self._lock:
+                        self._ready[activity_type].append((self.clock(), activity))
+            except BoredAPIError:
+                pass
+            finally:
+                with self._lock:
+                    self._refilling.discard(activity_type)
+
+        self._pool.submit(run)
+
+    def warm(self, activity_types=ACTIVITY_TYPES):
+        """Start prefetching for every type, returns immediately."""
+        for activity_type in activity_types:
+            self._refill(activity_type)
+
+    def suggestion(self, activity_type: str, new: bool = False):
+        """Suggestion for a type.
+
+        Args:
+            activity_type (str): One of ACTIVITY_TYPES.
+            new (bool, optional): Replace the suggestion currently shown for
+                the type instead of reusing it. Defaults to False.
+        Returns:
+            tuple: (activity dict, source), source being "cached", "prefetched",
+            "fetched" or "stale". The activity is {"error": ...} when there is
+            nothing at all to show.
+        """
+        current = self._current.get(activity_type)
+        if not new and self._fresh(current):
+            return current[1], "cached"
+
+        entry, source = self._pop_ready(activity_type), "prefetched"
+        if entry is None:
+            try:
+                entry, source = (self.clock(), self.fetch(activity_type)), "fetched"
+            except BoredAPIError as e:
+                self._refill(activity_type)
+                if current is not None:
+                    return current[1], "stale"
+                return {"error": str(e)}, "stale"
+        self._current[activity_type] = entry
+        self._refill(activity_type)
+        return entry[1], source
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
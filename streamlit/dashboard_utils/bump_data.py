@@ -0,0 +1,63 @@
+import json
+from numbers import Number
+
+import numpy as np
+
+
+class BumpDataError(ValueError):
+    """The editor text is not valid Nivo Bump data."""
+
+
+def validate_bump_data(data) -> list:
+    """Check the Nivo Bump format: [{"id": ..., "data": [{"x": ..., "y": number or null}]}].
+
+    Raises:
+        BumpDataError: With the position of the first problem.
+    """
+    if not isinstance(data, list):
+        raise BumpDataError("Expected a list of series")
+    ids = set()
+    for i, serie in enumerate(data):
+        if not isinstance(serie, dict) or not isinstance(serie.get('id'), (str, Number)) \
+                or not isinstance(serie.get('data'), list):
+            raise BumpDataError(f"Series {i} needs a text or number 'id' and a 'data' list")
+        if serie['id'] in ids:
+            raise BumpDataError(f"Series {i} repeats the id {serie['id']!r}")
+        ids.add(serie['id'])
+        for j, point in enumerate(serie['data']):
+            if not isinstance(point, dict) or not isinstance(point.get('x'), (str, Number)):
+                raise BumpDataError(f"Point {j} of series {serie['id']!r} needs a number or text 'x'")
+            y = point.get('y')
+            if y is not None and (not isinstance(y, Number) or isinstance(y, bool)):
+                raise BumpDataError(f"Point {j} of series {serie['id']!r} has a non numeric 'y'")
+    return data
+
+
+def downsample_bump_data(data: list, max_points: int = 100) -> list:
+    """Keep at most `max_points` x values, evenly spaced, in every series.
+
+    A bump chart ranks series at shared x values, so the same x values are
+    kept across series (the first and last included) rather than thinning
+    each series on its own.
+    """
+    xs = list(dict.fromkeys(point['x'] for serie in data for point in serie['data']))
+    if len(xs) <= max_points:
+        return data
+    keep = {xs[i] for i in np.linspace(0, len(xs) - 1, max_points).round().astype(int)}
+    return [
+        {**serie, 'data': [point for point in serie['data'] if point['x'] in keep]}
+        for serie in data
+    ]
+
+
+def prepare_bump_data(text: str, max_points: int = 100) -> list:
+    """Parse, validate and downsample the editor text for nivo.Bump.
+
+    Raises:
+        BumpDataError: When the text is not valid JSON or not Bump data.
+    """
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise BumpDataError(f"Invalid JSON: {e}") from e
+    return downsample_bump_data(validate_bump_data(data), max_points)
@@ -0,0 +1,305 @@
+import csv
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from dashboard_utils.video_index import GroupSlices
+
+try:
+    import pyarrow  # noqa: F401
+except ImportError:  # Parts are kept in memory only, the CSV is reparsed after a restart
+    pyarrow = None
+
+COMMENT_COLUMNS = ['Comments', 'Comment_ID', 'Reply_Count', 'Like_Count', 'Date', 'VidId', 'user_ID']
+COMMENT_DTYPES = {
+    'Comments': 'string', 'Comment_ID': 'string', 'Reply_Count': 'int64', 'Like_Count': 'int64',
+    'VidId': 'string', 'user_ID': 'string',
+}
+LIKE_BINS = [0, 1, 2, 5, 10, 50, np.inf]
+LIKE_LABELS = ['0', '1', '2-4', '5-9', '10-49', '50+']
+HEAD_BYTES = 1 << 16
+MAX_PARTS = 16
+
+QUOTE = ord('"')
+NEWLINE = ord('\n')
+
+
+def record_boundary(buffer: bytes) -> int:
+    """Length of the longest prefix of `buffer` made of complete CSV records.
+
+    A newline ends a record only outside quotes, i.e. after an even number of
+    quote characters (escaped quotes come in pairs and keep the parity).
+    Neither byte can appear inside a multi-byte UTF-8 character, so the scan
+    works on raw bytes.
+    """
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    quotes = np.cumsum(data == QUOTE)
+    ends = np.flatnonzero((data == NEWLINE) & (quotes % 2 == 0))
+    return int(ends[-1]) + 1 if len(ends) else 0
+
+
+def iter_record_blocks(f, block_size: int = 1 << 20, final: bool = False):
+    """Read a binary file in blocks cut on record boundaries.
+
+    Records may span lines (quoted comments with newlines). A trailing record
+    without its final newline is left alone, an appender may still be writing
+    it, unless `final` says the file is complete.
+    Yields:
+        bytes: Complete records, at most one record longer than block_size.
+    """
+    pending = b''
+    while True:
+        block = f.read(block_size)
+        if not block:
+            if final and pending:
+                yield pending
+            return
+        pending += block
+        end = record_boundary(pending)
+        if end:
+            yield pending[:end]
+            pending = pending[end:]
+
+
+def parse_comment_records(data: bytes) -> pd.DataFrame:
+    """Typed comments frame from complete CSV records (no header)."""
+    # pandas' C parser handles quoted newlines, the blocks only need to end on a record
+    df = pd.read_csv(io.BytesIO(data), header=None, names=COMMENT_COLUMNS, dtype=COMMENT_DTYPES)
+    # Naive UTC, like the other dashboard timestamps
+    df['Date'] = pd.to_datetime(df['Date'], format='%Y-%m-%dT%H:%M:%SZ')
+    return df
+
+
+def empty_comments() -> pd.DataFrame:
+    df = pd.DataFrame({c: pd.Series(dtype=t) for c, t in COMMENT_DTYPES.items()})
+    df['Date'] = pd.Series(dtype='datetime64[ns]')
+    return df[COMMENT_COLUMNS]
+
+
+def iter_comment_batches(path: str, offset: int = 0, block_size: int = 1 << 20, final: bool = False):
+    """Stream All_Comments_Final.csv from a byte offset.
+
+    Args:
+        path (str): Source CSV.
+        offset (int, optional): Where the previous read stopped, 0 to start
+            from the header. Defaults to 0.
+        block_size (int, optional): Bytes read at a time. Defaults to 1 MiB.
+        final (bool, optional): The file is complete, its last record is
+            read even without a trailing newline. Defaults to False.
+    Yields:
+        tuple: (typed DataFrame batch, byte offset right after the batch)
+    """
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        for block in iter_record_blocks(f, block_size, final):
+            if offset == 0:
+                header, newline, block = block.partition(b'\n')
+                columns = next(csv.reader([header.decode('utf-8-sig').strip()]))
+                if columns != COMMENT_COLUMNS:
+                    raise ValueError(f"Unexpected comment columns in {path}: {columns}")
+                offset = len(header) + len(newline)
+                if not block:
+                    continue
+            offset += len(block)
+            yield parse_comment_records(block), offset
+
+
+class CommentStore:
+    """Append-only, incrementally ingested copy of All_Comments_Final.csv.
+
+    Each refresh parses only the bytes appended since the previous one and
+    drops comments whose Comment_ID is already stored. Ingested batches are
+    kept as Parquet parts with a manifest, so a restart reloads them instead
+    of reparsing the CSV. A source that shrank or whose head changed was
+    rewritten, not appended to, and is ingested again from scratch. A last
+    record without a trailing newline is ingested once the file has settled:
+    its size did not change since the previous refresh, or it was not
+    modified for `settle` seconds.
+    Usage:
+      store = CommentStore('./data/All_Comments_Final.csv')
+      store.refresh()
+      df_comments = store.frame
+    """
+
+    def __init__(self, csv_path: str, store_dir: str = None, block_size: int = 1 << 20, settle: float = 2.0):
+        """
+        Args:
+            csv_path (str): Source CSV.
+            store_dir (str, optional): Parts and manifest. Defaults to a
+                `.comments` directory next to the CSV.
+            block_size (int, optional): Bytes parsed at a time. Defaults to 1 MiB.
+            settle (float, optional): Seconds without modification after which
+                the file is taken as complete. Defaults to 2.
+        """
+        self.csv_path = csv_path
+        self.store_dir = store_dir or os.path.splitext(csv_path)[0] + '.comments'
+        self.block_size = block_size
+        self.settle = settle
+        # Size seen by the previous refresh, an unchanged size means no appender is active
+        self._last_size = None
+        self.persist = pyarrow is not None
+        self._lock = threading.Lock()
+        self._reset()
+        self._load_manifest()
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.store_dir, 'manifest.json')
+
+    def _reset(self):
+        for part in getattr(self, 'parts', []):
+            try:
+                os.remove(os.path.join(self.store_dir, part))
+            except OSError:
+                pass
+        self.offset = 0
+        self.head = None
+        self.parts = []
+        self.frame = empty_comments()
+
+    def _head_hash(self, size):
+        """Hash of the first bytes already ingested, they never change on append."""
+        with open(self.csv_path, 'rb') as f:
+            return hashlib.sha256(f.read(min(size, HEAD_BYTES))).hexdigest()
+
+    def _load_manifest(self):
+        if not self.persist or not os.path.exists(self.manifest_path):
+            return
+        try:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+            frames = [pd.read_parquet(os.path.join(self.store_dir, part)) for part in manifest['parts']]
+        except (OSError, ValueError, KeyError):
+            return  # Unreadable store, start over from the CSV
+        self.offset, self.head, self.parts = manifest['offset'], manifest['head'], manifest['parts']
+        if frames:
+            self.frame = pd.concat(frames, ignore_index=True)
+
+    def _save(self, new_rows):
+        """Write the new rows as one more part, compacting past MAX_PARTS parts."""
+        os.makedirs(self.store_dir, exist_ok=True)
+        if len(self.parts) + 1 > MAX_PARTS:
+            for part in self.parts:
+                os.remove(os.path.join(self.store_dir, part))
+            self.parts, new_rows = [], self.frame
+        if len(new_rows):
+            part = f'part-{self.offset:012d}.parquet'
+            new_rows.to_parquet(os.path.join(self.store_dir, part), index=False)
+            self.parts.append(part)
+        # Write then rename so a crash never leaves a manifest pointing past its parts
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'offset': self.offset, 'head': self.head, 'parts': self.parts}, f)
+        os.replace(tmp_path, self.manifest_path)
+
+    def refresh(self) -> int:
+        """Ingest the comments appended since the last refresh.
+
+        Returns:
+            int: Number of new comments.
+        """
+        with self._lock:
+            stat = os.stat(self.csv_path)
+            size = stat.st_size
+            settled = size == self._last_size or time.time() - stat.st_mtime >= self.settle
+            self._last_size = size
+            if size == self.offset:
+                return 0
+            if size < self.offset or (self.head is not None and self._head_hash(self.offset) != self.head):
+                self._reset()
+
+            seen = pd.Index(self.frame['Comment_ID'])
+            batches = []
+            for batch, offset in iter_comment_batches(self.csv_path, self.offset, self.block_size, settled):
+                batch = batch[~batch['Comment_ID'].isin(seen)]
+                batches.append(batch)
+                seen = seen.append(pd.Index(batch['Comment_ID']))
+                self.offset = offset
+            new_rows = pd.concat(batches, ignore_index=True) if batches else empty_comments()
+            new_rows = new_rows.drop_duplicates('Comment_ID')
+            if len(new_rows):
+                self.frame = pd.concat([self.frame, new_rows], ignore_index=True)
+            self.head = self._head_hash(self.offset)
+
+            if self.persist:
+                try:
+                    self._save(new_rows)
+                except OSError:
+                    self.persist = False  # Read-only data directory, keep the parts in memory
+            return len(new_rows)
+
+    def load(self) -> pd.DataFrame:
+        """Refresh, then return every stored comment."""
+        self.refresh()
+        return self.frame
+
+
+class CommentAnalytics:
+    """Per-video comment aggregates for the Individual Video Analysis view.
+
+    Usage:
+      comments = CommentAnalytics(df_comments, df_agg)
+      comments.summary.loc[video_id]
+      comments.top_commenters(video_id)
+    """
+
+    def __init__(self, df_comments, df_agg):
+        """
+        Args:
+            df_comments (pd.DataFrame): Comments, from CommentStore.
+            df_agg (pd.DataFrame): Aggregated metrics, for the video publish times.
+        """
+        publish = df_agg.set_index('Video')['Video publish time']
+        df = df_comments.assign(
+            days_published=(df_comments['Date'] - df_comments['VidId'].map(publish)).dt.days
+        )
+        self.by_video = GroupSlices(df, 'VidId', sort_by='Date')
+
+        grouped = df.groupby('VidId', observed=True)
+        span_days = (grouped['Date'].max() - grouped['Date'].min()).dt.total_seconds() / 86400
+        first_week = df[df['days_published'].between(0, 6)].groupby('VidId', observed=True).size()
+        self.summary = pd.DataFrame({
+            'comments': grouped.size(),
+            'commenters': grouped['user_ID'].nunique(),
+            'replies': grouped['Reply_Count'].sum(),
+            'likes': grouped['Like_Count'].sum(),
+            'median_likes': grouped['Like_Count'].median(),
+            'p90_likes': grouped['Like_Count'].quantile(0.9),
+            'max_likes': grouped['Like_Count'].max(),
+            'first_comment': grouped['Date'].min(),
+            'last_comment': grouped['Date'].max(),
+            # Comments per day over the span of the comments, and in the first week online
+            'comments_per_day': grouped.size() / span_days.clip(lower=1),
+            'first_week_per_day': first_week.reindex(grouped.size().index, fill_value=0) / 7,
+        })
+
+    def video_summary(self, video_id):
+        """Aggregates of one video, None when it has no comments."""
+        if video_id not in self.summary.index:
+            return None
+        return self.summary.loc[video_id]
+
+    def cumulative_comments(self, video_id) -> pd.DataFrame:
+        """Comment count per day since publishing, and its running total."""
+        daily = self.by_video.get(video_id).groupby('days_published').size().rename('comments')
+        return daily.to_frame().assign(cumulative=daily.cumsum()).reset_index()
+
+    def like_distribution(self, video_id) -> pd.Series:
+        """Number of comments per like-count bucket."""
+        likes = self.by_video.get(video_id)['Like_Count']
+        buckets = pd.cut(likes, LIKE_BINS, right=False, labels=LIKE_LABELS)
+        return buckets.value_counts(sort=False)
+
+    def top_commenters(self, video_id, n: int = 10) -> pd.DataFrame:
+        """Most active commenters of one video, ties broken by likes received."""
+        rows = self.by_video.get(video_id)
+        top = rows.groupby('user_ID', observed=True).agg(
+            comments=('Comment_ID', 'size'), likes=('Like_Count', 'sum')
+        )
+        return top.sort_values(['comments', 'likes'], ascending=False).head(n).reset_index()
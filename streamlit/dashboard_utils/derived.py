@@ -0,0 +1,126 @@
+from typing import NamedTuple
+
+import pandas as pd
+
+from dashboard_utils.comments import CommentAnalytics
+from dashboard_utils.video_index import VideoIndex
+
+AGG_METRICS_COLUMNS = [
+    'Video publish time',
+    'Views', 'Likes',
+    'Subscribers',
+    'Shares',
+    'Comments added',
+    'RPM(USD)',
+    'Average % viewed',
+    'Avg_duration_sec',
+    'Engagement_ratio',
+    'Views / sub gained'
+]
+AGG_DIFF_COLUMNS = [
+    'Video title',
+    'Publish_date',
+    'Views',
+    'Likes',
+    'Subscribers',
+    'Shares',
+    'Comments added',
+    'RPM(USD)',
+    'Average % viewed',
+    'Avg_duration_sec',
+    'Engagement_ratio',
+    'Views / sub gained'
+]
+
+
+class DerivedTables(NamedTuple):
+    """Everything the day4 charts need, built once per dataset version."""
+    metric_medians6mo: pd.Series
+    metric_medians12mo: pd.Series
+    df_agg_diff_final: pd.DataFrame
+    df_time_diff: pd.DataFrame
+    views_days: pd.DataFrame
+    views_cumulative: pd.DataFrame
+    videos: VideoIndex
+    comments: CommentAnalytics
+
+
+def relative_to_median(df, months=12):
+    """Numeric columns as relative difference to the median of the last `months` months."""
+    df_diff = df.copy()
+    date_cutoff = df_diff['Video publish time'].max() - pd.DateOffset(months=months)
+    median = df_diff[df_diff['Video publish time'] >= date_cutoff].median(numeric_only=True)
+    numeric = [c for c in df_diff.columns if df_diff[c].dtype in ('float64', 'int64')]
+    df_diff[numeric] = (df_diff[numeric] - median[numeric]).div(median[numeric])
+    return df_diff
+
+
+def first_30_days_percentiles(df_time_diff, date_cutoff):
+    """Mean, median, 80th and 20th percentile of daily views for days 0-30 after publishing.
+
+    Only videos published after `date_cutoff` are included.
+    """
+    recent = df_time_diff[
+        (df_time_diff['Video publish time'] >= date_cutoff)
+        & df_time_diff['days_published'].between(0, 30)
+    ]
+    grouped = recent.groupby('days_published')['Views']
+    quantiles = grouped.quantile([0.5, 0.8, 0.2]).unstack()
+    views_days = pd.DataFrame({
+        'mean_views': grouped.mean(),
+        'median_views': quantiles[0.5],
+        '80pct_views': quantiles[0.8],
+        '20pct_views': quantiles[0.2],
+    }).reset_index()
+    return views_days
+
+
+def build_derived_tables(df_agg, df_agg_sub, df_time, time_store=None, df_comments=None):
+    """Engineer the aggregate and time series tables used by the dashboard.
+
+    Args:
+        df_agg (pd.DataFrame): Aggregated metrics by video, from load_dashboard_data.
+        df_agg_sub (pd.DataFrame): Metrics by country and subscriber status.
+        df_time (pd.DataFrame): Daily performance over time. None when `time_store` is given.
+        time_store (out_of_core.DuckDBTimeSeries, optional): Out-of-core daily table.
+            The percentiles and per video lookups are then computed by the store,
+            and `df_time_diff` is None.
+        df_comments (pd.DataFrame, optional): Comments from load_dashboard_data.
+            `comments` is None without them.
+
+    Returns:
+        DerivedTables
+    """
+    df_agg_metrics = df_agg[AGG_METRICS_COLUMNS]
+    latest = df_agg_metrics['Video publish time'].max()
+    metric_medians6mo = df_agg_metrics[df_agg_metrics['Video publish time'] >= latest - pd.DateOffset(months=6)].median(numeric_only=True)
+    metric_medians12mo = df_agg_metrics[df_agg_metrics['Video publish time'] >= latest - pd.DateOffset(months=12)].median(numeric_only=True)
+
+    df_agg_diff = relative_to_median(df_agg)
+    df_agg_diff['Publish_date'] = df_agg_diff['Video publish time'].dt.date
+    df_agg_diff_final = df_agg_diff.loc[:, AGG_DIFF_COLUMNS]
+
+    date_cutoff = latest - pd.DateOffset(months=12)
+    if time_store is not None:
+        df_time_diff = None
+        views_days = time_store.first_30_days_percentiles(date_cutoff)
+    else:
+        #merge daily data with publish data to get delta
+        df_time_diff = pd.merge(df_time, df_agg.loc[:, ['Video', 'Video publish time']], left_on='External Video ID', right_on='Video')
+        df_time_diff['days_published'] = (df_time_diff['Date'] - df_time_diff['Video publish time']).dt.days
+
+        #get daily view data (first30) for the last 12 months, median & percentiles
+        views_days = first_30_days_percentiles(df_time_diff, date_cutoff)
+    views_cumulative = views_days.loc[:, ['days_published', 'median_views', '80pct_views', '20pct_views']]
+    views_cumulative.loc[:, ['median_views', '80pct_views', '20pct_views']] = views_cumulative.loc[:, ['median_views', '80pct_views', '20pct_views']].cumsum()
+
+    return DerivedTables(
+        metric_medians6mo,
+        metric_medians12mo,
+        df_agg_diff_final,
+        df_time_diff,
+        views_days,
+        views_cumulative,
+        VideoIndex(df_agg, df_agg_sub, df_time_diff, time_store),
+        CommentAnalytics(df_comments, df_agg) if df_comments is not None else None,
+    )
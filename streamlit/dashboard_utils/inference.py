@@ -0,0 +1,277 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from dashboard_utils.backends import (
+    LocalEmbeddingBackend,
+    LocalNLIBackend,
+    ZeroShotBackend,
+)
+
+DEFAULT_API_URL = (
+    "https://api-inference.huggingface.co/models/valhalla/distilbart-mnli-12-3"
+)
+
+# Worth retrying: model still loading, rate limited, or a transient server error
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class InferenceError(ValueError):
+    """A request to the Inference API failed and won't succeed on retry."""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class TokenBucket:
+    """Thread-safe token bucket limiting how many requests start per second.
+
+    Usage:
+      bucket = TokenBucket(rate=5, capacity=10)
+      bucket.acquire()  # blocks until a token is available
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        """
+        Args:
+            rate (float): Tokens added per second.
+            capacity (float, optional): Maximum burst size. Defaults to `rate`.
+        """
+        assert rate > 0, "rate must be positive"
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class InferenceClient(ZeroShotBackend):
+    """Zero-shot classification client for the Hugging Face Inference API.
+
+    A single pooled `requests.Session` is shared by every call, phrases are
+    sent in multi-input batches and several batches are in flight at once.
+    Requests have a timeout, are retried with jittered exponential backoff on
+    429/5xx and are paced by an optional token bucket. A row that still fails
+    comes back as `{"sequence": ..., "error": ...}` instead of failing its batch.
+    Usage:
+      client = InferenceClient(api_key, batch_size=8, max_workers=4)
+      rows = client.classify(linesList, ["Positive", "Negative"])
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        api_url: str = DEFAULT_API_URL,
+        batch_size: int = 8,
+        max_workers: int = 4,
+        cache=None,
+        timeout: float = 30,
+        max_retries: int = 4,
+        backoff_base: float = 0.5,
+        backoff_max: float = 20,
+        rate_limit: float = None,
+        warmup_timeout: float = 120,
+    ):
+        """
+        Args:
+            api_key (str): Hugging Face API token.
+            api_url (str, optional): Model endpoint. Defaults to DEFAULT_API_URL.
+            batch_size (int, optional): Phrases sent per request. Use 1 for
+                endpoints that don't accept a list of inputs. Defaults to 8.
+            max_workers (int, optional): Maximum number of requests in flight
+                at the same time. Defaults to 4.
+            cache (ClassificationCache, optional): Result cache, only cache
+                misses are sent to the API. Defaults to None.
+            timeout (float, optional): Per-request timeout in seconds. Defaults to 30.
+            max_retries (int, optional): Retries after the first attempt. Defaults to 4.
+            backoff_base (float, optional): First backoff ceiling in seconds,
+                doubled on every retry. Defaults to 0.5.
+            backoff_max (float, optional): Largest backoff in seconds. Defaults to 20.
+            rate_limit (float, optional): Maximum requests started per second,
+                None for no limit. Defaults to None.
+            warmup_timeout (float, optional): Timeout of the one-time warmup
+                probe, which waits for the model to load. Defaults to 120.
+        """
+        assert batch_size >= 1, "batch_size must be at least 1"
+        assert max_workers >= 1, "max_workers must be at least 1"
+
+        super().__init__(cache)
+        self.api_url = api_url
+        self.model_id = api_url
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.warmup_timeout = warmup_timeout
+        self.rate_limiter = TokenBucket(rate_limit) if rate_limit else None
+
+        self._warm = False
+        self._warmup_lock = threading.Lock()
+
+        self.session = requests.Session()
+        self.session.headers.update({"Authorization": f"Bearer {api_key}"})
+        # Keep one connection per worker alive between calls
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _backoff(self, attempt, response=None):
+        # Full jitter, but never shorter than what the server asked for
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after is not None:
+                try:
+                    delay = max(delay, float(retry_after))
+                except ValueError:
+                    pass
+            try:
+                # Model loading responses carry an estimated_time in seconds
+                delay = max(delay, min(float(response.json()["estimated_time"]), self.backoff_max))
+            except (ValueError, KeyError, TypeError):
+                pass
+        time.sleep(delay)
+
+    def query(self, payload, timeout=None, max_retries=None):
+        """POST a raw payload and return the decoded JSON body.
+
+        Retries timeouts, connection errors, 429 and 5xx responses, up to
+        `max_retries` times (defaults to the client's).
+        Raises InferenceError when the request can't succeed, e.g. an invalid
+        API key or a body that isn't JSON.
+        """
+        timeout = timeout or self.timeout
+        max_retries = self.max_retries if max_retries is None else max_retries
+        for attempt in range(max_retries + 1):
+            last_attempt = attempt == max_retries
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            try:
+                response = self.session.post(self.api_url, json=payload, timeout=timeout)
+            except (requests.Timeout, requests.ConnectionError) as e:
+                if last_attempt:
+                    raise InferenceError(f"Request failed: {e}") from e
+                self._backoff(attempt)
+                continue
+
+            if response.status_code in RETRY_STATUSES and not last_attempt:
+                self._backoff(attempt, response)
+                continue
+            try:
+                body = response.json()
+            except ValueError as e:
+                raise InferenceError(
+                    f"HTTP {response.status_code}: response is not JSON",
+                    response.status_code,
+                ) from e
+            if response.status_code != 200:
+                message = body.get("error") if isinstance(body, dict) else body
+                raise InferenceError(f"HTTP {response.status_code}: {message}", response.status_code)
+            return body
+
+    def warmup(self, candidate_labels=("yes", "no")):
+        """Send a single probe that waits for the model to load, only once per client."""
+        with self._warmup_lock:
+            if self._warm:
+                return
+            try:
+                self.query(
+                    {
+                        "inputs": "warmup",
+                        "parameters": {"candidate_labels": list(candidate_labels)},
+                        "options": {"wait_for_model": True},
+                    },
+                    timeout=self.warmup_timeout,
+                )
+            except InferenceError as e:
+                if e.status_code in (401, 403):
+                    raise
+                # Rows still retry on their own, try warming up again next run
+                return
+            self._warm = True
+
+    def _classify_batch(self, batch, candidate_labels, max_retries=None):
+        payload = {
+            "inputs": batch if len(batch) > 1 else batch[0],
+            "parameters": {"candidate_labels": candidate_labels},
+        }
+        try:
+            output = self.query(payload, max_retries=max_retries)
+        except InferenceError as e:
+            if e.status_code in (401, 403):
+                # Bad credentials fail every row, surface it to the caller
+                raise
+            if len(batch) == 1:
+                return [{"sequence": batch[0], "error": str(e)}]
+            output = None
+            # The batch already used up its retries, each row gets one retry
+            # so a transient error doesn't fail it, while a bad batch costs
+            # about two attempts per row rather than a full retry budget each
+            max_retries = min(1, self.max_retries if max_retries is None else max_retries)
+        if len(batch) == 1:
+            return [output]
+        if isinstance(output, list) and len(output) == len(batch):
+            return output
+        # The endpoint didn't accept a list of inputs or the batch failed,
+        # send the rows one by one so only the bad ones are reported
+        return [self._classify_batch([row], candidate_labels, max_retries)[0] for row in batch]
+
+    def _classify_uncached(self, phrases, candidate_labels):
+        self.warmup(candidate_labels)
+        batches = [
+            phrases[i:i + self.batch_size]
+            for i in range(0, len(phrases), self.batch_size)
+        ]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # map() yields results in submission order
+            results = executor.map(
+                lambda batch: self._classify_batch(batch, candidate_labels),
+                batches,
+            )
+            return [output for batch_output in results for output in batch_output]
+
+    def close(self):
+        self.session.close()
+
+
+BACKENDS = {
+    "http": InferenceClient,
+    "local": LocalNLIBackend,
+    "local-embedding": LocalEmbeddingBackend,
+}
+
+
+def make_backend(name: str = "http", **kwargs) -> ZeroShotBackend:
+    """Build a zero-shot backend by name.
+
+    Args:
+        name (str, optional): One of "http", "local" (in-process NLI) or
+            "local-embedding". Defaults to "http".
+        **kwargs: Passed to the backend constructor.
+    """
+    if name not in BACKENDS:
+        raise ValueError(
+            f"Unknown zero-shot backend {name!r}, expected one of {sorted(BACKENDS)}"
+        )
+    return BACKENDS[name](**kwargs)
@@ -0,0 +1,181 @@
+import glob
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+from dashboard_utils.comments import CommentStore
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Snapshots are skipped, CSVs are parsed on every load
+    pa = None
+
+SNAPSHOT_KEY = b"source_fingerprint"
+
+AGG_COLUMNS = [
+    'Video', 'Video title', 'Video publish time', 'Comments added', 'Shares', 'Dislikes', 'Likes',
+    'Subscribers lost', 'Subscribers gained', 'RPM(USD)', 'CPM(USD)', 'Average % viewed', 'Average view duration',
+    'Views', 'Watch time (hours)', 'Subscribers', 'Your estimated revenue (USD)', 'Impressions', 'Impressions ctr(%)'
+]
+AGG_DTYPES = {
+    'Video': 'string', 'Video title': 'string', 'Video publish time': 'string',
+    'Comments added': 'int64', 'Shares': 'int64', 'Dislikes': 'int64', 'Likes': 'int64',
+    'Subscribers lost': 'int64', 'Subscribers gained': 'int64', 'RPM(USD)': 'float64',
+    'CPM(USD)': 'float64', 'Average % viewed': 'float64', 'Average view duration': 'string',
+    'Views': 'int64', 'Watch time (hours)': 'float64', 'Subscribers': 'int64',
+    'Your estimated revenue (USD)': 'float64', 'Impressions': 'int64', 'Impressions ctr(%)': 'float64',
+}
+AGG_SUB_DTYPES = {
+    'Video Title': 'string', 'External Video ID': 'string', 'Country Code': 'string',
+    'Is Subscribed': 'bool', 'Views': 'float64',
+}
+TIME_DTYPES = {
+    'Date': 'string', 'Video Title': 'string', 'External Video ID': 'string', 'Views': 'float64',
+}
+
+
+def file_fingerprint(path: str, previous: dict = None) -> dict:
+    """Describe a source file by mtime, size and content hash.
+
+    The hash is only recomputed when mtime or size moved, so an unchanged
+    file costs a single `stat`.
+    """
+    stat = os.stat(path)
+    fingerprint = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+    if previous and all(previous.get(k) == v for k, v in fingerprint.items()):
+        fingerprint['sha256'] = previous.get('sha256')
+        return fingerprint
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    fingerprint['sha256'] = digest.hexdigest()
+    return fingerprint
+
+
+def data_version(data_dir: str = './data', sources=()) -> str:
+    """Cheap identifier of the CSVs currently in data_dir (names, mtimes and sizes).
+
+    `sources` adds files read from outside data_dir, paths or globs such as
+    DASHBOARD_TIME_SOURCE, by path, mtime and size.
+    Use it as a cache key: it changes whenever a source file is replaced.
+    """
+    parts = []
+    for name in sorted(os.listdir(data_dir)):
+        if name.endswith('.csv'):
+            stat = os.stat(os.path.join(data_dir, name))
+            parts.append(f'{name}:{stat.st_mtime_ns}:{stat.st_size}')
+    for source in sources:
+        for path in sorted(glob.glob(source)):
+            stat = os.stat(path)
+            parts.append(f'{os.path.abspath(path)}:{stat.st_mtime_ns}:{stat.st_size}')
+    return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()[:12]
+
+
+def snapshot_path(csv_path: str) -> str:
+    return os.path.splitext(csv_path)[0] + '.parquet'
+
+
+def _read_snapshot_fingerprint(path):
+    try:
+        metadata = pq.read_schema(path).metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return None
+    if SNAPSHOT_KEY not in metadata:
+        return None
+    return json.loads(metadata[SNAPSHOT_KEY])
+
+
+def _write_snapshot(df, path, fingerprint):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[SNAPSHOT_KEY] = json.dumps(fingerprint).encode('utf-8')
+    # Write then rename so readers never see a half written snapshot
+    tmp_path = path + '.tmp'
+    pq.write_table(table.replace_schema_metadata(metadata), tmp_path)
+    os.replace(tmp_path, path)
+
+
+def load_with_snapshot(csv_path: str, parse) -> pd.DataFrame:
+    """Load a CSV through a Parquet snapshot stored next to it.
+
+    The snapshot is used while the CSV's content is unchanged (same
+    mtime/size, or same hash after a touch). Otherwise the CSV is parsed with
+    `parse(csv_path)` and the snapshot rewritten.
+    Args:
+        csv_path (str): Source CSV.
+        parse (callable): Parses the CSV into a typed DataFrame.
+    """
+    if pa is None:
+        return parse(csv_path)
+
+    path = snapshot_path(csv_path)
+    previous = _read_snapshot_fingerprint(path) if os.path.exists(path) else None
+    fingerprint = file_fingerprint(csv_path, previous)
+    if previous is not None and previous.get('sha256') == fingerprint['sha256']:
+        df = pq.read_table(path).to_pandas()
+        if previous != fingerprint:
+            # Touched but unchanged, store the new mtime to skip hashing next time
+            _write_snapshot(df, path, fingerprint)
+        return df
+
+    df = parse(csv_path)
+    try:
+        _write_snapshot(df, path, fingerprint)
+    except OSError:
+        pass  # Read-only data directory, keep serving from the CSV
+    return df
+
+
+def parse_agg_metrics(path: str) -> pd.DataFrame:
+    """Aggregated_Metrics_By_Video.csv with clean column names and typed columns."""
+    df = pd.read_csv(path, header=0, names=AGG_COLUMNS, dtype=AGG_DTYPES)
+    df['Video publish time'] = pd.to_datetime(df['Video publish time'], format='%b %d, %Y')
+    df['Average view duration'] = pd.to_timedelta(df['Average view duration'])
+    return df
+
+
+def parse_agg_sub(path: str) -> pd.DataFrame:
+    """Aggregated_Metrics_By_Country_And_Subscriber_Status.csv"""
+    return pd.read_csv(path, dtype=AGG_SUB_DTYPES)
+
+
+def parse_time(path: str) -> pd.DataFrame:
+    """Video_Performance_Over_Time.csv, dates parsed once with an explicit format."""
+    df = pd.read_csv(path, dtype=TIME_DTYPES)
+    df['Date'] = pd.to_datetime(df['Date'], format='%d %b %Y')
+    return df
+
+
+def load_dashboard_data(data_dir: str = './data', load_time: bool = True):
+    """Load the YouTube dashboard tables, reusing snapshots when possible.
+
+    Args:
+        data_dir (str, optional): Directory with the channel CSVs. Defaults to './data'.
+        load_time (bool, optional): Load the daily table. Pass False when it is
+            queried out of core instead, df_time is then None. Defaults to True.
+    Returns:
+        tuple: (df_agg, df_agg_sub, df_comments, df_time)
+    """
+    df_agg = load_with_snapshot(
+        os.path.join(data_dir, 'Aggregated_Metrics_By_Video.csv'), parse_agg_metrics
+    )
+    df_agg_sub = load_with_snapshot(
+        os.path.join(data_dir, 'Aggregated_Metrics_By_Country_And_Subscriber_Status.csv'), parse_agg_sub
+    )
+    df_time = None
+    if load_time:
+        df_time = load_with_snapshot(
+            os.path.join(data_dir, 'Video_Performance_Over_Time.csv'), parse_time
+        )
+
+    df_agg['Avg_duration_sec'] = df_agg['Average view duration'].dt.total_seconds()
+    df_agg['Engagement_ratio'] = (df_agg['Comments added'] + df_agg['Shares'] + df_agg['Dislikes'] + df_agg['Likes']) / df_agg.Views
+    df_agg['Views / sub gained'] = df_agg['Views'] / df_agg['Subscribers gained']
+    df_agg.sort_values('Video publish time', ascending=False, inplace=True)
+    # Only the comments appended since the last load are parsed
+    df_comments = CommentStore(os.path.join(data_dir, 'All_Comments_Final.csv')).load()
+    return df_agg, df_agg_sub, df_comments, df_time
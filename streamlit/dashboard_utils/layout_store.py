@@ -0,0 +1,135 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class LayoutStore:
+    """Per-user dashboard layouts and datasets, stored in SQLite.
+
+    Layouts are the react-grid-layout item lists sent by dashboard.Grid's
+    onLayoutChange, datasets are the editor contents. Both survive reloads.
+    Usage:
+      store = LayoutStore(".cache/day27.sqlite3")
+      layout = store.get_layout(user, "demo") or default_layout
+      store.save_layout(user, "demo", updated_layout)
+    """
+
+    def __init__(self, path: str = ".cache/day27.sqlite3"):
+        """
+        Args:
+            path (str, optional): SQLite file. Defaults to ".cache/day27.sqlite3".
+        """
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # The store is shared across Streamlit sessions (threads)
+        self._lock = threading.Lock()
+        self._last_cleanup = 0.0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS layouts (
+                user TEXT NOT NULL,
+                dashboard TEXT NOT NULL,
+                layout TEXT NOT NULL,
+                updated REAL NOT NULL,
+                PRIMARY KEY (user, dashboard)
+            )"""
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS datasets (
+                user TEXT NOT NULL,
+                name TEXT NOT NULL,
+                content TEXT NOT NULL,
+                updated REAL NOT NULL,
+                PRIMARY KEY (user, name)
+            )"""
+        )
+        self._conn.commit()
+
+    def _get(self, query, params):
+        with self._lock:
+            row = self._conn.execute(query, params).fetchone()
+        return None if row is None else row[0]
+
+    def _put(self, query, params):
+        with self._lock:
+            self._conn.execute(query, params)
+            self._conn.commit()
+
+    def get_layout(self, user: str, dashboard: str):
+        """Saved layout items (list of dicts), None when the user has none."""
+        layout = self._get(
+            "SELECT layout FROM layouts WHERE user = ? AND dashboard = ?", (user, dashboard)
+        )
+        return None if layout is None else json.loads(layout)
+
+    def save_layout(self, user: str, dashboard: str, layout):
+        self._put(
+            "INSERT OR REPLACE INTO layouts (user, dashboard, layout, updated) VALUES (?, ?, ?, ?)",
+            (user, dashboard, json.dumps(layout), time.time()),
+        )
+
+    def get_dataset(self, user: str, name: str):
+        """Saved dataset text, None when the user has none."""
+        return self._get("SELECT content FROM datasets WHERE user = ? AND name = ?", (user, name))
+
+    def save_dataset(self, user: str, name: str, content: str):
+        self._put(
+            "INSERT OR REPLACE INTO datasets (user, name, content, updated) VALUES (?, ?, ?, ?)",
+            (user, name, content, time.time()),
+        )
+
+    def delete_stale(self, user_prefix: str, max_age: float, min_interval: float = 0) -> bool:
+        """Drop the layouts and datasets of users starting with `user_prefix`
+        that were not saved for `max_age` seconds, e.g. anonymous browsers.
+
+        Skipped when the previous cleanup ran less than `min_interval` seconds
+        ago, so it can be called on every session start. Returns whether it ran.
+        """
+        now = time.time()
+        cutoff = now - max_age
+        with self._lock:
+            if now - self._last_cleanup < min_interval:
+                return False
+            self._last_cleanup = now
+            for table in ("layouts", "datasets"):
+                self._conn.execute(
+                    f"DELETE FROM {table} WHERE substr(user, 1, ?) = ? AND updated < ?",
+                    (len(user_prefix), user_prefix, cutoff),
+                )
+            self._conn.commit()
+        return True
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class SharedTextFile:
+    """One in-memory copy of a text file for every session, reloaded when it changes.
+
+    Each read costs a single `stat`, whatever the number of sessions.
+    Usage:
+      default_data = SharedTextFile("data.json")
+      text = default_data.read()
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._stat = None
+        self._text = None
+
+    def read(self) -> str:
+        stat = os.stat(self.path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature != self._stat:
+            with self._lock:
+                if signature != self._stat:
+                    with open(self.path, encoding="utf-8") as f:
+                        self._text = f.read()
+                    self._stat = signature
+        return self._text
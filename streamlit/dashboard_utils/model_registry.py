@@ -0,0 +1,87 @@
+import hashlib
+import json
+import os
+import re
+
+
+def params_fingerprint(params: dict) -> str:
+    """Stable hash of XGBoost parameters, numpy scalars included."""
+    text = json.dumps(params, sort_keys=True, default=float)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+
+class ModelRegistry:
+    """Trained XGBoost boosters on disk, keyed on (data, params, num_boost_round).
+
+    Boosters are stored with `save_model` as `<data key>-<params hash>/<rounds>.ubj`.
+    Asking for more rounds than a stored booster of the same data and params
+    continues training from it instead of starting over. Boosters that
+    stopped early are never continued, they did not reach their round count.
+    Usage:
+      registry = ModelRegistry('.cache/models')
+      model = registry.get_or_train(data_key, params, 200, lambda: (d_train, [(d_test, 'test')]))
+    """
+
+    def __init__(self, registry_dir: str = '.cache/models'):
+        """
+        Args:
+            registry_dir (str, optional): Where boosters are stored. Defaults to '.cache/models'.
+        """
+        self.registry_dir = registry_dir
+
+    def model_dir(self, data_key, params):
+        return os.path.join(self.registry_dir, f'{data_key}-{params_fingerprint(params)}')
+
+    def stored_rounds(self, data_key, params) -> list:
+        """Round counts stored for this data and params, ascending."""
+        try:
+            names = os.listdir(self.model_dir(data_key, params))
+        except FileNotFoundError:
+            return []
+        return sorted(int(m.group(1)) for m in map(re.compile(r'(\d+)\.ubj$').match, names) if m)
+
+    def _load(self, path):
+        import xgboost
+
+        booster = xgboost.Booster()
+        booster.load_model(path)
+        return booster
+
+    def get_or_train(self, data_key, params, num_boost_round, build_data, **train_kwargs):
+        """Stored booster for the key, trained (or continued) and stored on a miss.
+
+        Args:
+            data_key (str): Cheap fingerprint of the training data, see
+                shap_cache.frame_fingerprint.
+            params (dict): XGBoost parameters.
+            num_boost_round (int): Boosting rounds.
+            build_data (callable): Returns (dtrain, evals). Only called on a
+                miss, so a hit skips building the DMatrix.
+            **train_kwargs: Passed to xgboost.train, e.g. early_stopping_rounds.
+        """
+        import xgboost
+
+        model_dir = self.model_dir(data_key, params)
+        path = os.path.join(model_dir, f'{num_boost_round}.ubj')
+        if os.path.exists(path):
+            return self._load(path)
+
+        start_from = None
+        for rounds in reversed(self.stored_rounds(data_key, params)):
+            if rounds >= num_boost_round:
+                continue
+            candidate = self._load(os.path.join(model_dir, f'{rounds}.ubj'))
+            if candidate.num_boosted_rounds() == rounds:
+                start_from = candidate
+                break
+
+        dtrain, evals = build_data()
+        remaining = num_boost_round - (start_from.num_boosted_rounds() if start_from else 0)
+        booster = xgboost.train(params, dtrain, remaining, evals=evals, xgb_model=start_from, **train_kwargs)
+
+        os.makedirs(model_dir, exist_ok=True)
+        # Write then rename so a concurrent reader never loads a partial file
+        tmp_path = f'{path}.{os.getpid()}.tmp.ubj'
+        booster.save_model(tmp_path)
+        os.replace(tmp_path, path)
+        return booster
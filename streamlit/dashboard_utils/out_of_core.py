@@ -0,0 +1,137 @@
+import os
+import tempfile
+import weakref
+
+import pandas as pd
+
+
+class DuckDBTimeSeries:
+    """Out-of-core access to Video_Performance_Over_Time with DuckDB.
+
+    The daily table is never loaded into pandas. The publish date cutoff, the
+    days_published window, the video id filter and the percentile aggregation
+    all run inside DuckDB, which streams the source files and spills to disk
+    past `memory_limit`. Only the small frames the charts need come back.
+    The source is scanned once, joined with the publish times and written to
+    a Parquet file sorted by video id, so a video lookup only reads the row
+    groups holding that video instead of rescanning the source.
+    Requires `duckdb`.
+    Usage:
+      store = DuckDBTimeSeries('./data/channels/*.parquet', df_agg, memory_limit='2GB')
+      views_days = store.first_30_days_percentiles(cutoff)
+      daily = store.get(video_id)
+    """
+
+    def __init__(self, source: str, df_agg: pd.DataFrame, memory_limit: str = '2GB',
+                 threads: int = None, temp_directory: str = None, row_group_size: int = 8192):
+        """
+        Args:
+            source (str): CSV or Parquet file, or a glob over several of them
+                (e.g. one file per channel). Columns as in Video_Performance_Over_Time.csv.
+            df_agg (pd.DataFrame): Aggregated metrics, for the video publish times.
+            memory_limit (str, optional): DuckDB memory ceiling. Defaults to '2GB'.
+            threads (int, optional): Worker threads, None for DuckDB's default.
+            temp_directory (str, optional): Where to spill past the ceiling
+                and to write the sorted copy. Defaults to a directory under
+                the system temp dir.
+            row_group_size (int, optional): Rows per row group of the sorted
+                copy, the unit a video lookup reads. Defaults to 8192.
+        """
+        try:
+            import duckdb
+        except ImportError as e:
+            raise ImportError(
+                "The out-of-core backend needs `duckdb`: pip install duckdb"
+            ) from e
+
+        self.source = source
+        self.con = duckdb.connect()
+        self.con.execute(f"SET memory_limit = '{memory_limit}'")
+        temp_directory = temp_directory or os.path.join(tempfile.gettempdir(), 'dashboard_duckdb')
+        os.makedirs(temp_directory, exist_ok=True)
+        self.con.execute(f"SET temp_directory = '{temp_directory}'")
+        if threads:
+            self.con.execute(f'SET threads = {int(threads)}')
+
+        publish = pd.DataFrame({
+            'Video': df_agg['Video'].astype(object),
+            'Video publish time': df_agg['Video publish time'],
+        })
+        self.con.register('publish_df', publish)
+        self.con.execute('CREATE TABLE publish AS SELECT * FROM publish_df')
+        self.con.unregister('publish_df')
+        self.con.execute(f'CREATE VIEW daily AS {self._scan_sql()}')
+        # Join once here so every query below gets days_published for free, and
+        # sort by video so the Parquet row group stats let lookups skip the rest
+        fd, self.sorted_path = tempfile.mkstemp(suffix='.parquet', prefix='daily_', dir=temp_directory)
+        os.close(fd)
+        # Removed on close(), or when a refresh drops the last reference to the store
+        self._remove_sorted = weakref.finalize(self, _remove_file, self.sorted_path)
+        sorted_path = self.sorted_path.replace("'", "''")
+        self.con.execute(f"""
+            COPY (
+                SELECT d.*, p."Video publish time",
+                       date_diff('day', p."Video publish time", d."Date") AS days_published
+                FROM daily d
+                JOIN publish p ON d."External Video ID" = p."Video"
+                ORDER BY d."External Video ID", days_published
+            ) TO '{sorted_path}' (FORMAT parquet, ROW_GROUP_SIZE {int(row_group_size)})
+        """)
+        self.con.execute(f"CREATE VIEW daily_published AS SELECT * FROM read_parquet('{sorted_path}')")
+
+    def _scan_sql(self):
+        source = self.source.replace("'", "''")
+        if self.source.endswith('.csv'):
+            return f"""
+                SELECT strptime("Date", '%d %b %Y') AS "Date",
+                       "Video Title", "External Video ID", "Views"
+                FROM read_csv('{source}', header = true, union_by_name = true,
+                              types = {{'Date': 'VARCHAR', 'Video Title': 'VARCHAR',
+                                        'External Video ID': 'VARCHAR', 'Views': 'DOUBLE'}})
+            """
+        return f"""
+            SELECT CAST("Date" AS TIMESTAMP) AS "Date", "Video Title", "External Video ID",
+                   CAST("Views" AS DOUBLE) AS "Views"
+            FROM read_parquet('{source}', union_by_name = true)
+        """
+
+    def first_30_days_percentiles(self, date_cutoff) -> pd.DataFrame:
+        """Same frame as derived.first_30_days_percentiles, computed in DuckDB.
+
+        Args:
+            date_cutoff (pd.Timestamp): Only videos published on or after it count.
+        """
+        # One cursor per query, the store is shared by every session thread
+        return self.con.cursor().execute(
+            """
+            SELECT days_published,
+                   avg("Views") AS mean_views,
+                   quantile_cont("Views", 0.5) AS median_views,
+                   quantile_cont("Views", 0.8) AS "80pct_views",
+                   quantile_cont("Views", 0.2) AS "20pct_views"
+            FROM daily_published
+            WHERE "Video publish time" >= ?
+              AND days_published BETWEEN 0 AND 30
+            GROUP BY days_published
+            ORDER BY days_published
+            """,
+            [pd.Timestamp(date_cutoff).to_pydatetime()],
+        ).df()
+
+    def get(self, video_id) -> pd.DataFrame:
+        """Daily rows of one video sorted by days_published, like GroupSlices.get."""
+        return self.con.cursor().execute(
+            'SELECT * FROM daily_published WHERE "External Video ID" = ? ORDER BY days_published',
+            [video_id],
+        ).df()
+
+    def close(self):
+        self.con.close()
+        self._remove_sorted()
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+
+def explode_scores(outputs, candidate_labels):
+    """Turn zero-shot outputs into a typed, sortable DataFrame in one vectorized pass.
+
+    Args:
+        outputs (list): Outputs as returned by the backends, one dict per
+            keyphrase with `sequence`, `labels` and `scores`. Rows without
+            scores (e.g. API errors) get NaN scores.
+        candidate_labels (list): Labels the phrases were classified against.
+
+    Returns:
+        pd.DataFrame: `keyphrase`, one float column per label, `top label`,
+        `margin` (top score minus runner-up score) and `error` (None unless
+        the row failed).
+    """
+    n_labels = len(candidate_labels)
+    valid = np.array(
+        [len(o.get("scores", ())) == n_labels for o in outputs], dtype=bool
+    )
+    labels = np.array(
+        [o["labels"] for o, ok in zip(outputs, valid) if ok], dtype=object
+    ).reshape(-1, n_labels)
+    scores = np.array(
+        [o["scores"] for o, ok in zip(outputs, valid) if ok], dtype="float64"
+    ).reshape(-1, n_labels)
+
+    # Outputs are sorted by score, put every score back in its label's column
+    codes = pd.Categorical(labels.ravel(), categories=candidate_labels).codes
+    codes = codes.reshape(-1, n_labels).astype(np.intp)
+    # Drop rows mentioning a label we didn't ask for
+    known = (codes >= 0).all(axis=1)
+    valid[valid] = known
+    by_label = np.full((len(outputs), n_labels), np.nan)
+    valid_rows = np.empty((known.sum(), n_labels))
+    np.put_along_axis(valid_rows, codes[known], scores[known], axis=1)
+    by_label[valid] = valid_rows
+
+    df = pd.DataFrame(by_label, columns=list(candidate_labels))
+    df.insert(0, "keyphrase", [o.get("sequence") for o in outputs])
+
+    top = np.full(len(outputs), -1)
+    margin = np.full(len(outputs), np.nan)
+    if valid.any():
+        top[valid] = np.argmax(by_label[valid], axis=1)
+        if n_labels > 1:
+            best_two = -np.partition(-by_label[valid], 1, axis=1)[:, :2]
+            margin[valid] = best_two[:, 0] - best_two[:, 1]
+    df["top label"] = pd.Categorical.from_codes(top, categories=candidate_labels)
+    df["margin"] = margin
+    df["error"] = [o.get("error") for o in outputs]
+    return df
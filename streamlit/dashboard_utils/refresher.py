@@ -0,0 +1,119 @@
+import logging
+import threading
+import time
+from typing import Any, NamedTuple
+
+from dashboard_utils.ingest import data_version
+
+logger = logging.getLogger(__name__)
+
+
+class DataSnapshot(NamedTuple):
+    """One built version of the dashboard data, replaced as a whole."""
+    version: str
+    value: Any
+    refreshed_at: float
+
+
+class BackgroundRefresher:
+    """Rebuild derived data in a background thread when the source files change.
+
+    A daemon thread polls data_version(data_dir, sources), a stat of each
+    source file, every `interval` seconds. When a new version has been stable for two polls
+    (so half-copied files are skipped) it calls `build()` and swaps the
+    result in with a single attribute assignment. Readers keep serving the
+    previous snapshot until then and never wait on a rebuild. A failing
+    build is logged and the previous snapshot stays in place until the files
+    change again. A replaced snapshot is passed to `close` on the next poll,
+    once the reruns that started on it are done.
+    Usage:
+      refresher = BackgroundRefresher('./data', build_dashboard).start()
+      snapshot = refresher.current
+    """
+
+    def __init__(self, data_dir: str, build, interval: float = 10.0, sources=(), close=None):
+        """
+        Args:
+            data_dir (str): Directory to watch.
+            build (callable): Builds the value to serve, takes no argument.
+            interval (float, optional): Seconds between polls. Defaults to 10.
+            sources (tuple, optional): Files or globs read from outside
+                data_dir, watched too. Defaults to none.
+            close (callable, optional): Releases a replaced value, e.g. its
+                database connections. Defaults to None.
+        """
+        self.data_dir = data_dir
+        self.build = build
+        self.interval = interval
+        self.sources = tuple(sources)
+        self.close = close
+        self.current = None
+        self._retired = []
+        self.last_error = None
+        self._pending = None
+        self._failed = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Build the first snapshot synchronously, then start polling."""
+        if self.current is None:
+            self.refresh()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='data-refresher', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def refresh(self, version: str = None) -> DataSnapshot:
+        """Build and swap in a new snapshot now."""
+        with self._lock:
+            version = version or data_version(self.data_dir, self.sources)
+            value = self.build()
+            previous = self.current
+            self.current = DataSnapshot(version, value, time.time())
+            if previous is not None and self.close is not None:
+                self._retired.append(previous)
+            self.last_error = None
+            return self.current
+
+    def _close_retired(self):
+        with self._lock:
+            retired, self._retired = self._retired, []
+        for snapshot in retired:
+            try:
+                self.close(snapshot.value)
+            except Exception:
+                logger.exception("Closing data version %s failed", snapshot.version)
+
+    def check(self) -> bool:
+        """Poll once, rebuild when the data changed. Returns True after a swap."""
+        # Replaced at least one interval ago, no rerun is still reading them
+        self._close_retired()
+        version = data_version(self.data_dir, self.sources)
+        if version in (self.current.version, self._failed):
+            self._pending = None
+            return False
+        if version != self._pending:
+            # First sighting, wait one more poll in case files are still being copied
+            self._pending = version
+            return False
+        try:
+            self.refresh(version)
+        except Exception as e:
+            logger.exception("Rebuilding the dashboard data failed, serving version %s", self.current.version)
+            self.last_error = e
+            self._failed = version
+            return False
+        self._pending = None
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except OSError as e:  # data_dir briefly missing while being replaced
+                self.last_error = e
@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+def normalize_phrase(phrase: str) -> str:
+    """Lowercase and collapse whitespace so near-identical phrases share a key."""
+    return " ".join(phrase.split()).lower()
+
+
+def make_key(phrase: str, candidate_labels, model: str) -> str:
+    """Cache key for (normalized phrase, sorted label set, model URL)."""
+    raw = json.dumps(
+        [normalize_phrase(phrase), sorted(set(candidate_labels)), model],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ClassificationCache:
+    """Disk-backed cache of zero-shot outputs, stored in SQLite.
+
+    Entries older than `max_age` seconds are dropped, and once the table grows
+    past `max_entries` the least recently used rows are evicted.
+    Usage:
+      cache = ClassificationCache(".cache/zero_shot.sqlite3")
+      found = cache.get_many(phrases, labels, model)
+      cache.put_many(missed_phrases, outputs, labels, model)
+    """
+
+    def __init__(
+        self,
+        path: str = ".cache/zero_shot.sqlite3",
+        max_entries: int = 100_000,
+        max_age: float = 30 * 24 * 3600,
+    ):
+        """
+        Args:
+            path (str, optional): SQLite file. Defaults to ".cache/zero_shot.sqlite3".
+            max_entries (int, optional): Rows kept before LRU eviction. Defaults to 100_000.
+            max_age (float, optional): Entry lifetime in seconds. Defaults to 30 days.
+        """
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+
+        # The client is shared across Streamlit sessions (threads)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                output TEXT NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)"
+        )
+        self._conn.commit()
+
+    def get_many(self, phrases, candidate_labels, model):
+        """Look up every phrase.
+
+        Returns:
+            dict: Position in `phrases` -> cached output, for the hits only.
+        """
+        keys = [make_key(p, candidate_labels, model) for p in phrases]
+        now = time.time()
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                chunk = list(set(keys[i:i + 500]))
+                rows = self._conn.execute(
+                    f"SELECT key, output FROM results WHERE created >= ? "
+                    f"AND key IN ({','.join('?' * len(chunk))})",
+                    [now - self.max_age, *chunk],
+                ).fetchall()
+                found.update(rows)
+            hit_keys = list(set(keys) & found.keys())
+            self._conn.executemany(
+                "UPDATE results SET accessed = ? WHERE key = ?",
+                [(now, k) for k in hit_keys],
+            )
+            self._conn.commit()
+            n_hits = sum(key in found for key in keys)
+            self.hits += n_hits
+            self.misses += len(keys) - n_hits
+
+        hits = {}
+        for i, (phrase, key) in enumerate(zip(phrases, keys)):
+            if key in found:
+                output = json.loads(found[key])
+                # The cached row may come from a differently cased phrase
+                output["sequence"] = phrase
+                hits[i] = output
+        return hits
+
+    def put_many(self, phrases, outputs, candidate_labels, model):
+        """Store outputs for phrases, skipping API errors, then evict."""
+        now = time.time()
+        rows = [
+            (make_key(p, candidate_labels, model), json.dumps(o), now, now)
+            for p, o in zip(phrases, outputs)
+            if isinstance(o, dict) and "error" not in o
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)", rows
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        self._conn.execute(
+            "DELETE FROM results WHERE created < ?", (now - self.max_age,)
+        )
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM results WHERE key IN "
+                "(SELECT key FROM results ORDER BY accessed LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def stats(self):
+        """Hit/miss counters since this cache was opened."""
+        with self._lock:
+            (size,) = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / total if total else 0.0,
+            "entries": size,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM results")
+            self._conn.commit()
+            self.hits = self.misses = 0
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,249 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+
+def frame_fingerprint(df: pd.DataFrame, sample_rows: int = 1000) -> str:
+    """Cheap identifier of a DataFrame: shape, columns, dtypes and a strided row sample.
+
+    Hashing every row costs as much as reading the table. Editing a row
+    outside the sample is not detected, so use a new name or source file for a
+    new dataset version.
+    """
+    digest = hashlib.sha256()
+    digest.update(repr((df.shape, list(df.columns), [str(t) for t in df.dtypes])).encode('utf-8'))
+    positions = np.linspace(0, len(df) - 1, min(len(df), sample_rows), dtype=np.int64)
+    digest.update(pd.util.hash_pandas_object(df.iloc[positions], index=True).to_numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+
+def model_fingerprint(booster) -> str:
+    """Content hash of a trained XGBoost booster."""
+    return hashlib.sha256(bytes(booster.save_raw())).hexdigest()[:16]
+
+
+class ShapResult(NamedTuple):
+    """SHAP values of some rows of X, memory-mapped from the cache."""
+    values: np.ndarray
+    expected_value: float
+    rows: np.ndarray
+    mode: str
+
+    def explanation(self, X, display_data=None):
+        """shap.Explanation for the cached rows, for the shap.plots functions."""
+        import shap
+
+        return shap.Explanation(
+            values=np.asarray(self.values),  # plain view of the memmap, shap slices it
+            base_values=np.full(len(self.rows), self.expected_value),
+            data=X.iloc[self.rows].to_numpy(),
+            display_data=None if display_data is None else display_data.iloc[self.rows].to_numpy(),
+            feature_names=list(X.columns),
+        )
+
+
+class ShapCache:
+    """SHAP values computed once per (model, data) and kept on disk.
+
+    Values are stored as float32 `.npy` files and reopened memory-mapped, so a
+    restart or a second session reads them back without recomputing and
+    without holding a private copy in memory. Three modes: every row
+    (get_full), a stratified sample for the global plots (get_sample) and a
+    few rows on demand (explain_rows).
+    Usage:
+      cache = ShapCache('.cache/shap')
+      result = cache.get_sample(booster, X, y, size=2000)
+      shap.plots.beeswarm(result.explanation(X))
+    """
+
+    def __init__(self, cache_dir: str = '.cache/shap'):
+        """
+        Args:
+            cache_dir (str, optional): Where values are stored. Defaults to '.cache/shap'.
+        """
+        self.cache_dir = cache_dir
+
+    def key(self, booster, X, mode='full') -> str:
+        return f'{model_fingerprint(booster)}-{frame_fingerprint(X)}-{mode}'
+
+    def load(self, key):
+        """Cached result for `key`, None when missing."""
+        path = os.path.join(self.cache_dir, key)
+        try:
+            with open(os.path.join(path, 'meta.json')) as f:
+                meta = json.load(f)
+            values = np.load(os.path.join(path, 'values.npy'), mmap_mode='r')
+            rows = np.load(os.path.join(path, 'rows.npy'))
+        except (OSError, ValueError):
+            return None
+        return ShapResult(values, meta['expected_value'], rows, meta['mode'])
+
+    def save(self, key, values, expected_value, rows, mode):
+        """Store a result. The directory appears complete or not at all."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = tempfile.mkdtemp(dir=self.cache_dir, prefix='.tmp-')
+        np.save(os.path.join(tmp_path, 'values.npy'), np.asarray(values, dtype=np.float32))
+        np.save(os.path.join(tmp_path, 'rows.npy'), np.asarray(rows, dtype=np.int64))
+        with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+            json.dump({'expected_value': _scalar(expected_value), 'mode': mode}, f)
+        path = os.path.join(self.cache_dir, key)
+        try:
+            os.rename(tmp_path, path)
+        except OSError:  # Another process stored the same key first
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        return self.load(key)
+
+    def get_full(self, booster, X, chunk_size: int = 20_000, workers: int = None) -> ShapResult:
+        """Exact SHAP values of every row of X, computed on the first call only.
+
+        Tables larger than one chunk are explained chunk by chunk across a
+        process pool. Each finished chunk is written straight into a `.npy`
+        memmap and recorded, so an interrupted run resumes where it stopped
+        and the values never have to fit in memory twice.
+        Args:
+            booster (xgboost.Booster): Trained model.
+            X (pd.DataFrame): Rows to explain.
+            chunk_size (int, optional): Rows per task. Defaults to 20_000.
+            workers (int, optional): Processes, None for one per CPU. Defaults to None.
+        """
+        key = self.key(booster, X)
+        result = self.load(key)
+        if result is not None:
+            return result
+        if len(X) <= chunk_size:
+            explainer = _explainer_for(booster)
+            values = explainer.shap_values(X)
+            return self.save(key, values, explainer.expected_value, np.arange(len(X)), 'full')
+
+        partial = os.path.join(self.cache_dir, f'.partial-{key}')
+        os.makedirs(partial, exist_ok=True)
+        values_path, done_path = os.path.join(partial, 'values.npy'), os.path.join(partial, 'done.json')
+        if os.path.exists(done_path):
+            with open(done_path) as f:
+                done = set(json.load(f))
+            values = np.load(values_path, mmap_mode='r+')
+        else:
+            done = set()
+            values = np.lib.format.open_memmap(values_path, mode='w+', dtype=np.float32, shape=X.shape)
+
+        starts = [start for start in range(0, len(X), chunk_size) if start not in done]
+        for start, chunk_values in self._explain_chunks(booster, X, starts, chunk_size, workers):
+            values[start:start + len(chunk_values)] = chunk_values
+            values.flush()
+            done.add(start)
+            with open(done_path, 'w') as f:
+                json.dump(sorted(done), f)
+        expected_value = _explainer_for(booster).expected_value
+        np.save(os.path.join(partial, 'rows.npy'), np.arange(len(X), dtype=np.int64))
+        with open(os.path.join(partial, 'meta.json'), 'w') as f:
+            json.dump({'expected_value': _scalar(expected_value), 'mode': 'full'}, f)
+        os.remove(done_path)
+        del values
+        try:
+            os.rename(partial, os.path.join(self.cache_dir, key))
+        except OSError:  # Another process published the same key first, keep its entry
+            result = self.load(key)
+            if result is None:
+                raise
+            shutil.rmtree(partial, ignore_errors=True)
+            return result
+        return self.load(key)
+
+    @staticmethod
+    def _explain_chunks(booster, X, starts, chunk_size, workers):
+        """Yield (start, values) per chunk as they finish."""
+        workers = min(workers or os.cpu_count() or 1, len(starts))
+        if workers <= 1:
+            # A pool only adds start-up cost on a single core, keep the chunked writes
+            explainer = _explainer_for(booster)
+            for start in starts:
+                yield start, explainer.shap_values(X.iloc[start:start + chunk_size]).astype(np.float32)
+            return
+        # spawn, not fork: forking a process that already ran XGBoost's OpenMP pool can hang
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker,
+                                 initargs=(bytes(booster.save_raw()),)) as pool:
+            futures = {pool.submit(_explain_chunk, X.iloc[start:start + chunk_size]): start for start in starts}
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+
+    def get_sample(self, booster, X, y, size: int = 2000, seed: int = 0) -> ShapResult:
+        """Exact SHAP values of a stratified sample of X, for the global plots.
+
+        The sample keeps the class balance of `y`, and is the same for the
+        same (size, seed).
+        """
+        key = self.key(booster, X, f'sample{size}-{seed}')
+        result = self.load(key)
+        if result is None:
+            rows = stratified_sample(y, size, seed)
+            explainer = _explainer_for(booster)
+            values = explainer.shap_values(X.iloc[rows])
+            result = self.save(key, values, explainer.expected_value, rows, 'sample')
+        return result
+
+    def explain_rows(self, booster, X, rows) -> ShapResult:
+        """SHAP values of a few rows, computed on demand and not stored.
+
+        Served from the full result instead when it is already cached.
+        """
+        rows = np.atleast_1d(np.asarray(rows, dtype=np.int64))
+        full = self.load(self.key(booster, X))
+        if full is not None:
+            return ShapResult(full.values[rows], full.expected_value, rows, 'full')
+        explainer = _explainer_for(booster)
+        values = explainer.shap_values(X.iloc[rows])
+        return ShapResult(values, _scalar(explainer.expected_value), rows, 'instance')
+
+
+def stratified_sample(y, size: int, seed: int = 0) -> np.ndarray:
+    """Sorted row positions of a sample of about `size` rows with the class balance of `y`."""
+    y = np.asarray(y)
+    if size >= len(y):
+        return np.arange(len(y))
+    rng = np.random.default_rng(seed)
+    _, inverse, counts = np.unique(y, return_inverse=True, return_counts=True)
+    rows = []
+    for label, count in enumerate(counts):
+        positions = np.flatnonzero(inverse == label)
+        take = min(count, max(1, round(size * count / len(y))))
+        rows.append(rng.choice(positions, take, replace=False))
+    return np.sort(np.concatenate(rows))
+
+
+def _scalar(expected_value):
+    """TreeExplainer reports a float or a one element array depending on the call."""
+    return float(np.ravel(expected_value)[0])
+
+
+def _explainer_for(booster):
+    import shap
+
+    return shap.TreeExplainer(booster)
+
+
+_worker_explainer = None
+
+
+def _init_worker(model_raw):
+    """Load the booster once per pool process."""
+    import xgboost
+
+    global _worker_explainer
+    booster = xgboost.Booster()
+    booster.load_model(bytearray(model_raw))
+    # One thread per process, the pool provides the parallelism
+    booster.set_param({'nthread': 1})
+    _worker_explainer = _explainer_for(booster)
+
+
+def _explain_chunk(chunk):
+    return _worker_explainer.shap_values(chunk).astype(np.float32)
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+
+def sign_styles(df, negative='color:red;', positive='color:green;') -> pd.DataFrame:
+    """CSS for every cell of `df`, computed with one NumPy pass over the numeric columns.
+
+    Negative values get `negative`, positive values `positive`, everything
+    else (zero, NaN, text, dates) no style. Same result as applying
+    style_negative and style_positive cell by cell.
+    """
+    styles = pd.DataFrame('', index=df.index, columns=df.columns)
+    numeric = df.select_dtypes('number').columns
+    values = df[numeric].to_numpy(dtype='float64')
+    styles[numeric] = np.select([values < 0, values > 0], [negative, positive], '')
+    return styles
+
+
+def percent_formats(df) -> dict:
+    """'{:.1%}' for every numeric column of `df`, as a Styler.format argument."""
+    return {column: '{:.1%}'.format for column in df.select_dtypes('number').columns}
+
+
+def style_rows(df, styles, formats, start=0, stop=None):
+    """Styler for rows start:stop of `df`, reusing precomputed `styles`.
+
+    Only the selected rows are styled and sent to the browser, so the render
+    cost follows the page size rather than the table size.
+    Args:
+        df (pd.DataFrame): Table to show.
+        styles (pd.DataFrame): Output of sign_styles(df).
+        formats (dict): Column -> formatter, see percent_formats.
+        start (int, optional): First row. Defaults to 0.
+        stop (int, optional): Row after the last one, None for the end. Defaults to None.
+    """
+    page_styles = styles.iloc[start:stop]
+    return (
+        df.iloc[start:stop].style.hide()
+        .apply(lambda _: page_styles, axis=None)
+        .format(formats)
+    )
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+
+
+class GroupSlices:
+    """Rows of a DataFrame grouped by a key and stored contiguously.
+
+    Looking a key up returns a slice of the sorted frame, so the cost is the
+    number of rows for that key instead of a scan of the whole table.
+    Usage:
+      by_video = GroupSlices(df_time, 'External Video ID', sort_by='Date')
+      rows = by_video.get('4OZip0cgOho')
+    """
+
+    def __init__(self, df, key, sort_by=None):
+        """
+        Args:
+            df (pd.DataFrame): Table to index.
+            key (str): Column to group on.
+            sort_by (str, optional): Secondary sort inside each group. Defaults to None.
+        """
+        order = [key] if sort_by is None else [key, sort_by]
+        self.frame = df.sort_values(order, kind='stable').reset_index(drop=True)
+        codes, uniques = pd.factorize(self.frame[key])
+        starts = np.flatnonzero(np.diff(codes, prepend=-2))
+        stops = np.append(starts[1:], len(codes))
+        self.slices = {
+            uniques[code]: (start, stop)
+            for code, start, stop in zip(codes[starts], starts, stops)
+            if code >= 0
+        }
+
+    def get(self, value) -> pd.DataFrame:
+        """Rows for `value`, an empty frame when the key is unknown.
+
+        The result is a slice of a shared frame, copy it before modifying it.
+        """
+        start, stop = self.slices.get(value, (0, 0))
+        return self.frame.iloc[start:stop]
+
+
+class VideoIndex:
+    """Video title -> video id -> rows, for the Individual Video Analysis view."""
+
+    def __init__(self, df_agg, df_agg_sub, df_time_diff=None, time_store=None):
+        """
+        Args:
+            df_agg (pd.DataFrame): Aggregated metrics by video.
+            df_agg_sub (pd.DataFrame): Metrics by country and subscriber status.
+            df_time_diff (pd.DataFrame, optional): Daily views with `days_published`.
+            time_store (optional): Anything with `get(video_id)` returning the daily
+                rows, e.g. an out_of_core.DuckDBTimeSeries. Used instead of df_time_diff.
+        """
+        # When two videos share a title the first (most recent) one wins
+        self.title_to_id = dict(zip(df_agg['Video title'][::-1], df_agg['Video'][::-1]))
+        self.agg = GroupSlices(df_agg, 'Video')
+        self.agg_sub = GroupSlices(df_agg_sub, 'External Video ID')
+        if time_store is None:
+            time_store = GroupSlices(df_time_diff, 'External Video ID', sort_by='days_published')
+        self.time = time_store
+
+    def lookup(self, title):
+        """Rows of every table for one video title.
+
+        Returns:
+            tuple: (agg rows, agg_sub rows, daily rows sorted by days_published)
+        """
+        video_id = self.title_to_id.get(title)
+        return self.agg.get(video_id), self.agg_sub.get(video_id), self.time.get(video_id)
@@ -1,24 +1,25 @@
+import os
+
 import streamlit as st
-import requests
+
+from dashboard_utils.bored_api import ACTIVITY_TYPES, DEFAULT_API_URL, BoredClient
+
+API_URL = os.environ.get('BORED_API_URL', DEFAULT_API_URL)
+
+@st.cache_resource
+def get_client():
+  # One client (cache, prefetch pool, circuit breaker) shared by every session
+  client = BoredClient(API_URL, timeout=3, ttl=60, prefetch=3)
+  client.warm()
+  return client
 
 st.title('🏀 Bored API app')
 
 st.sidebar.header('Input')
-selected_type = st.sidebar.selectbox('Select an activity', [
-  "educational",
-  "recreational",
-  "social",
-  "diy",
-  "charity",
-  "cooking",
-  "relaxation",
-  "music",
-  "busywork"
-])
-
-suggested_activity_url = f"http://www.boredapi.com/api/activity?type={selected_type}"
-json_data = requests.get(suggested_activity_url)
-suggested_activity = json_data.json()
+selected_type = st.sidebar.selectbox('Select an activity', ACTIVITY_TYPES)
+new_suggestion = st.sidebar.button('New suggestion')
+
+suggested_activity, source = get_client().suggestion(selected_type, new=new_suggestion)
 
 c1, c2 = st.columns(2)
 with c1:
@@ -30,6 +31,8 @@ with c1:
 if 'error' not in suggested_activity:
   st.header('Suggested activity')
   st.info(suggested_activity['activity'])
+  if source == 'stale':
+    st.caption('The Bored API is not responding, showing the last suggestion for this type.')
 
   col1, col2, col3 = st.columns(3)
   with col1:
@@ -37,4 +40,6 @@ if 'error' not in suggested_activity:
   with col2:
     st.metric(label='Type of Activity', value=suggested_activity['type'].capitalize(), delta='')
   with col3:
-    st.metric(label='Price', value=suggested_activity['price'], delta='')
\ No newline at end of file
+    st.metric(label='Price', value=suggested_activity['price'], delta='')
+else:
+  st.warning(f"No suggestion available: {suggested_activity['error']}")
@@ -1,9 +1,16 @@
 import streamlit as st
-import json
-from pathlib import Path
+import hashlib
+import re
+import uuid
 
 from streamlit_elements import elements, dashboard, mui, editor, media, lazy, sync, nivo
 
+from dashboard_utils.bump_data import BumpDataError, prepare_bump_data
+from dashboard_utils.layout_store import LayoutStore, SharedTextFile
+
+# The browser only gets this many x values per series, larger series are downsampled
+MAX_CHART_POINTS = 100
+
 st.set_page_config(layout='wide')
 
 with st.sidebar:
@@ -14,6 +21,45 @@ with st.sidebar:
 
   media_url = st.text_input("Media URL", value="https://www.youtube.com/watch?v=vIQQR_yq-8I")
 
+# Layouts and editor data are kept per user in SQLite, data.json is read once for
+# all sessions and reread only when the file changes.
+# Without a login, the user is a random token kept in a cookie of the browser
+BROWSER_COOKIE = "day27_browser_id"
+BROWSER_COOKIE_MAX_AGE = 365 * 24 * 3600
+# Browsers that did not come back for that long lose their saved layout
+ANONYMOUS_MAX_AGE = 90 * 24 * 3600
+
+@st.cache_resource
+def get_store():
+  return LayoutStore(".cache/day27.sqlite3")
+
+@st.cache_resource
+def get_default_data():
+  return SharedTextFile("data.json")
+
+def current_user():
+  """ Logged in e-mail when authentication is configured, else the browser's random token """
+  if st.user.get("is_logged_in"):
+    return st.user.get("email")
+  # Never a name from the URL: only an unguessable token gives access to saved data
+  if 'anonymous_id' not in st.session_state:
+    token = st.context.cookies.get(BROWSER_COOKIE)
+    if not isinstance(token, str) or not re.fullmatch(r"[0-9a-f]{32}", token):
+      token = uuid.uuid4().hex
+      # A same-origin frame sets the app's cookie, the next visit from this browser reads it back
+      st.sidebar.iframe(
+        f"<script>document.cookie = '{BROWSER_COOKIE}={token}; max-age={BROWSER_COOKIE_MAX_AGE}; path=/; SameSite=Strict';</script>",
+        height=1,
+      )
+    st.session_state.anonymous_id = f"anonymous-{token}"
+  return st.session_state.anonymous_id
+
+store = get_store()
+if 'anonymous_id' not in st.session_state:
+  # Once per session start, and at most hourly: drop the rows of browsers that never came back
+  store.delete_stale("anonymous-", max_age=ANONYMOUS_MAX_AGE, min_interval=3600)
+user = current_user()
+
 # Initialize default data for code editor and chart.
 #
 # For this tutorial, we will need data for a Nivo Bump Chart.
@@ -23,7 +69,31 @@ with st.sidebar:
 # code editor change, and it will be read by Nivo Bump chart to draw the data.
 
 if 'data' not in st.session_state:
-  st.session_state.data = Path("data.json").read_text()
+  st.session_state.data = store.get_dataset(user, "bump") or get_default_data().read()
+
+# Parsing is cached on the hash of the editor text and shared across sessions.
+# Invalid JSON raises, so it is never cached and the last good parse is kept.
+@st.cache_data(max_entries=32)
+def parse_chart_data(text_hash, _text):
+  return prepare_bump_data(_text, MAX_CHART_POINTS)
+
+def chart_data():
+  """ Chart data for the current editor text, the last valid version if the text is invalid """
+  text = st.session_state.data
+  # Dragging cards or editing the media URL reruns with the very same string, skip even the hash
+  if st.session_state.get('chart_text') is not text:
+    st.session_state.chart_text = text
+    try:
+      st.session_state.chart_data = parse_chart_data(hashlib.sha1(text.encode('utf-8')).hexdigest(), text)
+      st.session_state.chart_error = None
+      if 'chart_saved' in st.session_state and st.session_state.chart_saved != text:
+        store.save_dataset(user, "bump", text)
+      st.session_state.chart_saved = text
+    except BumpDataError as e:
+      st.session_state.chart_error = str(e)
+  return st.session_state.get('chart_data', []), st.session_state.chart_error
+
+bump_data, bump_error = chart_data()
 
 # Define a default dashboard layout.
 # Dashboard grif has 12 columns by default.
@@ -31,7 +101,7 @@ if 'data' not in st.session_state:
 # For more information on available parameters:
 # https://github.com/react-grid-layout/react-grid-layout#grid-item-props
 
-layout = [
+default_layout = [
   #Editor item is positioned in corrdinates x=0, y=0 and takes 6/12 columns and has a height of 3
   dashboard.Item("editor", 0, 0, 6, 3),
   #Chart item is positioned in coordinates x=6, y=0 and takes 6/12 columns and has a height of 3
@@ -40,10 +110,24 @@ layout = [
   dashboard.Item("media", 0, 2, 12, 4)
 ]
 
+# The user's saved layout replaces the default one, and every drag or resize is saved
+def save_layout(updated_layout):
+  store.save_layout(user, "demo", updated_layout)
+
+with st.sidebar:
+  if st.user.get("is_logged_in"):
+    st.caption(f"Layout and data saved for `{user}`.")
+  else:
+    st.caption("Layout and data are saved for this browser, log in to keep them across devices.")
+  if st.button("Reset layout"):
+    store.save_layout(user, "demo", default_layout)
+
+layout = store.get_layout(user, "demo") or default_layout
+
 # Create a frame to displkay elements
 with elements('demo'):
   # Create a dashboard with the layout specified above
-  with dashboard.Grid(layout, draggableHandle=".draggable"):
+  with dashboard.Grid(layout, draggableHandle=".draggable", onLayoutChange=save_layout):
     # First card, the code editor
     with mui.Card(key="editor", sx={"display": "flex", "flexDirection": "column"}):
       mui.CardHeader(title="Editor", className="draggable")
@@ -104,12 +188,14 @@ with elements('demo'):
         # Nivo's example is available in the 'code' tab there: https://nivo.rocks/bump/
         #
         # Data takes a dictionary as parameter, so we need to convert our JSON data from a string to
-        # a Python dictionary first, with `json.loads()`.
+        # a Python dictionary first. chart_data() above parses, validates and downsamples it once per edit.
         #
         # For more information regarding other available Nivo charts:
         # https://nivo.rocks/
+        if bump_error:
+          mui.Alert(f"Showing the last valid data. {bump_error}", severity="warning")
         nivo.Bump(
-          data=json.loads(st.session_state.data),
+          data=bump_data,
           colors={'scheme': 'spectral'},
           lineWidth=3,
           activeLineWidth=6,
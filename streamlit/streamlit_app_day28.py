@@ -6,28 +6,55 @@ import xgboost
 import numpy as np
 import pandas as pd
 
+from dashboard_utils.model_registry import ModelRegistry
+from dashboard_utils.shap_cache import ShapCache, frame_fingerprint, model_fingerprint
+
 st.set_page_config(layout="wide")
 
 @st.cache_data
 def load_data():
   return shap.datasets.adult()
 
-@st.cache_data
-def load_model(X, y):
-  X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=7)
-  d_train = xgboost.DMatrix(X_train, label=y_train)
-  d_test = xgboost.DMatrix(X_test, label=y_test)
+# Boosters are stored under .cache/models per (data fingerprint, params, rounds).
+# Raising the round count continues the stored booster instead of retraining.
+# The fingerprint is the cache key, Streamlit does not hash X and y.
+@st.cache_resource(max_entries=4)
+def load_model(_X, _y, data_key, num_boost_round=10):
+  train_idx, test_idx = train_test_split(np.arange(len(_y)), test_size=0.2, random_state=7)
   params = {
     'eta': 0.01,
     'objective': 'binary:logistic',
     'subsample': 0.5,
-    'base_score': np.mean(y_train),
+    'base_score': np.mean(_y[train_idx]),
     'eval_metric': 'logloss',
     'n_jobs': -1,
   }
 
-  model = xgboost.train(params, d_train, 10, evals=[(d_test, 'test')], verbose_eval=100, early_stopping_rounds=20)
-  return model
+  def build_data():
+    d_train = xgboost.DMatrix(_X.iloc[train_idx], label=_y[train_idx])
+    d_test = xgboost.DMatrix(_X.iloc[test_idx], label=_y[test_idx])
+    return d_train, [(d_test, 'test')]
+
+  return ModelRegistry('.cache/models').get_or_train(
+    data_key, params, num_boost_round, build_data, verbose_eval=100, early_stopping_rounds=20
+  )
+
+# One TreeExplainer pass per (model, data, mode), stored under .cache/shap and
+# memory-mapped back. The fingerprints are the cache key, the model and data
+# themselves are not hashed by Streamlit. The full mode runs in chunks across a
+# process pool and resumes from the finished chunks if interrupted.
+@st.cache_resource(max_entries=4, show_spinner='Computing SHAP values...')
+def load_shap_values(_model, _X, _y, model_key, data_key, mode, sample_size):
+  cache = ShapCache('.cache/shap')
+  if mode == 'Full':
+    return cache.get_full(_model, _X)
+  return cache.get_sample(_model, _X, _y, size=sample_size)
+
+# Laying out the 1000 instance force plot is slower than reading the values back
+@st.cache_resource(max_entries=4)
+def load_force_plot(_shap_result, _X_display, model_key, data_key, mode, sample_size, n):
+  rows = _shap_result.rows[:n]
+  return shap.force_plot(_shap_result.expected_value, _shap_result.values[:n, :], _X_display.iloc[rows, :])
 
 st.title('`streamlit-shap` for displaying SHAP plots in a Streamlit app')
 
@@ -51,22 +78,47 @@ with st.expander('y'):
 st.header('SHAP output')
 
 # train XGBoost model
-model = load_model(X, y)
+st.sidebar.header('Model')
+num_boost_round = st.sidebar.number_input('Boosting rounds', min_value=1, max_value=5000, value=10, step=10)
+data_key = frame_fingerprint(X) + frame_fingerprint(pd.DataFrame({'y': y}))
+model = load_model(X, y, data_key, num_boost_round)
+
+st.sidebar.header('SHAP settings')
+shap_mode = st.sidebar.radio(
+  'Rows explained for the global plots', ('Stratified sample', 'Full'),
+  help='The sample keeps the income class balance. Full explains every row, in parallel chunks.',
+)
+sample_size = st.sidebar.number_input('Sample size', min_value=100, max_value=len(X), value=min(2000, len(X)), step=500,
+                                      disabled=shap_mode == 'Full')
+# Only part of the cache key in sample mode, moving the slider must not recompute the full values
+if shap_mode == 'Full':
+  sample_size = None
+instance = st.sidebar.number_input('Data instance', min_value=0, max_value=len(X) - 1, value=0)
 
-# compute SHAP values
-explainer = shap.Explainer(model, X)
-shap_values = explainer(X)
+# compute SHAP values, shared by the global plots
+model_key = model_fingerprint(model)
+shap_result = load_shap_values(model, X, y, model_key, data_key, shap_mode, sample_size)
+shap_values = shap_result.explanation(X)
+if shap_result.mode == 'sample':
+  mode_label = f'Computed on a stratified sample of {len(shap_result.rows):,} of {len(X):,} rows.'
+else:
+  mode_label = f'Computed on all {len(X):,} rows.'
+
+# the selected instance is explained on demand, a single row is instant
+instance_result = ShapCache('.cache/shap').explain_rows(model, X, [instance])
+instance_label = f'Data instance {instance}, ' + ('read from the full result.' if instance_result.mode == 'full' else 'computed on demand.')
 
 with st.expander('Waterfall plot'):
-  st_shap(shap.plots.waterfall(shap_values[0]), height=300)
+  st.caption(instance_label)
+  st_shap(shap.plots.waterfall(instance_result.explanation(X)[0]), height=300)
 with st.expander('Beeswarm plot'):
+  st.caption(mode_label)
   st_shap(shap.plots.beeswarm(shap_values), height=300)
 
-explainer = shap.TreeExplainer(model)
-shap_values = explainer.shap_values(X)
-
 with st.expander('Force plot'):
-  st.subheader('First data instance')
-  st_shap(shap.force_plot(explainer.expected_value, shap_values[0, :], X_display.iloc[0, :]), height=200, width=1000)
+  st.subheader('Selected data instance')
+  st.caption(instance_label)
+  st_shap(shap.force_plot(instance_result.expected_value, instance_result.values[0, :], X_display.iloc[instance, :]), height=200, width=1000)
   st.subheader('First thousand data instance')
-  st_shap(shap.force_plot(explainer.expected_value, shap_values[:1000, :], X_display.iloc[:1000, :]), height=400, width=1000)
\ No newline at end of file
+  st.caption(mode_label)
+  st_shap(load_force_plot(shap_result, X_display, model_key, data_key, shap_mode, sample_size, 1000), height=400, width=1000)
\ No newline at end of file
@@ -1,6 +1,9 @@
+import io
+import os
+import time
+
 import streamlit as st
 import pandas as pd
-import requests
 
 #Import for navbar
 from streamlit_option_menu import option_menu
@@ -18,6 +21,11 @@ from st_aggrid import GridUpdateMode, DataReturnMode
 from dashboard_utils.gui import keyboard_to_url
 from dashboard_utils.gui import load_keyboard_class
 
+#Import for the zero-shot backends (remote API or in-process)
+from dashboard_utils.inference import InferenceError, make_backend
+from dashboard_utils.result_cache import ClassificationCache
+from dashboard_utils.postprocess import explode_scores
+
 if 'widen' not in st.session_state:
   layout = 'centered'
 else:
@@ -33,7 +41,7 @@ if not 'valid_inputs_received' in st.session_state:
 col1, col2 = st.columns([0.4, 2])
 
 with col1:
-  st.image('.\logo.png', width=110)
+  st.image('logo.png', width=110)
 
 with col2:
   st.caption('')
@@ -100,19 +108,31 @@ st.sidebar.markdown(
   "You can quickly deploy Streamlit apps using [Streamlit Cloud](https://streamlit.io/cloud) in just a few clicks."
 )
 
-def send_query(api_key, payload):
-  def query(payload):
-      response = requests.post(API_URL, headers=headers, json=payload)
-      # For displaying the status code from API response
-      # st.write(response.status_code)
-      return response.json()
-  API_KEY = api_key
-  API_URL = (
-    "https://api-inference.huggingface.co/models/valhalla/distilbart-mnli-12-3"
-  )
+@st.cache_resource
+def get_cache():
+  # One on-disk result cache shared by every session
+  return ClassificationCache('.cache/zero_shot.sqlite3')
+
+# "http" (Hugging Face Inference API), "local" (in-process NLI model on CPU)
+# or "local-embedding" (lightweight embedding similarity)
+BACKEND = os.environ.get('ZERO_SHOT_BACKEND', 'http')
+
+@st.cache_resource
+def get_client(api_key, batch_size, max_workers, rate_limit):
+  # Cached so the pooled HTTP session / loaded model survives reruns
+  if BACKEND == 'http':
+    return make_backend(
+      'http', api_key=api_key, batch_size=batch_size, max_workers=max_workers,
+      rate_limit=rate_limit or None, cache=get_cache()
+    )
+  return make_backend(BACKEND, cache=get_cache())
 
-  headers = {"Authorization": f"Bearer {API_KEY}"}
-  return query(payload)
+# Scores stay floats in the DataFrame (sortable, pivotable), the grid shows them as percentages
+percent_formatter = JsCode("""
+function(params) {
+  return params.value == null ? '' : (params.value * 100).toFixed(2) + '%';
+}
+""")
 
 def is_form_input_valid(submitted, multiselectComponent, linesList, key):
   if not submitted and not st.session_state.valid_inputs_received:
@@ -199,14 +219,33 @@ def main():
   st.caption('')
 
 with st.form(key="my_form"):
-  if selected != "Demo (5 phrases max)":
+  if BACKEND != 'http':
+    # Local backends run offline, no API key needed
+    API_KEY = BACKEND
+  elif selected != "Demo (5 phrases max)":
     API_KEY = st.text_input(
           "Enter your 🤗 HuggingFace API key",
           help="Once you created you HuggiginFace account, you can get your free API token in your settings page: https://huggingface.co/settings/tokens",
       )
   else:
     API_KEY = st.secrets['HUGGINGFACE_API_KEY']
-  multiselectComponent, linesList = text_form(5)
+  multiselectComponent, linesList = text_form(5 if selected == "Demo (5 phrases max)" else 1000)
+  if selected != "Demo (5 phrases max)" and BACKEND == 'http':
+    with st.expander("Inference settings"):
+      batch_size = st.number_input(
+        "Keyphrases per request", min_value=1, max_value=64, value=8,
+        help="Number of keyphrases sent in a single API call"
+      )
+      max_workers = st.number_input(
+        "Concurrent requests", min_value=1, max_value=16, value=4,
+        help="Maximum number of API calls in flight at the same time"
+      )
+      rate_limit = st.number_input(
+        "Max requests per second", min_value=0.0, value=0.0,
+        help="Throttle API calls to stay under your rate limit, 0 for no limit"
+      )
+  else:
+    batch_size, max_workers, rate_limit = 5, 1, 0.0
   submit_button = st.form_submit_button(label="Submit")
 
 if not is_form_input_valid(submit_button, multiselectComponent, len(linesList), API_KEY):
@@ -217,23 +256,8 @@ else:
     if submit_button:
       st.session_state.valid_inputs_received = True
     
-    listToAppend = []
-
-    for row in linesList:
-      output = send_query(
-        API_KEY,
-        {
-          "inputs": row,
-          "parameters": {"candidate_labels": multiselectComponent},
-          "options": {"wait_for_model": True}
-        }
-      )
-      listToAppend.append(output)
-      #df = pd.DataFrame.from_dict(output)
-
-    st.success('✅ Done!')
-
-    df = pd.DataFrame.from_dict(listToAppend)
+    client = get_client(API_KEY, int(batch_size), int(max_workers), float(rate_limit))
+    hits_before = client.cache.hits
 
     st.caption("")
     st.markdown("### Check classifier results")
@@ -246,13 +270,50 @@ else:
     )
 
     st.caption("")
-    # List comprehension to convert the decimals to percentages
-    f = [[f"{x:.2%}" for x in row] for row in df["scores"]]
-    df["classification scores"] = f
-    df.drop('scores', inplace=True, axis=1)
+    progress = st.progress(0.0, text="Classifying keyphrases...")
+    live_table = st.empty()
+
+    # Chunks are shown and appended to the CSV buffer as soon as they finish
+    chunk_size = int(batch_size) * int(max_workers) if BACKEND == 'http' else 32
+    chunks = []
+    csv_buffer = io.StringIO()
+    done = 0
+    start = time.perf_counter()
+    for listToAppend in client.iter_classify(linesList, multiselectComponent, chunk_size):
+      chunk_df = explode_scores(listToAppend, multiselectComponent)
+      chunk_df.index = pd.RangeIndex(done, done + len(chunk_df))
+      chunk_df.to_csv(csv_buffer, header=not chunks)
+      if not chunks:
+        table = live_table.dataframe(chunk_df)
+      else:
+        table.add_rows(chunk_df)
+      chunks.append(chunk_df)
+
+      done += len(chunk_df)
+      elapsed = time.perf_counter() - start
+      per_phrase = elapsed / done
+      eta = per_phrase * (len(linesList) - done)
+      progress.progress(
+        done / len(linesList),
+        text=f"{done}/{len(linesList)} keyphrases · {per_phrase * 1000:.0f} ms per keyphrase · ETA {eta:.0f}s"
+      )
+    run_hits = client.cache.hits - hits_before
 
-    # This is to rename the column
-    df.rename(columns={"sequence": "keyphrase"}, inplace=True)
+    progress.empty()
+    live_table.empty()
+    st.success('✅ Done!')
+    st.caption(
+      f"{run_hits} of {len(linesList)} keyphrases served from cache, "
+      f"{len(linesList) - run_hits} sent to the API"
+    )
+
+    df = pd.concat(chunks)
+    failed = df[df["error"].notna()]
+    if not failed.empty:
+      st.warning(
+        f"⚠️ {len(failed)} keyphrases could not be classified, see the `error` column. "
+        "Submit again to retry them."
+      )
 
     # The code below is for Ag-grid
     gb = GridOptionsBuilder.from_dataframe(df)
@@ -262,6 +323,12 @@ else:
       groupable=True,
       #Show row group panel added in library file
     )
+    gb.configure_columns(
+      [*multiselectComponent, "margin"],
+      type=["numericColumn"],
+      valueFormatter=percent_formatter,
+      enableValue=True,
+    )
     gb.configure_selection(selection_mode="multiple", use_checkbox=True)
     gb.configure_side_bar()
     gridOptions = gb.build()
@@ -270,6 +337,7 @@ else:
       df,
       gridOptions=gridOptions,
       enable_enterprise_modules=True,
+      allow_unsafe_jscode=True,
       update_mode=GridUpdateMode.MODEL_CHANGED,
       data_return_mode=DataReturnMode.FILTERED_AND_SORTED,
       height=300,
@@ -279,19 +347,15 @@ else:
 
     col3, col4 = st.columns([2, 2])
     with col3:
-      @st.cache_data
-      def convert_df(df):
-        # Important: Cache the conversion to prevent computation on every rerun
-        return df.to_csv().encode("utf-8")
-      
-      csv = convert_df(df)
-
       st.download_button(
         label="Download results as CSV",
-        data=csv,
+        data=csv_buffer.getvalue().encode("utf-8"),
         file_name="results.csv",
         mime="text/csv"
       )
-  except ValueError as ve:
-    st.warning("❄️ Add a valid HuggingFace API key in the text box above ☝️")
+  except InferenceError as e:
+    if e.status_code in (401, 403):
+      st.warning("❄️ Add a valid HuggingFace API key in the text box above ☝️")
+    else:
+      st.error(f"The Hugging Face Inference API request failed: {e}")
     st.stop()
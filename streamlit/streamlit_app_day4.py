@@ -5,28 +5,20 @@ Created on Thu Sept 7 11:19 2023
 """
 
 #import libs
-import pandas as pd
-import numpy as np
+import os
+import time
+
 import plotly.graph_objects as go
 import plotly.express as px
 import streamlit as st
-from datetime import datetime
 
-#function definitions
-def style_negative(v, props=''):
-    """ Style negative values in dataframe """
-    try:
-        return props if v < 0 else None
-    except:
-        pass
-
-def style_positive(v, props=''):
-    """ Style positive values in dataframe """
-    try:
-        return props if v > 0 else None
-    except:
-        pass
+from dashboard_utils.derived import build_derived_tables
+from dashboard_utils.ingest import load_dashboard_data
+from dashboard_utils.out_of_core import DuckDBTimeSeries
+from dashboard_utils.refresher import BackgroundRefresher
+from dashboard_utils.styling import percent_formats, sign_styles, style_rows
 
+#function definitions
 def audience_simple(country):
     """ Show top represented countries """
     if country == 'US':
@@ -37,86 +29,73 @@ def audience_simple(country):
         return 'Other'
 
 #load data
-@st.cache_data
-def load_data():
-    df_raw = pd.read_csv(
-        './data/Aggregated_Metrics_By_Video.csv'
-    )
-    
-    df_raw.columns = ['Video','Video title','Video publish time','Comments added','Shares','Dislikes','Likes',
-                    'Subscribers lost','Subscribers gained','RPM(USD)','CPM(USD)','Average % viewed','Average view duration',
-                    'Views','Watch time (hours)','Subscribers','Your estimated revenue (USD)','Impressions','Impressions ctr(%)']
-    
-    df_raw['Video publish time'] = pd.to_datetime(df_raw['Video publish time'], format='%b %d, %Y')
-    df_raw['Average view duration'] = df_raw['Average view duration'].apply(lambda x: datetime.strptime(x, '%H:%M:%S'))
-    df_raw['Avg_duration_sec'] = df_raw['Average view duration'].apply(lambda x: x.second + x.minute*60 + x.hour*3600)
-    df_raw['Engagement_ratio'] = (df_raw['Comments added'] + df_raw['Shares'] + df_raw['Dislikes'] + df_raw['Likes']) / df_raw.Views
-    df_raw['Views / sub gained'] = df_raw['Views'] / df_raw['Subscribers gained']
-    df_raw.sort_values('Video publish time', ascending=False, inplace=True)
-    df_agg_sub = pd.read_csv('./data/Aggregated_Metrics_By_Country_And_Subscriber_Status.csv')
-    df_comments = pd.read_csv('./data/Aggregated_Metrics_By_Video.csv')
-    df_time = pd.read_csv('./data/Video_Performance_Over_Time.csv', parse_dates=['Date'])
-    df_time['Date'] = pd.to_datetime(df_time['Date'], format='%d %b %Y')
-    return df_raw, df_agg_sub, df_comments, df_time
+# A background thread polls ./data and rebuilds everything below when a CSV is
+# replaced, then swaps the new version in at once. Reruns only read the current
+# snapshot, so no session waits on a rebuild. The objects are shared by every
+# session without copying, the tables below must be treated as read-only.
+# DASHBOARD_TIME_BACKEND=duckdb keeps the daily table out of memory: filters and
+# percentiles run in DuckDB over DASHBOARD_TIME_SOURCE (CSV, Parquet or a glob of
+# per channel files), capped at DASHBOARD_MEMORY_LIMIT.
+TIME_BACKEND = os.environ.get('DASHBOARD_TIME_BACKEND', 'pandas')
+TIME_SOURCE = os.environ.get('DASHBOARD_TIME_SOURCE', './data/Video_Performance_Over_Time.csv')
+MEMORY_LIMIT = os.environ.get('DASHBOARD_MEMORY_LIMIT', '2GB')
+REFRESH_INTERVAL = float(os.environ.get('DASHBOARD_REFRESH_INTERVAL', '10'))
+# Rows styled and sent per rerun in the Aggregate Metrics table
+PAGE_SIZE = 250
+
+def build_dashboard():
+    # Vectorized parsing, reloaded from Parquet snapshots while the CSVs are unchanged
+    data = load_dashboard_data('./data', load_time=TIME_BACKEND != 'duckdb')
+    df_agg, df_agg_sub, df_comments, df_time = data
+    time_store = None
+    if TIME_BACKEND == 'duckdb':
+        time_store = DuckDBTimeSeries(TIME_SOURCE, df_agg, memory_limit=MEMORY_LIMIT)
+    tables = build_derived_tables(df_agg, df_agg_sub, df_time, time_store, df_comments=df_comments)
+    # Red/green sign colouring of the aggregate table, one vectorized pass per data version
+    styles = sign_styles(tables.df_agg_diff_final), percent_formats(tables.df_agg_diff_final)
+    return data, tables, styles
+
+def close_dashboard(value):
+    """ Release the DuckDB connection and sorted copy of a replaced snapshot """
+    _, tables, _ = value
+    if isinstance(tables.videos.time, DuckDBTimeSeries):
+        tables.videos.time.close()
+
+@st.cache_data(max_entries=32)
+def show_table_page(version, start, _df, _styles, _formats):
+    """ Render one page of the aggregate table, reruns replay the cached element """
+    st.dataframe(style_rows(_df, _styles, _formats, start, start + PAGE_SIZE))
+
+@st.cache_resource
+def get_refresher():
+    # The DuckDB source can live outside ./data, its files are watched too
+    sources = (TIME_SOURCE,) if TIME_BACKEND == 'duckdb' else ()
+    return BackgroundRefresher('./data', build_dashboard, interval=REFRESH_INTERVAL,
+                               sources=sources, close=close_dashboard).start()
 
 #Create dataframes
-df_agg, df_agg_sub, df_comments, df_time = load_data()
-
-#Engineer data
-df_agg_diff = df_agg.copy()
-metric_date_12mo = df_agg_diff['Video publish time'].max() - pd.DateOffset(months=12)
-median_agg = df_agg_diff[df_agg_diff['Video publish time'] >= metric_date_12mo].median(numeric_only=True)
-
-#create differences from the median for values
-numeric_cols = np.array((df_agg_diff.dtypes == 'float64') | (df_agg_diff.dtypes == 'int64'))
-df_agg_diff.iloc[:, numeric_cols] = (df_agg_diff.iloc[:, numeric_cols] - median_agg).div(median_agg)
-
-#merge daily data with publish data to get delta
-df_time_diff = pd.merge(df_time, df_agg.loc[:, ['Video', 'Video publish time']], left_on='External Video ID', right_on='Video')
-df_time_diff['days_published'] = (df_time_diff['Date'] - df_time_diff['Video publish time']).dt.days
-
-#get last 12 months of data rather than all data
-date_12mo = df_agg['Video publish time'].max() - pd.DateOffset(months=12)
-df_time_diff_yr = df_time_diff[df_time_diff['Video publish time'] >= date_12mo]
-
-#get daily view data (first30), median & percentiles
-views_days = pd.pivot_table(df_time_diff_yr, index='days_published', values='Views', aggfunc=[
-    np.mean,
-    np.median,
-    lambda x: np.percentile(x, 80),
-    lambda x: np.percentile(x, 20)
-]).reset_index()
-views_days.columns = ['days_published', 'mean_views', 'median_views', '80pct_views','20pct_views']
-views_days = views_days[views_days['days_published'].between(0, 30)]
-views_cumulative = views_days.loc[:, ['days_published', 'median_views', '80pct_views', '20pct_views']]
-views_cumulative.loc[:,['median_views', '80pct_views', '20pct_views']] = views_cumulative.loc[:,['median_views', '80pct_views', '20pct_views']].cumsum()
+refresher = get_refresher()
+snapshot = refresher.current
+version = snapshot.version
+(df_agg, df_agg_sub, df_comments, df_time), tables, (styles, df_to_pct) = snapshot.value
+views_cumulative = tables.views_cumulative
 
 ####################################
 # Streamlit interface related code #
 ####################################
 #Build Dashboard
 add_sidebar = st.sidebar.selectbox('Aggregate or Individual Video', ('Aggregate Metrics', 'Individual Video Analysis'))
+refresh_age = int(time.time() - snapshot.refreshed_at)
+st.sidebar.caption(f'Data version {version}, refreshed {refresh_age // 60} min {refresh_age % 60} s ago')
+if refresher.last_error is not None:
+    st.sidebar.caption(f'Last refresh failed: {refresher.last_error}')
 
 ## Aggregate metrics
 if add_sidebar == 'Aggregate Metrics':
     st.write('Ken Jee YouTube Aggregated Data')
 
-    df_agg_metrics = df_agg[[
-        'Video publish time',
-        'Views', 'Likes',
-        'Subscribers',
-        'Shares',
-        'Comments added',
-        'RPM(USD)',
-        'Average % viewed',
-        'Avg_duration_sec',
-        'Engagement_ratio',
-        'Views / sub gained'
-    ]]
-    metric_date_6mo = df_agg_metrics['Video publish time'].max() - pd.DateOffset(months=6)
-    metric_date_12mo = df_agg_metrics['Video publish time'].max() - pd.DateOffset(months=12)
-    metric_medians6mo = df_agg_metrics[df_agg_metrics['Video publish time'] >= metric_date_6mo].median(numeric_only=True)
-    metric_medians12mo = df_agg_metrics[df_agg_metrics['Video publish time'] >= metric_date_12mo].median(numeric_only=True)
+    metric_medians6mo = tables.metric_medians6mo
+    metric_medians12mo = tables.metric_medians12mo
 
     col1, col2, col3, col4, col5 = st.columns(5)
     columns = [col1, col2, col3, col4, col5]
@@ -130,56 +109,34 @@ if add_sidebar == 'Aggregate Metrics':
             count += 1
             if count >= 5:
                 count = 0
-    # get date information / trim to relevant data
-    df_agg_diff['Publish_date'] = df_agg_diff['Video publish time'].apply(lambda x: x.date())
-    df_agg_diff_final = df_agg_diff.loc[:, [
-        'Video title',
-        'Publish_date',
-        'Views',
-        'Likes',
-        'Subscribers',
-        'Shares',
-        'Comments added',
-        'RPM(USD)',
-        'Average % viewed',
-        'Avg_duration_sec',
-        'Engagement_ratio',
-        'Views / sub gained'
-    ]]
-
-    df_agg_numeric_lst = df_agg_diff_final.median(numeric_only=True).index.tolist()
-    df_to_pct = {}
-    for i in df_agg_numeric_lst:
-        df_to_pct[i] = '{:.1%}'.format
-
-    st.dataframe(df_agg_diff_final.style.hide()
-                .applymap(
-                    style_negative,
-                    props='color:red;'
-                )
-                .applymap(
-                    style_positive,
-                    props='color:green;'
-                )
-                .format(df_to_pct)
-    )
+    df_agg_diff_final = tables.df_agg_diff_final
+
+    # Large channels are paged, only the visible rows go through the Styler
+    start = 0
+    pages = -(-len(df_agg_diff_final) // PAGE_SIZE)
+    if pages > 1:
+        page = st.number_input(f'Page (of {pages})', min_value=1, max_value=pages, value=1)
+        start = (page - 1) * PAGE_SIZE
+    # Styler.format dominates the render, a page is only styled once per data version
+    show_table_page(version, start, df_agg_diff_final, styles, df_to_pct)
 
 if add_sidebar == 'Individual Video Analysis':
     videos = tuple(df_agg['Video title'])
     st.write('Individual Video Performance')
     video_select = st.selectbox('Pick a Video', videos)
 
-    agg_filtered = df_agg[df_agg['Video title'] == video_select]
-    agg_sub_filtered = df_agg_sub[df_agg_sub['Video Title'] == video_select]
-    agg_sub_filtered['Country'] = agg_sub_filtered['Country Code'].apply(audience_simple)
-    agg_sub_filtered.sort_values('Is Subscribed', inplace=True)
+    # Prebuilt per-video slices, no scan of the full tables
+    agg_filtered, agg_sub_filtered, agg_time_filtered = tables.videos.lookup(video_select)
+    # The slices are shared across sessions, derive new frames instead of mutating them
+    agg_sub_filtered = agg_sub_filtered.assign(
+        Country=agg_sub_filtered['Country Code'].map(audience_simple)
+    ).sort_values('Is Subscribed')
 
     fig = px.bar(agg_sub_filtered, x = 'Views', y = 'Is Subscribed', color = 'Country', orientation='h')
     st.plotly_chart(fig)
 
-    agg_time_filtered = df_time_diff[df_time_diff['Video Title'] == video_select]
+    # Already sorted by days_published
     first_30 = agg_time_filtered[agg_time_filtered['days_published'].between(0, 30)]
-    first_30 = first_30.sort_values('days_published')
 
     fig2 = go.Figure()
     fig2.add_trace(go.Scatter(
@@ -221,4 +178,30 @@ if add_sidebar == 'Individual Video Analysis':
         yaxis_title='Cumulative views'
     )
 
-    st.plotly_chart(fig2)
\ No newline at end of file
+    st.plotly_chart(fig2)
+
+    # Comment analytics, aggregated once per data version
+    video_id = tables.videos.title_to_id.get(video_select)
+    comment_stats = tables.comments.video_summary(video_id)
+    st.write('Comments')
+    if comment_stats is None:
+        st.write('No comments for this video.')
+    else:
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric(label='Comments', value=int(comment_stats['comments']))
+        col2.metric(label='Comments / day (first week)', value=round(comment_stats['first_week_per_day'], 1))
+        col3.metric(label='Comments / day (overall)', value=round(comment_stats['comments_per_day'], 2))
+        col4.metric(label='Median likes', value=comment_stats['median_likes'])
+
+        cumulative_comments = tables.comments.cumulative_comments(video_id)
+        fig3 = px.line(cumulative_comments, x='days_published', y='cumulative', title='Comments since published')
+        fig3.update_layout(xaxis_title='Days Since Published', yaxis_title='Cumulative comments')
+        st.plotly_chart(fig3)
+
+        like_distribution = tables.comments.like_distribution(video_id)
+        fig4 = px.bar(x=like_distribution.index.astype(str), y=like_distribution.values, title='Likes per comment')
+        fig4.update_layout(xaxis_title='Likes', yaxis_title='Comments')
+        st.plotly_chart(fig4)
+
+        st.write('Top commenters')
+        st.dataframe(tables.comments.top_commenters(video_id), hide_index=True)
\ No newline at end of file
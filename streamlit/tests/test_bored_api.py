@@ -0,0 +1,150 @@
+"""
+CircuitBreaker on a fake clock, and BoredClient against the local stub of the Bored API.
+"""
+
+import time
+
+import pytest
+
+from benchmarks.stub_server import BoredHandler
+from dashboard_utils.bored_api import BoredAPIError, BoredClient, CircuitBreaker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_breaker_opens_after_threshold(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30, clock=clock)
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert not breaker.is_open
+    breaker.record_failure()
+    assert breaker.is_open
+    assert not breaker.allow()
+    clock.advance(29)
+    assert not breaker.allow()
+
+
+def test_breaker_success_resets_the_count(clock):
+    breaker = CircuitBreaker(failure_threshold=3, clock=clock)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert not breaker.is_open
+
+
+def test_breaker_lets_one_trial_through(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, clock=clock)
+    breaker.record_failure()
+    clock.advance(30)
+    assert breaker.allow()
+    # Only one trial while it is in flight
+    assert not breaker.allow()
+    breaker.record_success()
+    assert not breaker.is_open
+    assert breaker.allow()
+
+
+def test_failed_trial_reopens(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30, clock=clock)
+    for _ in range(3):
+        breaker.record_failure()
+    clock.advance(30)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.is_open
+    assert not breaker.allow()
+    clock.advance(30)
+    assert breaker.allow()
+
+
+def test_suggestion_is_cached_for_ttl(stub, clock):
+    handler, url = stub(BoredHandler, '/api/activity')
+    client = BoredClient(url, ttl=60, prefetch=0, clock=clock)
+    activity, source = client.suggestion('music')
+    assert source == 'fetched'
+    assert activity['type'] == 'music'
+
+    clock.advance(59)
+    assert client.suggestion('music') == (activity, 'cached')
+    assert handler.seen == 1
+
+    clock.advance(1)
+    expired, source = client.suggestion('music')
+    assert source == 'fetched'
+    assert expired['key'] != activity['key']
+    assert handler.seen == 2
+    client.close()
+
+
+def test_new_suggestion_is_served_from_prefetch(stub, clock):
+    handler, url = stub(BoredHandler, '/api/activity')
+    client = BoredClient(url, ttl=60, prefetch=2, clock=clock)
+    client.warm(['cooking'])
+    deadline = time.monotonic() + 5
+    while len(client._ready.get('cooking', ())) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    first, source = client.suggestion('cooking')
+    assert source == 'prefetched'
+    second, source = client.suggestion('cooking', new=True)
+    assert source == 'prefetched'
+    assert first['key'] != second['key']
+    client.close()
+
+
+def test_stale_suggestion_while_circuit_is_open(stub, clock):
+    handler, url = stub(BoredHandler, '/api/activity')
+    client = BoredClient(url, prefetch=0, breaker=CircuitBreaker(3, 30, clock=clock), clock=clock)
+    shown, _ = client.suggestion('social')
+
+    handler.mode = 'fail'
+    for _ in range(3):
+        assert client.suggestion('social', new=True) == (shown, 'stale')
+    assert client.breaker.is_open
+    requests_sent = handler.seen
+    # No request reaches the upstream while the circuit is open
+    assert client.suggestion('social', new=True) == (shown, 'stale')
+    assert handler.seen == requests_sent
+
+    handler.mode = 'ok'
+    clock.advance(30)
+    activity, source = client.suggestion('social', new=True)
+    assert source == 'fetched'
+    assert activity['key'] != shown['key']
+    assert not client.breaker.is_open
+    client.close()
+
+
+def test_nothing_to_show_returns_an_error(stub):
+    handler, url = stub(BoredHandler, '/api/activity', mode='fail')
+    client = BoredClient(url, prefetch=0)
+    activity, source = client.suggestion('diy')
+    assert source == 'stale'
+    assert 'error' in activity
+    client.close()
+
+
+def test_hanging_upstream_is_cut_by_the_timeout(stub):
+    handler, url = stub(BoredHandler, '/api/activity', mode='hang', hang_latency=2)
+    client = BoredClient(url, timeout=0.2, prefetch=0)
+    start = time.perf_counter()
+    with pytest.raises(BoredAPIError):
+        client.fetch('busywork')
+    assert time.perf_counter() - start < 1
+    client.close()
@@ -0,0 +1,113 @@
+"""
+InferenceClient against the local stub of the zero-shot endpoint.
+"""
+
+import json
+
+import pytest
+
+from dashboard_utils.inference import InferenceClient, InferenceError
+
+LABELS = ['Transactional', 'Informational', 'Navigational']
+
+
+def make_client(url, **kwargs):
+    kwargs = {'backoff_base': 0.01, 'backoff_max': 0.05, 'timeout': 2, **kwargs}
+    client = InferenceClient('stub', api_url=url, **kwargs)
+    # No warmup probe, the stub only counts classification requests
+    client._warm = True
+    return client
+
+
+def test_retries_then_succeeds(stub):
+    handler, url = stub(fail_first=2)
+    client = make_client(url, max_retries=3)
+    rows = client.classify(['a phrase'], LABELS)
+    client.close()
+
+    assert handler.seen == 3
+    assert rows[0]['sequence'] == 'a phrase'
+    assert 'error' not in rows[0]
+    assert sorted(rows[0]['labels']) == sorted(LABELS)
+
+
+def test_gives_up_after_max_retries(stub):
+    handler, url = stub(fail_first=100)
+    client = make_client(url, max_retries=2)
+    rows = client.classify(['a phrase'], LABELS)
+    client.close()
+
+    assert handler.seen == 3
+    assert 'HTTP 503' in rows[0]['error']
+
+
+@pytest.mark.parametrize('status', [401, 403])
+def test_auth_errors_raise(stub, status):
+    handler, url = stub(api_key='right key', auth_status=status)
+    client = InferenceClient('wrong key', api_url=url, max_retries=3)
+    with pytest.raises(InferenceError) as info:
+        client.classify(['one', 'two', 'three'], LABELS)
+    client.close()
+
+    assert info.value.status_code == status
+    # Raised by the warmup probe, without retrying
+    assert handler.seen == 1
+
+
+def test_poisoned_row_is_isolated(stub):
+    phrases = [f'phrase {i}' for i in range(10)]
+    handler, url = stub(poison_inputs=frozenset({'phrase 6'}))
+    client = make_client(url, batch_size=4)
+    rows = client.classify(phrases, LABELS)
+    client.close()
+
+    failed = [row['sequence'] for row in rows if 'error' in row]
+    assert failed == ['phrase 6']
+    assert all('labels' in row for row in rows if row['sequence'] != 'phrase 6')
+
+
+def test_failed_batch_rows_get_one_retry(stub):
+    handler, url = stub(fail_first=100)
+    client = make_client(url, batch_size=4, max_retries=2)
+    rows = client.classify(['a', 'b', 'c', 'd'], LABELS)
+    client.close()
+
+    # The batch and its 2 retries, then two requests per row
+    assert handler.seen == 3 + 4 * 2
+    assert all('error' in row for row in rows)
+
+
+def test_row_fallback_survives_a_transient_error(stub):
+    # The batch and its 2 retries fail, then the first row's first attempt
+    handler, url = stub(fail_first=4)
+    client = make_client(url, batch_size=4, max_retries=2)
+    rows = client.classify(['a', 'b', 'c', 'd'], LABELS)
+    client.close()
+
+    assert not [row for row in rows if 'error' in row]
+    assert handler.seen == 3 + 2 + 3
+
+
+def test_output_keeps_input_order(stub):
+    phrases = [f'keyphrase number {i}' for i in range(60)]
+    # Slow responses finish out of order across the workers
+    handler, url = stub(slow_rate=0.3, slow_latency=0.05, fail_rate=0.1)
+    client = make_client(url, batch_size=3, max_workers=8, max_retries=6)
+    rows = client.classify(phrases, LABELS)
+    client.close()
+
+    assert [row['sequence'] for row in rows] == phrases
+    assert not [row for row in rows if 'error' in row]
+
+
+def test_stub_output_matches_single_requests(stub):
+    phrases = ['short', 'a longer phrase', 'mid size']
+    handler, url = stub()
+    batched_client = make_client(url, batch_size=3)
+    single_client = make_client(url, batch_size=1)
+    batched = batched_client.classify(phrases, LABELS)
+    single = single_client.classify(phrases, LABELS)
+    batched_client.close()
+    single_client.close()
+
+    assert json.dumps(batched) == json.dumps(single)